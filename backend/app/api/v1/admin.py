@@ -1,9 +1,27 @@
 # backend/app/api/v1/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import uuid
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import your database session
-from app.database import get_db
+from app.database import get_async_db, get_pool_stats
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.invalidation import invalidation_bus
+from app.core.startup import startup_timer
+from app.core.user_cache import CurrentUser
+from app.api.v1.users import get_current_admin_user
+from app.api.v1.jobs import job_response
+from app.schemas.job_schema import JobResponse
+from app.schemas.user_schema import UserImportReport
+from app.services.uploads import UploadTooLargeError, iter_upload, read_upload_limited
+from app.services.attendance_pipeline import attendance_writer
+from app.services.attendance_feed import attendance_feed
+from app.services.storage_service import storage, user_import_upload_key
+from app.services.job_queue import enqueue, queue_stats
+from app.services.face_derivatives import face_derivatives
+from app.services.user_import_service import UserImportFormatError, import_users
 
 # Import any models/schemas you'll need later for admin management
 # For example, to manage users or roles
@@ -17,9 +35,138 @@ admin_router = APIRouter() # <--- ตรงนี้สำคัญมาก!
 
 # Example: A simple test endpoint for admin (you can remove this later)
 @admin_router.get("/status", response_model=dict)
-async def get_admin_status(db: Session = Depends(get_db)):
+async def get_admin_status(current_user: CurrentUser = Depends(get_current_admin_user)):
     """
     A placeholder endpoint to test if the admin router is working.
     (You'll replace this with actual admin-specific logic, e.g., user management, later.)
     """
-    return {"message": "Admin endpoint is working! This area requires admin privileges."}
\ No newline at end of file
+    return {"message": "Admin endpoint is working! This area requires admin privileges."}
+
+@admin_router.get("/startup", response_model=dict)
+async def get_startup_timings(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """เวลาที่ใช้ในแต่ละขั้นตอนตอน startup ของ worker process นี้ (มิลลิวินาที)"""
+    return startup_timer.stats()
+
+@admin_router.get("/db-pool", response_model=dict)
+async def get_db_pool_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """
+    สถิติ connection pool ของ worker process ที่รับ request นี้
+    (checked out, overflow, จำนวนครั้งที่ต้องรอ connection และเวลารอรวม/สูงสุด)
+    """
+    return get_pool_stats()
+
+@admin_router.get("/password-hashing", response_model=dict)
+async def get_password_hashing_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """
+    สถิติของ password hashing executor ใน worker process นี้
+    (queue depth, งานที่กำลังทำ, จำนวนที่ถูกปฏิเสธ และเวลาเฉลี่ยต่อครั้ง)
+    """
+    return password_hasher.stats()
+
+@admin_router.get("/attendance-pipeline", response_model=dict)
+async def get_attendance_pipeline_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """
+    สถิติของ attendance writer ใน worker process นี้
+    (จำนวน event ที่ค้าง, แถวที่เขียนแล้ว, แถวต่อวินาที และเวลา flush เฉลี่ย/สูงสุด)
+    """
+    return attendance_writer.stats()
+
+@admin_router.get("/attendance-feed", response_model=dict)
+async def get_attendance_feed_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """จำนวน session/ผู้ติดตาม live feed ใน worker process นี้ และจำนวนผู้ติดตามที่ถูกตัดเพราะอ่านไม่ทัน"""
+    return attendance_feed.stats()
+
+
+@admin_router.get("/cache-invalidation", response_model=dict)
+async def get_cache_invalidation_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """สถานะของ listener (LISTEN/NOTIFY) ใน worker process นี้ และเวลาที่ใช้ส่ง invalidation ข้าม worker"""
+    return invalidation_bus.stats()
+
+
+@admin_router.get("/storage", response_model=dict)
+async def get_storage_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """backend ของ storage และจำนวน/ขนาดการอัปโหลด ดาวน์โหลด และ presigned URL ใน worker process นี้"""
+    return storage.stats()
+
+
+@admin_router.get("/face-derivatives", response_model=dict)
+async def get_face_derivative_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """จำนวนรูปย่อที่สร้าง (ตอนอัปโหลดและตอนถูกขอ) และงานที่ข้ามไปเพราะ face encoder pool เต็ม"""
+    return face_derivatives.stats()
+
+@admin_router.get("/jobs", response_model=dict)
+async def get_job_queue_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """จำนวนงานในคิวต่อ job type/status และอายุของงานที่รอนานที่สุด (worker ดึงไม่ทัน = ค่านี้สูง)"""
+    return await queue_stats(db)
+
+def _import_format(file: UploadFile, format: Optional[str]) -> str:
+    return format or ("ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv")
+
+@admin_router.post("/users/import", response_model=UserImportReport)
+async def bulk_import_users(
+    file: UploadFile = File(..., description="ไฟล์ CSV (มี header) หรือ NDJSON หนึ่งผู้ใช้ต่อบรรทัด"),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="ถ้าไม่ระบุ จะเดาจากนามสกุลไฟล์"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    สร้างผู้ใช้จำนวนมากจากไฟล์ (username, first_name, last_name, email, password, student_id, teacher_id, roles)
+    คืนผลรายแถว; รันซ้ำด้วยไฟล์เดิมได้ ผู้ใช้ที่มีอยู่แล้วจะเป็น "skipped"
+    """
+    file_format = _import_format(file, format)
+    try:
+        content = await read_upload_limited(file, settings.USER_IMPORT_MAX_BYTES)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import file must be at most {settings.USER_IMPORT_MAX_BYTES} bytes",
+        )
+    try:
+        return await import_users(db, content, file_format)
+    except UserImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@admin_router.post("/users/import/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_import_users_job(
+    file: UploadFile = File(..., description="ไฟล์ CSV (มี header) หรือ NDJSON หนึ่งผู้ใช้ต่อบรรทัด"),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="ถ้าไม่ระบุ จะเดาจากนามสกุลไฟล์"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    เหมือน POST /users/import แต่ทำใน background worker (สำหรับไฟล์ใหญ่ที่ใช้เวลานานกว่า request timeout)
+    ไฟล์ถูกเก็บลง storage แล้วตอบ 202 ทันที ติดตาม progress และรายงานผลได้ที่ GET /jobs/{job_id}
+    """
+    file_format = _import_format(file, format)
+    key = user_import_upload_key(uuid.uuid4(), file_format)
+    try:
+        await storage.save_stream(key, iter_upload(file, settings.USER_IMPORT_MAX_BYTES), file.content_type)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import file must be at most {settings.USER_IMPORT_MAX_BYTES} bytes",
+        )
+    job = await enqueue(
+        db, "user_import", {"storage_key": key, "format": file_format}, created_by_user_id=current_user.user_id,
+    )
+    return job_response(job)
+
+@admin_router.post("/users/export/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def export_users_job(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    role: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    class_id: Optional[uuid.UUID] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    เหมือน GET /users/export แต่เขียนไฟล์ลง storage ใน background worker
+    เมื่องานเสร็จ GET /jobs/{job_id} คืน result_url สำหรับดาวน์โหลดไฟล์
+    """
+    payload = {"format": format, "role": role, "is_active": is_active, "class_id": str(class_id) if class_id else None}
+    job = await enqueue(db, "users_export", payload, created_by_user_id=current_user.user_id)
+    return job_response(job)
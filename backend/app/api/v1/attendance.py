@@ -1,13 +1,35 @@
 # backend/app/api/v1/attendance.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import uuid
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # Import your database session
-from app.database import get_db
+from app.database import get_db, get_async_db, AsyncSessionLocal
 
-# Import any models/schemas you'll need later for attendance management
-# from app.models.attendance import AttendanceRecord # You'll need this for your attendance records
-# from app.schemas.attendance_schema import AttendanceCreate, AttendanceResponse # And these schemas
+from app.core.config import settings
+from app.core.deps import require_face_processing
+from app.core.security import decode_access_token
+from app.core.user_cache import CurrentUser, resolve_current_user
+from app.models.attendance import Attendance
+from app.models.attendance_enums import AttendanceStatus
+from app.models.attendance_rollup import AttendanceDailyStats, AttendanceSessionStats, AttendanceStudentStats
+from app.models.class_session import ClassSession
+from app.schemas.attendance_schema import CheckInResponse, DailyStatsResponse, SessionStatsResponse, StudentStatsResponse
+from app.api.v1.users import get_current_active_user, get_current_admin_user
+from app.crud.class_crud import get_class_for_staff
+from app.services.image_pipeline import read_image_upload, ImageTooLargeError, InvalidImageError
+from app.services.face_encoder_pool import EncoderBusyError
+from app.services.face_batcher import face_checkin_batcher
+from app.services.face_recognition_service import class_face_indexes
+from app.services.class_session_service import class_sessions
+from app.services.roster_service import class_rosters
+from app.services.attendance_pipeline import AttendanceBufferFullError, AttendanceEvent, attendance_writer, feed_message
+from app.services.attendance_feed import attendance_feed
 
 # Initialize the API router for attendance
 attendance_router = APIRouter() # <--- ตรงนี้สำคัญมาก!
@@ -19,4 +41,195 @@ async def get_all_attendance_records(db: Session = Depends(get_db)):
     A placeholder endpoint to test if the attendance router is working.
     (You'll replace this with actual attendance record logic later.)
     """
-    return {"message": "Attendance endpoint is working! You should see attendance data here later."}
\ No newline at end of file
+    return {"message": "Attendance endpoint is working! You should see attendance data here later."}
+
+
+@attendance_router.post(
+    "/check-in", response_model=CheckInResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_face_processing)],
+)
+async def check_in_with_face(
+    class_id: uuid.UUID = Form(...),
+    image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    เช็คชื่อเข้าเรียนด้วยใบหน้า: encode รูปใน face encoder process pool (ไม่ block event loop)
+    แล้วเทียบกับ encodings ของนักเรียนใน class นั้นเท่านั้น
+    """
+    # ใช้ roster snapshot ที่ cache ไว้ (check-in ทั้งคาบไม่ต้อง query class_students ทุกครั้ง)
+    roster = await class_rosters.get(db, class_id)
+    if roster is None or current_user.user_id not in roster.student_ids:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not enrolled in this class")
+
+    class_index = await class_face_indexes.get(db, class_id)
+    try:
+        # check-in ที่เข้ามาพร้อมๆ กันจะถูกรวมเป็น batch เดียวก่อนส่งเข้า encoder pool
+        result = await face_checkin_batcher.verify(await read_image_upload(image), class_index, settings.FACE_MATCH_TOLERANCE)
+    except EncoderBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Face recognition is busy, please try again.",
+            headers={"Retry-After": "1"},
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if not result.face_found:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="No face detected in the uploaded image")
+
+    match = result.match
+    verified = match is not None and match.user_id == current_user.user_id
+
+    # session ที่กำลังดำเนินอยู่ (ถ้าไม่มี = session ของทั้งวัน สร้างอัตโนมัติเมื่อมี check-in แรก)
+    session = await class_sessions.resolve(db, class_id)
+    event = AttendanceEvent(
+        class_id=class_id,
+        session_id=session.session_id,
+        session_date=session.session_date,
+        student_id=current_user.user_id,
+        status=AttendanceStatus.PRESENT.value if verified else AttendanceStatus.UNVERIFIED_FACE.value,
+    )
+    try:
+        # check-in ถูกรวมเขียนเป็น batch (upsert หลายแถวต่อ transaction) และคืนค่าเมื่อ commit แล้ว
+        attendance = await attendance_writer.submit(event)
+    except AttendanceBufferFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Attendance service is busy, please try again.",
+            headers={"Retry-After": "1"},
+        )
+
+    return CheckInResponse(
+        attendance_id=attendance.attendance_id,
+        class_id=attendance.class_id,
+        session_id=attendance.session_id,
+        student_id=attendance.student_id,
+        status=attendance.status,
+        timestamp=attendance.timestamp,
+        session_date=attendance.session_date,
+        face_distance=match.distance if verified else None,
+    )
+
+
+@attendance_router.get("/me/stats", response_model=List[StudentStatsResponse])
+async def get_my_attendance_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """สถิติการเข้าเรียนของผู้ใช้ปัจจุบันในทุกคลาส"""
+    result = await db.execute(select(AttendanceStudentStats).where(AttendanceStudentStats.student_id == current_user.user_id))
+    return [StudentStatsResponse.model_validate(row) for row in result.scalars()]
+
+
+@attendance_router.get("/sessions/{session_id}/stats", response_model=SessionStatsResponse)
+async def get_session_attendance_stats(
+    session_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """สรุปการเข้าเรียนของ session หนึ่ง (อาจารย์ผู้สอนหรือ admin)"""
+    session = await db.get(ClassSession, session_id)
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    await get_class_for_staff(db, session.class_id, current_user)
+    row = await db.get(AttendanceSessionStats, session_id)
+    if row is None:
+        return SessionStatsResponse(session_id=session_id, class_id=session.class_id, session_date=session.session_date)
+    return SessionStatsResponse.model_validate(row)
+
+
+@attendance_router.get("/stats/daily", response_model=List[DailyStatsResponse])
+async def get_daily_attendance_stats(
+    start_date: date = Query(...),
+    end_date: Optional[date] = Query(None, description="ค่าเริ่มต้น = start_date"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """สรุปการเข้าเรียนของทุกคลาสรวมกันรายวัน (admin)"""
+    result = await db.execute(
+        select(AttendanceDailyStats)
+        .where(AttendanceDailyStats.stat_date.between(start_date, end_date or start_date))
+        .order_by(AttendanceDailyStats.stat_date)
+    )
+    return [DailyStatsResponse.model_validate(row) for row in result.scalars()]
+
+
+@attendance_router.websocket("/sessions/{session_id}/feed")
+async def attendance_session_feed(websocket: WebSocket, session_id: uuid.UUID, token: Optional[str] = Query(None)):
+    """
+    Live feed การเช็คชื่อของ session (อาจารย์ผู้สอนหรือ admin)
+    ส่ง access token ผ่าน ?token= หรือ header Authorization: Bearer
+
+    1. ส่ง {"type": "snapshot", ...} สถานะปัจจุบันของทุกแถวและยอดสรุปของ session
+    2. จากนั้นส่ง {"type": "attendance", ...} ทุกครั้งที่สถานะของนักเรียนเปลี่ยน
+       (เป็นสถานะล่าสุดทั้งแถว ถ้าซ้ำกับใน snapshot ให้เขียนทับได้เลย)
+    3. ส่ง {"type": "ping"} เมื่อไม่มี message นาน ATTENDANCE_FEED_HEARTBEAT_SECONDS
+
+    ถ้า client อ่านไม่ทันจนคิวเต็ม จะถูกปิดด้วย code 1013 ให้เชื่อมต่อใหม่เพื่อรับ snapshot ใหม่
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if token is None and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    token_data = decode_access_token(token) if token else None
+
+    # ใช้ DB session เฉพาะช่วง handshake ไม่ถือ connection ไว้ตลอดอายุของ WebSocket
+    async with AsyncSessionLocal() as db:
+        user = await resolve_current_user(db, token_data) if token_data else None
+        session = await db.get(ClassSession, session_id) if user is not None and user.is_active else None
+        if session is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        try:
+            await get_class_for_staff(db, session.class_id, user)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        # subscribe ก่อนอ่าน snapshot เพื่อไม่ให้ delta ที่เกิดระหว่างนั้นหายไป
+        subscription = attendance_feed.subscribe(session_id)
+        try:
+            rows = (
+                await db.execute(
+                    select(Attendance).where(
+                        Attendance.session_id == session_id,
+                        Attendance.session_date == session.session_date, # ให้ Postgres อ่านเฉพาะ partition ของเดือนนั้น
+                    )
+                )
+            ).scalars().all()
+            stats = await db.get(AttendanceSessionStats, session_id)
+            snapshot = {
+                "type": "snapshot",
+                "session_id": str(session_id),
+                "class_id": str(session.class_id),
+                "session_date": session.session_date.isoformat(),
+                "stats": (
+                    SessionStatsResponse.model_validate(stats)
+                    if stats is not None
+                    else SessionStatsResponse(session_id=session_id, class_id=session.class_id, session_date=session.session_date)
+                ).model_dump(mode="json"),
+                "records": [feed_message(row) for row in rows],
+            }
+        except Exception:
+            attendance_feed.unsubscribe(subscription)
+            raise
+
+    try:
+        await websocket.accept()
+        await websocket.send_json(snapshot)
+        while True:
+            try:
+                message = await subscription.get(timeout=settings.ATTENDANCE_FEED_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            if message is None:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Feed consumer too slow")
+                break
+            await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        attendance_feed.unsubscribe(subscription)
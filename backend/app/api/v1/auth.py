@@ -1,32 +1,46 @@
 # backend/app/api/v1/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone , timedelta
 from app.core.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.user_schema import UserCreate,  UserResponse, Token
 from app.models.user import User
-from app.services.db_service import get_user_by_email, get_user_by_username
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.services.db_service import get_user_by_email_async, get_user_by_username_async
+from app.core.user_cache import active_user_cache
+from app.core.security import (
+    PasswordHasherBusyError, create_access_token, get_password_hash_async, verify_and_update_password_async
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_create: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_create: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     ลงทะเบียนผู้ใช้ใหม่ในระบบ
     """
-    db_user_by_username = get_user_by_username(db, username=user_create.username)
+    db_user_by_username = await get_user_by_username_async(db, username=user_create.username)
     if db_user_by_username:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
 
     if user_create.email:
-        db_user_by_email = get_user_by_email(db, email=user_create.email)
+        db_user_by_email = await get_user_by_email_async(db, email=user_create.email)
         if db_user_by_email:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    hashed_password = get_password_hash(user_create.password)
+    try:
+        # bcrypt รันใน password hashing executor จึงไม่ block event loop
+        hashed_password = await get_password_hash_async(user_create.password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
 
     new_user = User(
         username=user_create.username,
@@ -43,24 +57,37 @@ def register_user(user_create: UserCreate, db: Session = Depends(get_db)):
 
     try:
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return new_user
+        await db.commit()
+        await db.refresh(new_user)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to register user: {e}")
 
+    # ผู้ใช้ใหม่ยังไม่มี role จึงไม่ต้องโหลด relationship roles (lazy load ใช้ไม่ได้กับ AsyncSession)
+    return UserResponse(
+        user_id=new_user.user_id,
+        username=new_user.username,
+        first_name=new_user.first_name,
+        last_name=new_user.last_name,
+        email=new_user.email,
+        is_active=new_user.is_active,
+        created_at=new_user.created_at,
+        updated_at=new_user.updated_at,
+        last_login_at=new_user.last_login_at,
+        roles=[],
+    )
+
 # login_for_access_token (คงเดิม)
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # ... โค้ดส่วนนี้คงเดิม ...
-    user = get_user_by_email(db, email=form_data.username) # ใช้ form_data.username เป็น email
+    user = await get_user_by_email_async(db, email=form_data.username) # ใช้ form_data.username เป็น email
     if not user:
         # ถ้าไม่พบด้วย email ลองหาด้วย username
-        user = get_user_by_username(db, username=form_data.username)
+        user = await get_user_by_username_async(db, username=form_data.username)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,14 +95,18 @@ async def login_for_access_token(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-    if not verify_password(form_data.password, user.password_hash):
+    try:
+        password_ok, new_hash = await verify_and_update_password_async(form_data.password, user.password_hash)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user_roles = [role.name for role in user.roles] # ดึง role names
+    user_roles = user.role_names # roles ถูกโหลดมาพร้อม user แล้ว (joinedload) และจะถูกใส่ไว้ใน JWT
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -84,9 +115,12 @@ async def login_for_access_token(
     )
 
     user.last_login_at = datetime.now(timezone.utc)
+    if new_hash:
+        # hash เดิมใช้ work factor ไม่ตรงกับ BCRYPT_ROUNDS -> เก็บ hash ใหม่ไปพร้อมกับ last_login_at
+        user.password_hash = new_hash
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    active_user_cache.invalidate(user.user_id)
 
      # สร้าง UserResponse instance แยกต่างหาก แล้วส่ง user_roles ที่เป็น list ของ string เข้าไป
     user_response_data = UserResponse(
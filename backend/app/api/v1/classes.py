@@ -1,22 +1,317 @@
 # backend/app/api/v1/classes.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import uuid
+from datetime import date, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import your database session
-from app.database import get_db
+from app.database import get_async_db
 
-# Import any models/schemas you'll need later for class management
-# from app.models.class_model import Class # You'll need this for your classes
-# from app.schemas.class_schema import ClassCreate, ClassResponse # And these schemas
+from app.core.user_cache import CurrentUser
+from app.api.v1.users import get_current_active_user
+from app.crud.class_crud import (
+    enroll_students, get_class_async, get_class_for_staff, get_student_count, list_classes_for_user, unenroll_students,
+)
+from app.models.class_model import Class
+from app.models.class_session import ClassSession
+from app.schemas.class_schema import (
+    ClassCreate, ClassResponse, ClassSessionCreate, ClassSessionResponse, EnrollmentRequest, EnrollmentResult,
+    RosterResponse, RosterStudentResponse,
+)
+from app.services.roster_service import class_rosters
+from app.services.cache_invalidation import invalidate_class_roster, invalidate_class_sessions
+from app.services.class_session_service import campus_date, campus_day_start
+from app.models.attendance_rollup import STATUS_COUNT_COLUMNS, AttendanceSessionStats, AttendanceStudentStats
+from app.schemas.attendance_schema import (
+    AttendanceCounts, AttendanceOverrideRequest, AttendanceResponse, ClassStatsResponse, SessionStatsResponse,
+    StudentStatsResponse,
+)
+from app.services.attendance_pipeline import AttendanceBufferFullError, AttendanceEvent, attendance_writer
 
 # Initialize the API router for classes
 class_router = APIRouter() # <--- ตรงนี้สำคัญมาก!
 
-# Example: A simple test endpoint for classes (you can remove this later)
-@class_router.get("/", response_model=dict) # Use dict for now, replace with List[ClassResponse] later
-async def get_all_classes(db: Session = Depends(get_db)):
+
+def _class_response(db_class: Class, student_count: int) -> ClassResponse:
+    return ClassResponse(
+        class_id=db_class.class_id,
+        name=db_class.name,
+        description=db_class.description,
+        teacher_id=db_class.teacher_id,
+        start_time=db_class.start_time,
+        end_time=db_class.end_time,
+        roster_version=db_class.roster_version,
+        student_count=student_count,
+        created_at=db_class.created_at,
+    )
+
+
+@class_router.get("/", response_model=List[ClassResponse])
+async def get_all_classes(
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    คลาสที่ผู้ใช้เห็นได้: admin เห็นทั้งหมด, อาจารย์เห็นคลาสที่สอน, นักเรียนเห็นคลาสที่ลงทะเบียน
+    """
+    rows = await list_classes_for_user(db, current_user, limit=limit, offset=offset)
+    return [_class_response(db_class, student_count) for db_class, student_count in rows]
+
+
+@class_router.post("/", response_model=ClassResponse, status_code=status.HTTP_201_CREATED)
+async def create_class(
+    class_create: ClassCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """สร้างคลาสใหม่ (อาจารย์หรือ admin)"""
+    is_admin = "admin" in current_user.role_names
+    if not is_admin and "teacher" not in current_user.role_names:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Teacher or admin required")
+    teacher_id = class_create.teacher_id if is_admin and class_create.teacher_id else current_user.user_id
+
+    existing = await db.execute(select(Class.class_id).where(Class.name == class_create.name))
+    if existing.first() is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Class name already exists")
+
+    db_class = Class(
+        name=class_create.name,
+        description=class_create.description,
+        teacher_id=teacher_id,
+        start_time=class_create.start_time,
+        end_time=class_create.end_time,
+        roster_version=1,
+    )
+    db.add(db_class)
+    await db.commit()
+    return _class_response(db_class, 0)
+
+
+@class_router.get("/{class_id}", response_model=ClassResponse)
+async def get_class(
+    class_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    db_class = await get_class_async(db, class_id)
+    if db_class is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
+    if db_class.teacher_id != current_user.user_id and "admin" not in current_user.role_names:
+        roster = await class_rosters.get(db, class_id)
+        if roster is None or current_user.user_id not in roster.student_ids:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this class")
+    return _class_response(db_class, await get_student_count(db, class_id))
+
+
+@class_router.get("/{class_id}/roster", response_model=RosterResponse)
+async def get_class_roster(
+    class_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    รายชื่อนักเรียนของคลาส (อาจารย์ผู้สอนหรือ admin) จาก roster snapshot ที่ cache ไว้
+    snapshot เดียวกันนี้ถูกใช้ตอนเช็คชื่อและสร้าง face index ของคลาส
+    """
+    await get_class_for_staff(db, class_id, current_user)
+    roster = await class_rosters.get(db, class_id)
+    if roster is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
+    return RosterResponse(
+        class_id=roster.class_id,
+        roster_version=roster.version,
+        students=[RosterStudentResponse.model_validate(student) for student in roster.students],
+    )
+
+
+@class_router.post("/{class_id}/students", response_model=EnrollmentResult)
+async def enroll_class_students(
+    class_id: uuid.UUID,
+    enrollment: EnrollmentRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
     """
-    A placeholder endpoint to test if the classes router is working.
-    (You'll replace this with actual class listing logic later.)
+    ลงทะเบียนนักเรียนหลายคนเข้าคลาสในคำสั่งเดียว (ลงทะเบียนซ้ำได้ ไม่ error)
+    ผู้ใช้ที่ไม่มี role student จะไม่ถูกลงทะเบียนและอยู่ใน rejected
     """
-    return {"message": "Classes endpoint is working! You should see class data here later."}
\ No newline at end of file
+    db_class = await get_class_for_staff(db, class_id, current_user)
+    version, enrolled, already_enrolled, not_found, rejected = await enroll_students(db, db_class, enrollment.student_ids)
+    if enrolled:
+        await invalidate_class_roster(class_id)
+    return EnrollmentResult(
+        class_id=class_id, roster_version=version, changed=enrolled, unchanged=already_enrolled,
+        not_found=not_found, rejected=rejected,
+    )
+
+
+@class_router.delete("/{class_id}/students", response_model=EnrollmentResult)
+async def unenroll_class_students(
+    class_id: uuid.UUID,
+    enrollment: EnrollmentRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """ถอนนักเรียนหลายคนออกจากคลาสในคำสั่งเดียว"""
+    db_class = await get_class_for_staff(db, class_id, current_user)
+    version, removed, not_enrolled = await unenroll_students(db, db_class, enrollment.student_ids)
+    if removed:
+        await invalidate_class_roster(class_id)
+    return EnrollmentResult(class_id=class_id, roster_version=version, changed=removed, unchanged=not_enrolled)
+
+
+@class_router.post("/{class_id}/sessions", response_model=ClassSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_class_session(
+    class_id: uuid.UUID,
+    session_create: ClassSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    กำหนดคาบเรียน (อาจารย์ผู้สอนหรือ admin) วันหนึ่งมีได้หลายคาบ
+    check-in ในช่วงของคาบนี้จะถูกบันทึกใน session นี้ (ดู app.services.class_session_service)
+    """
+    await get_class_for_staff(db, class_id, current_user)
+    if session_create.ends_at is not None and session_create.ends_at <= session_create.starts_at:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ends_at must be after starts_at")
+
+    result = await db.execute(
+        pg_insert(ClassSession)
+        .values(
+            session_id=uuid.uuid4(),
+            class_id=class_id,
+            session_date=campus_date(session_create.starts_at),
+            starts_at=session_create.starts_at,
+            ends_at=session_create.ends_at,
+        )
+        .on_conflict_do_nothing(index_elements=[ClassSession.class_id, ClassSession.starts_at])
+        .returning(ClassSession)
+    )
+    session = result.scalar_one_or_none()
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A session of this class already starts at this time")
+    await db.commit()
+    await invalidate_class_sessions(class_id)
+    return ClassSessionResponse.model_validate(session)
+
+
+@class_router.get("/{class_id}/sessions", response_model=List[ClassSessionResponse])
+async def get_class_sessions(
+    class_id: uuid.UUID,
+    start_date: date = Query(..., description="วันตามเวลาของวิทยาเขต"),
+    end_date: Optional[date] = Query(None, description="ค่าเริ่มต้น = start_date"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """คาบเรียนของคลาสในช่วงวันที่กำหนด เรียงตามเวลาเริ่ม (อาจารย์ผู้สอนหรือ admin)"""
+    await get_class_for_staff(db, class_id, current_user)
+    result = await db.execute(
+        select(ClassSession)
+        .where(
+            ClassSession.class_id == class_id,
+            ClassSession.starts_at >= campus_day_start(start_date),
+            ClassSession.starts_at < campus_day_start((end_date or start_date) + timedelta(days=1)),
+        )
+        .order_by(ClassSession.starts_at)
+    )
+    return [ClassSessionResponse.model_validate(session) for session in result.scalars()]
+
+
+@class_router.put("/{class_id}/sessions/{session_id}/attendance/{student_id}", response_model=AttendanceResponse)
+async def override_student_attendance(
+    class_id: uuid.UUID,
+    session_id: uuid.UUID,
+    student_id: uuid.UUID,
+    override: AttendanceOverrideRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    แก้สถานะการเข้าเรียนของนักเรียนใน session ด้วยมือ (อาจารย์ผู้สอนหรือ admin)
+    เขียนผ่าน attendance writer เหมือน check-in ตารางสรุปจึงถูกปรับด้วย delta และ live feed ได้รับการเปลี่ยนแปลง
+    การแก้ด้วยมือชนะ check-in ที่เข้ามาทีหลังเสมอ
+    """
+    await get_class_for_staff(db, class_id, current_user)
+    session = await db.get(ClassSession, session_id)
+    if session is None or session.class_id != class_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    roster = await class_rosters.get(db, class_id)
+    if roster is None or student_id not in roster.student_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student is not enrolled in this class")
+
+    event = AttendanceEvent(
+        class_id=class_id,
+        session_id=session_id,
+        session_date=session.session_date,
+        student_id=student_id,
+        status=override.status.value,
+        is_manual_override=True,
+        recorded_by_user_id=current_user.user_id,
+    )
+    try:
+        attendance = await attendance_writer.submit(event)
+    except AttendanceBufferFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Attendance service is busy, please try again.",
+            headers={"Retry-After": "1"},
+        )
+    return AttendanceResponse.model_validate(attendance)
+
+
+@class_router.get("/{class_id}/stats", response_model=ClassStatsResponse)
+async def get_class_attendance_stats(
+    class_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    สถิติการเข้าเรียนของคลาส: ยอดรวมและรายละเอียดต่อ session (อ่านจากตารางสรุป ไม่ GROUP BY ข้อมูลดิบ)
+    """
+    await get_class_for_staff(db, class_id, current_user)
+    sessions = (
+        await db.execute(
+            select(AttendanceSessionStats)
+            .where(AttendanceSessionStats.class_id == class_id)
+            .order_by(AttendanceSessionStats.session_date)
+        )
+    ).scalars().all()
+    totals = {column: sum(getattr(session, column) for session in sessions) for column in STATUS_COUNT_COLUMNS + ["total"]}
+    return ClassStatsResponse(
+        class_id=class_id,
+        totals=AttendanceCounts(**totals),
+        sessions=[SessionStatsResponse.model_validate(session) for session in sessions],
+    )
+
+
+@class_router.get("/{class_id}/stats/students", response_model=List[StudentStatsResponse])
+async def get_class_student_stats(
+    class_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """สถิติการเข้าเรียนของนักเรียนแต่ละคนในคลาส"""
+    await get_class_for_staff(db, class_id, current_user)
+    result = await db.execute(select(AttendanceStudentStats).where(AttendanceStudentStats.class_id == class_id))
+    return [StudentStatsResponse.model_validate(row) for row in result.scalars()]
+
+
+@class_router.get("/{class_id}/stats/students/{student_id}", response_model=StudentStatsResponse)
+async def get_class_student_stat(
+    class_id: uuid.UUID,
+    student_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """สถิติการเข้าเรียนของนักเรียนหนึ่งคนในคลาส (นักเรียนดูของตัวเองได้)"""
+    if student_id != current_user.user_id:
+        await get_class_for_staff(db, class_id, current_user)
+    row = await db.get(AttendanceStudentStats, (class_id, student_id))
+    if row is None:
+        return StudentStatsResponse(class_id=class_id, student_id=student_id)
+    return StudentStatsResponse.model_validate(row)
@@ -0,0 +1,93 @@
+# backend/app/api/v1/jobs.py
+"""
+สถานะและการจัดการงาน background (ดู services/job_queue.py)
+ผู้สร้างงานดู/ยกเลิกงานของตัวเองได้ admin ดูได้ทุกงาน
+"""
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.users import get_current_active_user, get_current_admin_user
+from app.core.user_cache import CurrentUser
+from app.database import get_async_db
+from app.models.job import Job, JobStatus
+from app.schemas.job_schema import JobCreate, JobPage, JobResponse
+from app.services import jobs # noqa: F401 (ลงทะเบียน job types)
+from app.services.job_queue import JOB_TYPES, enqueue, request_cancel
+from app.services.storage_service import storage
+
+job_router = APIRouter()
+
+
+def job_response(job: Job) -> JobResponse:
+    """JobResponse พร้อม presigned URL ของไฟล์ผลลัพธ์ (ถ้างานสำเร็จและสร้างไฟล์ไว้)"""
+    response = JobResponse.model_validate(job)
+    if job.status == JobStatus.SUCCEEDED.value and job.result and job.result.get("storage_key"):
+        response.result_url = storage.presigned_url(job.result["storage_key"])
+    return response
+
+
+async def _get_visible_job(db: AsyncSession, job_id: uuid.UUID, current_user: CurrentUser) -> Job:
+    job = await db.get(Job, job_id)
+    if job is None or (job.created_by_user_id != current_user.user_id and "admin" not in current_user.role_names):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@job_router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job_in: JobCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """สร้างงานดูแลระบบ (เช่น face_backfill, attendance_rollups_rebuild) ติดตามผลได้ที่ GET /jobs/{job_id}"""
+    spec = JOB_TYPES.get(job_in.job_type)
+    if spec is None or not spec.api_enqueue:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown job type: {job_in.job_type}")
+    job = await enqueue(db, job_in.job_type, job_in.payload, created_by_user_id=current_user.user_id)
+    return job_response(job)
+
+
+@job_router.get("/", response_model=JobPage)
+async def list_jobs(
+    job_status: Optional[JobStatus] = Query(None, alias="status"),
+    job_type: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """งานล่าสุดก่อน (admin เห็นทุกงาน ผู้ใช้อื่นเห็นเฉพาะงานที่ตัวเองสร้าง)"""
+    query = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if "admin" not in current_user.role_names:
+        query = query.where(Job.created_by_user_id == current_user.user_id)
+    if job_status is not None:
+        query = query.where(Job.status == job_status.value)
+    if job_type is not None:
+        query = query.where(Job.job_type == job_type)
+    return JobPage(items=[job_response(job) for job in (await db.execute(query)).scalars()])
+
+
+@job_router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """สถานะ, progress และผลลัพธ์ของงาน (client poll endpoint นี้)"""
+    return job_response(await _get_visible_job(db, job_id, current_user))
+
+
+@job_router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """งานที่ยังรออยู่ถูกยกเลิกทันที งานที่กำลังทำจะหยุดที่จุดตรวจถัดไปของ handler"""
+    job = await _get_visible_job(db, job_id, current_user)
+    if job.status not in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status}")
+    return job_response(await request_cancel(db, job))
@@ -0,0 +1,85 @@
+# backend/app/api/v1/metrics.py
+"""
+GET /metrics สำหรับ Prometheus (ค่าของ worker process ที่รับ request นี้ ดู app.core.metrics)
+ถ้ากำหนด METRICS_BEARER_TOKEN ต้องตั้ง bearer_token ใน scrape config ของ Prometheus ให้ตรงกัน
+"""
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, metrics
+from app.core.security import password_hasher
+from app.core.user_cache import active_user_cache
+from app.database import get_pool_stats
+from app.services.attendance_pipeline import attendance_writer
+from app.services.face_encoder_pool import face_encoder_pool
+from app.services.roster_service import class_rosters
+
+metrics_router = APIRouter()
+
+
+def _collect_caches():
+    caches = {"active_user": active_user_cache.stats(), "class_roster": class_rosters.stats()}
+    yield "cache_hits_total", "counter", "Cache lookups that found a fresh entry.", [
+        ({"cache": name}, stats["hits"]) for name, stats in caches.items()
+    ]
+    yield "cache_misses_total", "counter", "Cache lookups that had to load from the database.", [
+        ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+    ]
+    yield "cache_hit_ratio", "gauge", "Hits / lookups since the process started.", [
+        ({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()
+    ]
+    yield "cache_entries", "gauge", "Entries currently cached.", [
+        ({"cache": name}, stats["size"]) for name, stats in caches.items()
+    ]
+
+
+def _collect_db_pools():
+    pools = get_pool_stats()
+    yield "db_pool_checked_out", "gauge", "Connections currently checked out of the pool.", [
+        ({"engine": name}, stats["checked_out"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_overflow", "gauge", "Overflow connections currently open.", [
+        ({"engine": name}, stats["overflow"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_waits_total", "counter", "Checkouts that had to wait for a free connection.", [
+        ({"engine": name}, stats["waits"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_wait_seconds_total", "counter", "Total time spent waiting for a free connection.", [
+        ({"engine": name}, stats["wait_time_total_seconds"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_timeouts_total", "counter", "Checkouts that timed out.", [
+        ({"engine": name}, stats["timeouts"]) for name, stats in pools.items()
+    ]
+
+
+def _collect_executors():
+    hasher = password_hasher.stats()
+    encoder = face_encoder_pool.stats()
+    yield "password_hash_queue_depth", "gauge", "Password hashing jobs waiting for a thread.", [({}, hasher["queue_depth"])]
+    yield "password_hash_rejected_total", "counter", "Password hashing jobs rejected because the queue was full.", [
+        ({}, hasher["rejected"])
+    ]
+    yield "face_encoder_pending", "gauge", "Face encoder jobs running or queued.", [({}, encoder["pending"])]
+    yield "face_encoder_rejected_total", "counter", "Face encoder jobs rejected because the queue was full.", [
+        ({}, encoder["rejected"])
+    ]
+    yield "attendance_buffered_events", "gauge", "Check-ins buffered but not yet written.", [
+        ({}, attendance_writer.stats()["buffered"])
+    ]
+
+
+metrics.add_collector(_collect_caches)
+metrics.add_collector(_collect_db_pools)
+metrics.add_collector(_collect_executors)
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if settings.METRICS_BEARER_TOKEN:
+        authorization = request.headers.get("authorization", "").encode()
+        if not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_BEARER_TOKEN}".encode()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,60 @@
+# backend/app/api/v1/storage.py
+"""
+ปลายทางของ presigned URL เมื่อใช้ storage แบบ local (STORAGE_BACKEND=local)
+เมื่อใช้ S3 client จะคุยกับ S3 โดยตรงและ router นี้ตอบ 404
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+from app.services.uploads import UploadTooLargeError, limit_chunks
+from app.services.storage_service import LocalStorage, StorageError, storage
+
+storage_router = APIRouter()
+
+
+def _verify(key: str, method: str, expires: int, signature: str, content_type: Optional[str] = None) -> LocalStorage:
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    try:
+        storage.path_for(key)
+    except StorageError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not storage.verify_signature(method, key, expires, signature, content_type):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature")
+    return storage
+
+
+@storage_router.get("/objects/{key:path}")
+async def download_object(
+    key: str,
+    expires: int = Query(...),
+    signature: str = Query(...),
+):
+    local = _verify(key, "GET", expires, signature)
+    stored = await local.stat(key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Object not found")
+    return FileResponse(local.path_for(key), media_type=stored.content_type or "application/octet-stream")
+
+
+@storage_router.put("/objects/{key:path}", status_code=status.HTTP_200_OK)
+async def upload_object(
+    key: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+):
+    """รับ body แบบ stream แล้วเขียนลงไฟล์ทีละ chunk (เหมือน PUT ไปที่ presigned URL ของ S3)"""
+    content_type = request.headers.get("content-type")
+    # URL ที่สร้างพร้อม content_type ใช้ได้กับ Content-Type นั้นเท่านั้น
+    local = _verify(key, "PUT", expires, signature, content_type)
+    try:
+        stored = await local.save_stream(
+            key, limit_chunks(request.stream(), settings.STORAGE_MAX_PUT_BYTES), content_type,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return {"key": stored.key, "size": stored.size, "etag": stored.etag}
@@ -1,22 +1,38 @@
 # backend/app/api/v1/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Path # เพิ่ม Path
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Request, UploadFile, File # เพิ่ม Path
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 from datetime import datetime, timezone # ต้องมี datetime และ timezone
 import uuid # ต้องมี uuid
 
-from app.database import get_db
-from app.schemas.user_schema import UserResponse, TokenData, UserUpdate # ตรวจสอบว่ามี UserUpdate
-from app.models.user import User
-from app.services.db_service import get_user_by_id
+from app.database import get_async_db, AsyncSessionLocal
+from app.schemas.user_schema import UserResponse, TokenData, UserUpdate, FaceSampleResponse, FaceSampleUploadURL # ตรวจสอบว่ามี UserUpdate
+from app.crud.user_crud import InvalidCursorError, list_users_page
+from app.services.user_export_service import EXPORT_MEDIA_TYPES, export_user_chunks
+from app.services.db_service import get_user_by_id_async
+from app.core.user_cache import CurrentUser, resolve_current_user
+from app.services.face_recognition_service import enroll_face_sample
+from app.services.image_pipeline import read_image_upload, ImageTooLargeError, InvalidImageError
+from app.services.face_encoder_pool import face_encoder_pool, EncoderBusyError, FaceProcessingUnavailableError
+from app.core.deps import require_face_processing
+from app.services.storage_service import face_sample_image_key, storage
+from app.services.face_derivatives import DERIVATIVES, DerivativeNotAvailableError, face_derivatives
+from app.models.user_face_sample import UserFaceSample
+from app.core.config import settings
+from app.services.cache_invalidation import invalidate_user, invalidate_user_faces
 from app.core.security import decode_access_token
 
 # กำหนด scheme สำหรับ OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+# header ที่ส่ง cursor ของหน้าถัดไปของ GET /users/ (body เป็น list เหมือนเดิม)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
     # ... (โค้ดสำหรับ get_current_user คงเดิม) ...
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,24 +43,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if token_data is None:
         raise credentials_exception
 
-    user = get_user_by_id(db, user_id=token_data.user_id)
+    # ส่วนใหญ่ได้จาก cache (ไม่มี DB round-trip) ไม่เช่นนั้น query เดียวและใช้ roles จาก token
+    user = await resolve_current_user(db, token_data)
     if user is None:
         raise credentials_exception
     return user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     # ... (โค้ดสำหรับ get_current_active_user คงเดิม) ...
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
 # Dependency สำหรับการตรวจสอบสิทธิ์ Admin (สำคัญสำหรับ GET all, GET by ID, PUT, DELETE)
-async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_current_admin_user(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
     """
     Dependency เพื่อยืนยันว่าผู้ใช้ปัจจุบันเป็น Admin
     """
-    if "admin" not in [role.name for role in current_user.roles]:
+    if "admin" not in current_user.role_names:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions. Admin required."
@@ -54,10 +71,9 @@ async def get_current_admin_user(current_user: User = Depends(get_current_active
 router = APIRouter(prefix="/users", tags=["Users"]) # ตั้งชื่อตัวแปรเป็น router
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(current_user: CurrentUser = Depends(get_current_active_user)):
     # ... (โค้ดสำหรับ read_users_me คงเดิม) ...
-    _ = current_user.roles
-    user_roles = [role.name for role in current_user.roles]
+    user_roles = current_user.role_names
     user_response_data = UserResponse(
         user_id=current_user.user_id,
         username=current_user.username,
@@ -72,18 +88,232 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     )
     return user_response_data
 
+def _face_sample_response(sample: UserFaceSample) -> FaceSampleResponse:
+    response = FaceSampleResponse.model_validate(sample)
+    if sample.image_url:
+        response.image_download_url = storage.presigned_url(sample.image_url)
+    response.available_derivatives = sorted(name for name, record in (sample.derivatives or {}).items() if record)
+    return response
+
+async def _enroll_face_image(
+    db: AsyncSession, user_id: uuid.UUID, sample_id: uuid.UUID, image_bytes: bytes, content_type: Optional[str] = None,
+) -> FaceSampleResponse:
+    """
+    คำนวณ face encoding (ใน face encoder process pool) แล้วบันทึก sample
+    ถ้า content_type ไม่ใช่ None จะเก็บรูปต้นฉบับลง storage ด้วย (ไม่เช่นนั้นถือว่ารูปอยู่ใน storage แล้ว)
+    """
+    try:
+        encoding = await face_encoder_pool.encode(image_bytes)
+    except EncoderBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Face recognition is busy, please try again.",
+            headers={"Retry-After": "1"},
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if encoding is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="No face detected in the uploaded image")
+
+    key = face_sample_image_key(user_id, sample_id)
+    if content_type is not None:
+        await storage.save(key, image_bytes, content_type)
+    try:
+        sample = await enroll_face_sample(db, user_id=user_id, encoding=encoding, image_url=key, sample_id=sample_id)
+    except IntegrityError:
+        # /complete ซ้อนกันสองคำขอ: อีกคำขอบันทึก sample_id นี้ไปแล้ว รูปใน storage เป็นของแถวนั้น ห้ามลบ
+        await db.rollback()
+        if content_type is not None:
+            await storage.delete(key)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Face sample already registered")
+    except Exception:
+        await db.rollback()
+        # ลบรูปเฉพาะที่คำขอนี้เขียนเอง หรือเมื่อไม่มีแถวใดอ้างถึงรูปนี้ (ไม่ให้มีรูปกำพร้าค้างอยู่)
+        if content_type is not None or await db.get(UserFaceSample, sample_id) is None:
+            await storage.delete(key)
+        raise
+    await invalidate_user_faces(user_id, local=False) # index ของ process นี้ถูกเพิ่มแล้ว
+    face_derivatives.schedule(sample) # สร้างรูปย่อแบบ background
+    return _face_sample_response(sample)
+
+@router.post(
+    "/me/face-samples", response_model=FaceSampleResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_face_processing)],
+)
+async def upload_my_face_sample(
+    image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    ลงทะเบียนรูปใบหน้าของผู้ใช้ปัจจุบัน: คำนวณ face encoding ครั้งเดียว (ใน face encoder process pool)
+    แล้วเก็บไว้ใน user_face_samples พร้อมรูปต้นฉบับใน storage
+    """
+    try:
+        image_bytes = await read_image_upload(image)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return await _enroll_face_image(
+        db, current_user.user_id, uuid.uuid4(), image_bytes, image.content_type or "application/octet-stream",
+    )
+
+@router.post("/me/face-samples/upload-url", response_model=FaceSampleUploadURL)
+async def create_my_face_sample_upload_url(
+    content_type: str = Query("image/jpeg", pattern=r"^image/[a-z0-9.+-]+$"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    ขอ presigned PUT URL เพื่ออัปโหลดรูปไปที่ storage โดยตรง (รูปไม่ผ่าน API process)
+    อัปโหลดเสร็จแล้วเรียก POST /me/face-samples/{sample_id}/complete
+    """
+    sample_id = uuid.uuid4()
+    key = face_sample_image_key(current_user.user_id, sample_id)
+    return FaceSampleUploadURL(
+        sample_id=sample_id,
+        upload_url=storage.presigned_url(key, method="PUT", content_type=content_type),
+        content_type=content_type,
+        expires_in=settings.STORAGE_PRESIGN_EXPIRES_SECONDS,
+    )
+
+@router.post(
+    "/me/face-samples/{sample_id}/complete", response_model=FaceSampleResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_face_processing)],
+)
+async def complete_my_face_sample_upload(
+    sample_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """ลงทะเบียนรูปที่อัปโหลดผ่าน presigned URL แล้ว"""
+    if await db.get(UserFaceSample, sample_id) is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Face sample already registered")
+    key = face_sample_image_key(current_user.user_id, sample_id)
+    stored = await storage.stat(key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Uploaded image not found")
+    if stored.size > settings.MAX_UPLOAD_IMAGE_BYTES:
+        # presigned PUT ของ S3 จำกัดขนาดไม่ได้ จึงตรวจตรงนี้
+        await storage.delete(key)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image must be at most {settings.MAX_UPLOAD_IMAGE_BYTES} bytes",
+        )
+    return await _enroll_face_image(db, current_user.user_id, sample_id, await storage.read(key))
+
+@router.get("/me/face-samples/{sample_id}/image", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+async def get_my_face_sample_image(
+    sample_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """redirect ไปยัง presigned GET URL ของรูป (client ดาวน์โหลดจาก storage โดยตรง)"""
+    sample = await db.get(UserFaceSample, sample_id)
+    if sample is None or sample.image_url is None or (
+        sample.user_id != current_user.user_id and "admin" not in current_user.role_names
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Face sample not found")
+    return RedirectResponse(storage.presigned_url(sample.image_url), status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+@router.get("/me/face-samples/{sample_id}/derivatives/{name}")
+async def get_my_face_sample_derivative(
+    sample_id: uuid.UUID,
+    name: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    รูปย่อของ face sample (thumb-160.webp, thumb-160.jpg, thumb-480.webp, thumb-480.jpg, face-224.jpg)
+    ETag เป็น hash ของเนื้อหาและ cache ได้นาน ถ้ายังไม่มีจะสร้างตอนนี้
+    """
+    if name not in DERIVATIVES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown derivative")
+    sample = await db.get(UserFaceSample, sample_id)
+    if sample is None or (sample.user_id != current_user.user_id and "admin" not in current_user.role_names):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Face sample not found")
+
+    try:
+        record = await face_derivatives.ensure(sample, name)
+        etag = f'"{record["etag"]}"'
+        if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+            # client มีรูปนี้อยู่แล้ว: ไม่ต้องอ่านจาก storage
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_derivative_headers(record))
+        record, data = await face_derivatives.read(sample, name)
+    except DerivativeNotAvailableError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except EncoderBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Face recognition is busy, please try again.",
+            headers={"Retry-After": "1"},
+        )
+    except FaceProcessingUnavailableError:
+        # worker แบบ WORKER_PROFILE=api ส่งรูปที่สร้างไว้แล้วได้ แต่สร้างใหม่ไม่ได้
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Face processing is not available on this worker",
+            headers={"Retry-After": "1"},
+        )
+    return Response(content=data, media_type=record["content_type"], headers=_derivative_headers(record))
+
+def _derivative_headers(record: dict) -> dict:
+    return {
+        "ETag": f'"{record["etag"]}"',
+        # รูปใบหน้าเป็นข้อมูลส่วนตัว: cache ได้เฉพาะใน client ไม่ใช่ shared cache
+        "Cache-Control": f"private, max-age={settings.FACE_DERIVATIVE_CACHE_SECONDS}, immutable",
+    }
+
+def _user_row_response(row, roles: List[str]) -> UserResponse:
+    return UserResponse(
+        user_id=row.user_id,
+        username=row.username,
+        first_name=row.first_name,
+        last_name=row.last_name,
+        email=row.email,
+        is_active=row.is_active,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        last_login_at=row.last_login_at,
+        roles=roles
+    )
+
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    role: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    class_id: Optional[uuid.UUID] = Query(None),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Export ผู้ใช้ทั้งหมด (ตาม filter) แบบ streaming เป็น NDJSON หรือ CSV
+    แถวถูกอ่านผ่าน server-side cursor และส่งออกทีละ chunk จึงไม่โหลดทั้งตารางเข้า memory
+    """
+    async def generate():
+        # เปิด session ของตัวเอง เพราะ body ถูกส่งหลังจาก dependency ของ request ปิดไปแล้ว
+        async with AsyncSessionLocal() as db:
+            async for chunk in export_user_chunks(db, format, role=role, is_active=is_active, class_id=class_id):
+                yield chunk
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def read_user_by_id(
     user_id: uuid.UUID = Path(..., description="The UUID of the user to retrieve"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user) # เฉพาะ Admin เท่านั้นที่ดึงข้อมูลผู้ใช้คนอื่นได้
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user) # เฉพาะ Admin เท่านั้นที่ดึงข้อมูลผู้ใช้คนอื่นได้
 ):
     # ... (โค้ดสำหรับ read_user_by_id คงเดิม) ...
-    user = get_user_by_id(db, user_id=user_id)
+    user = await get_user_by_id_async(db, user_id=user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    _ = user.roles
-    user_roles = [role.name for role in user.roles]
+    user_roles = user.role_names
     user_response_data = UserResponse(
         user_id=user.user_id,
         username=user.username,
@@ -101,46 +331,46 @@ async def read_user_by_id(
 
 @router.get("/", response_model=List[UserResponse])
 async def read_all_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user) # เฉพาะ Admin เท่านั้นที่ดึงข้อมูลผู้ใช้ทั้งหมดได้
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="จำนวนผู้ใช้ต่อหน้า"),
+    cursor: Optional[str] = Query(None, description="ค่า header X-Next-Cursor จากหน้าก่อนหน้า"),
+    role: Optional[str] = Query(None, description="กรองตามชื่อ role เช่น student"),
+    is_active: Optional[bool] = Query(None),
+    class_id: Optional[uuid.UUID] = Query(None, description="กรองเฉพาะนักเรียนที่ลงทะเบียนในคลาสนี้"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user) # เฉพาะ Admin เท่านั้นที่ดึงข้อมูลผู้ใช้ทั้งหมดได้
 ):
-    # ... (โค้ดสำหรับ read_all_users คงเดิม) ...
-    users = db.query(User).all()
-    response_users = []
-    for user in users:
-        _ = user.roles
-        user_roles = [role.name for role in user.roles]
-        user_response_data = UserResponse(
-            user_id=user.user_id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            email=user.email,
-            is_active=user.is_active,
-            created_at=user.created_at,
-            updated_at=user.updated_at,
-            last_login_at=user.last_login_at,
-            roles=user_roles
+    """
+    รายชื่อผู้ใช้แบบ keyset pagination เรียงตาม (created_at, user_id)
+    body ยังเป็น list ของ UserResponse เหมือนเดิม ถ้ามีหน้าถัดไปจะส่ง cursor มาใน header X-Next-Cursor
+    roles ของทั้งหน้าถูกดึงใน query เดียว
+    """
+    try:
+        rows, role_names, next_cursor = await list_users_page(
+            db, limit=limit, cursor=cursor, role=role, is_active=is_active, class_id=class_id
         )
-        response_users.append(user_response_data)
-    return response_users
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [_user_row_response(row, role_names.get(row.user_id, [])) for row in rows]
 
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(
     user_update: UserUpdate, # ใช้ UserUpdate schema
     user_id: uuid.UUID = Path(..., description="The UUID of the user to update"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     # ... (โค้ดสำหรับ update_user คงเดิม) ...
     # ตรวจสอบสิทธิ์: ผู้ใช้จะอัปเดตได้เฉพาะโปรไฟล์ตัวเอง หรือ Admin เท่านั้น
-    if str(current_user.user_id) != str(user_id) and "admin" not in [role.name for role in current_user.roles]:
+    if str(current_user.user_id) != str(user_id) and "admin" not in current_user.role_names:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this user's profile"
         )
 
-    db_user = get_user_by_id(db, user_id=user_id)
+    db_user = await get_user_by_id_async(db, user_id=user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
@@ -157,14 +387,18 @@ async def update_user(
         db_user.student_id = user_update.student_id
     if user_update.teacher_id is not None:
         db_user.teacher_id = user_update.teacher_id
+    active_changed = user_update.is_active is not None and user_update.is_active != db_user.is_active
     if user_update.is_active is not None:
         db_user.is_active = user_update.is_active
 
     db_user.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit() # expire_on_commit=False จึงไม่ต้อง refresh
+    # เช่น ถูกปิดการใช้งาน ให้มีผลทันทีในทุก worker
+    await invalidate_user(db_user.user_id)
+    if active_changed:
+        await invalidate_user_faces(db_user.user_id)
 
-    user_roles = [role.name for role in db_user.roles]
+    user_roles = db_user.role_names
     user_response_data = UserResponse(
         user_id=db_user.user_id,
         username=db_user.username,
@@ -183,17 +417,19 @@ async def update_user(
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: uuid.UUID = Path(..., description="The UUID of the user to delete"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user) # เฉพาะ Admin เท่านั้นที่ลบผู้ใช้ได้
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_admin_user) # เฉพาะ Admin เท่านั้นที่ลบผู้ใช้ได้
 ):
     # ... (โค้ดสำหรับ delete_user คงเดิม) ...
-    db_user = get_user_by_id(db, user_id=user_id)
+    db_user = await get_user_by_id_async(db, user_id=user_id, with_roles=False)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     if str(db_user.user_id) == str(current_user.user_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete your own user account via this endpoint.")
 
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
+    await invalidate_user(user_id)
+    await invalidate_user_faces(user_id)
     return {"message": "User deleted successfully."}
\ No newline at end of file
@@ -2,25 +2,103 @@
 import os
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 load_dotenv() # โหลด environment variables จาก .env
 
 class Settings(BaseSettings):
     # Core Database Setting
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None # ถ้าไม่กำหนดจะแปลงจาก DATABASE_URL เป็น postgresql+asyncpg
+
+    # Connection Pool Settings (ต่อ engine ต่อ worker process: sync และ async แยก pool กัน)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30 # วินาทีที่รอ connection ว่างก่อน error
+    DB_POOL_RECYCLE: int = 1800 # ปิด connection ที่อายุเกินนี้ (วินาที), -1 = ไม่ recycle
+    DB_POOL_PRE_PING: bool = True # ตรวจว่า connection ยังใช้ได้ก่อนยืมออกจาก pool
+    DB_STATEMENT_TIMEOUT_MS: int = 0 # statement_timeout ของ PostgreSQL, 0 = ไม่จำกัด
+    DB_PGBOUNCER: bool = False # ต่อผ่าน PgBouncer (transaction pooling): ปิด prepared statement cache ของ asyncpg และตั้ง statement_timeout ด้วย SET LOCAL
+    DB_MIGRATE_ON_STARTUP: bool = True # รัน alembic upgrade head ตอน startup ถ้า schema ยังไม่ล่าสุด (False = error แทน)
 
     # JWT Authentication Settings
     SECRET_KEY: str
     ALGORITHM: str = "HS256" # ค่าเริ่มต้นถ้าไม่ระบุใน .env
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 # ค่าเริ่มต้นถ้าไม่ระบุใน .env
+    BCRYPT_ROUNDS: int = 12 # work factor ของ bcrypt (เปลี่ยนแล้ว hash เดิมจะถูก rehash ตอน login)
+    PASSWORD_HASH_WORKERS: int = 4 # จำนวน thread สำหรับ hash/verify รหัสผ่าน
+    PASSWORD_HASH_MAX_QUEUE: int = 256 # งานที่รอได้สูงสุด เกินนี้ตอบ 503
+    ROSTER_CACHE_TTL_SECONDS: int = 300 # อายุของ roster snapshot ที่ cache ไว้ต่อ class
+    USER_IMPORT_MAX_BYTES: int = 20 * 1024 * 1024 # ขนาดไฟล์ import ผู้ใช้สูงสุด
+    USER_IMPORT_CHUNK_SIZE: int = 500 # จำนวนแถวต่อ transaction ตอน import
+    USER_CACHE_TTL_SECONDS: int = 30 # อายุของข้อมูลผู้ใช้ใน cache ต่อ process (0 = ปิด cache)
+    USER_CACHE_MAX_SIZE: int = 10000
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation" # channel ของ LISTEN/NOTIFY สำหรับล้าง cache ข้าม worker
+    CACHE_INVALIDATION_RECONNECT_SECONDS: float = 5 # รอสูงสุดเท่านี้ก่อนเชื่อมต่อ listener ใหม่
+    CACHE_INVALIDATION_DATABASE_URL: Optional[str] = None # URL ตรงไป PostgreSQL สำหรับ LISTEN (จำเป็นเมื่อ DB_PGBOUNCER=True เพราะ transaction pooling ไม่ส่ง NOTIFY ให้ session ที่ LISTEN)
 
     # S3/Cloud Storage Settings (Optional)
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: str = "your-default-bucket-name"
+    S3_ENDPOINT_URL: Optional[str] = None # สำหรับ S3-compatible เช่น MinIO (http://localhost:9000)
+    STORAGE_BACKEND: str = "local" # "local" หรือ "s3"
+    LOCAL_STORAGE_DIR: str = "storage" # โฟลเดอร์เก็บไฟล์เมื่อใช้ backend แบบ local
+    STORAGE_WORKERS: int = 8 # thread สำหรับเรียก boto3/ไฟล์ (และขนาด connection pool ของ S3)
+    STORAGE_MULTIPART_CHUNK_BYTES: int = 8 * 1024 * 1024 # ขนาด part ตอนอัปโหลดแบบ multipart (S3 ต้องไม่ต่ำกว่า 5 MB)
+    STORAGE_PRESIGN_EXPIRES_SECONDS: int = 900 # อายุของ presigned URL
+    STORAGE_MAX_PUT_BYTES: int = 8 * 1024 * 1024 # ขนาดสูงสุดที่อัปโหลดผ่าน presigned PUT ของ backend แบบ local
+
+    # Background Jobs (python -m app.worker)
+    JOB_WORKER_CONCURRENCY: int = 4 # งานที่ทำพร้อมกันได้สูงสุดต่อ worker process
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0 # ตรวจคิวทุกกี่วินาทีเมื่อไม่มีงาน
+    JOB_HEARTBEAT_SECONDS: float = 2.0 # บันทึก progress/heartbeat ของงานที่กำลังทำทุกกี่วินาที
+    JOB_STALE_SECONDS: float = 60 # งาน running ที่ไม่มี heartbeat นานเท่านี้ถือว่า worker ตาย และถูกนำกลับเข้าคิว
+    JOB_RETRY_BASE_SECONDS: float = 10 # retry ครั้งแรกหลังจากนี้ แล้วเพิ่มเป็นเท่าตัว
+    JOB_RETRY_MAX_SECONDS: float = 600
+    JOB_WORKER_IN_API: bool = False # รัน worker ใน API process ด้วย (สำหรับ deploy แบบ process เดียว/ตอนพัฒนา)
+
+    # Worker Profile
+    # "full" = API + งานใบหน้า (โหลด dlib/OpenCV ใน face encoder pool)
+    # "api" = เฉพาะ API ทั่วไป: ไม่โหลด face/CV libraries และ face index เลย endpoint ลงทะเบียนใบหน้า/check-in ตอบ 503
+    #         (ให้ load balancer ส่ง path เหล่านั้นไปที่ worker แบบ full)
+    WORKER_PROFILE: Literal["full", "api"] = "full"
+
+    # Metrics (GET /metrics ในรูปแบบ Prometheus text format, นับต่อ worker process)
+    METRICS_ENABLED: bool = True
+    METRICS_BEARER_TOKEN: Optional[str] = None # ถ้ากำหนด /metrics ต้องส่ง Authorization: Bearer <token>
+
+    # Face Recognition Settings
+    FACE_ENCODER_WORKERS: int = 2 # จำนวน process สำหรับ detect/encode ใบหน้า
+    FACE_ENCODER_MAX_PENDING: int = 32 # จำนวนงานที่รอได้สูงสุด เกินนี้ตอบ 429
+    FACE_MATCH_TOLERANCE: float = 0.6
+    FACE_BATCH_WINDOW_MS: int = 10 # รวม check-in ที่เข้ามาในช่วงเวลานี้เป็น batch เดียว (0 = ไม่รอ)
+    FACE_BATCH_MAX_SIZE: int = 32 # ขนาด batch สูงสุด ถึงแล้วส่งทันทีไม่ต้องรอครบ window
+
+    # Attendance Settings (buffer ของ check-in, partition รายเดือน, live feed)
+    ATTENDANCE_FLUSH_SIZE: int = 500 # flush เมื่อมี check-in ค้างใน buffer ครบจำนวนนี้
+    ATTENDANCE_FLUSH_INTERVAL_MS: int = 50 # หรือเมื่อรอครบเวลานี้ (นับจาก event แรกที่ค้าง)
+    ATTENDANCE_BUFFER_MAX: int = 10000 # event ที่ค้างได้สูงสุด เกินนี้ตอบ 503
+    ATTENDANCE_PARTITION_MONTHS_AHEAD: int = 3 # สร้าง partition รายเดือนของ attendance ล่วงหน้ากี่เดือน
+    ATTENDANCE_RETENTION_MONTHS: int = 0 # ลบ partition ที่เก่ากว่านี้ (0 = เก็บทั้งหมด)
+    ATTENDANCE_PARTITION_CHECK_HOURS: float = 12 # ตรวจ/สร้าง partition ทุกกี่ชั่วโมง
+    ATTENDANCE_FEED_QUEUE_SIZE: int = 256 # message ที่ค้างได้ต่อผู้ติดตาม live feed ก่อนถูกตัด
+    ATTENDANCE_FEED_HEARTBEAT_SECONDS: float = 25 # ส่ง ping เมื่อไม่มี message นานเท่านี้
+    CAMPUS_TIMEZONE: str = "Asia/Bangkok" # timezone ของวิทยาเขต: วันของ session/สถิติรายวันนับตามเวลานี้
+    CLASS_SESSION_EARLY_CHECKIN_MINUTES: int = 15 # check-in เข้า session ได้ก่อนเวลาเริ่มกี่นาที
+
+    # Image Upload / Preprocessing Settings
+    MAX_UPLOAD_IMAGE_BYTES: int = 8 * 1024 * 1024 # ขนาดไฟล์รูปสูงสุดที่รับ (8 MB)
+    MAX_IMAGE_PIXELS: int = 40_000_000 # ป้องกัน decompression bomb
+    FACE_DETECT_MAX_SIDE: int = 640 # ย่อรูปให้ด้านยาวสุดไม่เกินค่านี้ก่อน detect ใบหน้า
+    FACE_ENCODE_FACE_SIZE: int = 300 # ความกว้างใบหน้า (pixels) ที่ต้องการตอน encode
+    FACE_DERIVATIVE_CACHE_SECONDS: int = 365 * 24 * 3600 # Cache-Control max-age ของรูปย่อ (ไม่เปลี่ยนหลังสร้าง)
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @property
+    def face_processing_enabled(self) -> bool:
+        return self.WORKER_PROFILE == "full"
+
 settings = Settings()
\ No newline at end of file
@@ -1,58 +1,47 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.models.user import User
-from app.models.role import Role
-from app.models.association import UserRole
-import uuid
+from app.core.user_cache import CurrentUser, resolve_current_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    payload = decode_access_token(token)
-    if payload is None:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    token_data = decode_access_token(token)
+    if token_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user_id_str = payload.get("sub")
-    if user_id_str is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    try:
-        user_id = uuid.UUID(user_id_str)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user ID format in token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-    user = db.query(User).filter(User.user_id == user_id).first()
+    # ใช้ cache ของผู้ใช้ที่ active (ถ้ามี) ไม่เช่นนั้นโหลดด้วย query เดียวและใช้ roles จาก token
+    user = await resolve_current_user(db, token_data)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
-    # Attach roles to user object for easier access
-    user_roles = db.query(UserRole).filter(UserRole.user_id == user.user_id).all()
-    user.roles_list = [db.query(Role).get(ur.role_id).role_name for ur in user_roles if db.query(Role).get(ur.role_id)]
     return user
 
 def role_required(required_roles: list[str]):
-    def decorator(current_user: User = Depends(get_current_user)):
-        if not any(role_name in current_user.roles_list for role_name in required_roles):
+    def decorator(current_user: CurrentUser = Depends(get_current_user)):
+        if not any(role_name in current_user.role_names for role_name in required_roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to perform this action"
             )
         return current_user
-    return decorator
\ No newline at end of file
+    return decorator
+
+def require_face_processing():
+    """endpoint ที่ต้องใช้ face encoder pool/face index: ตอบ 503 บน worker ที่รันด้วย WORKER_PROFILE=api"""
+    if not settings.face_processing_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Face processing is not available on this worker",
+            headers={"Retry-After": "1"},
+        )
@@ -0,0 +1,96 @@
+# backend/app/core/import_profile.py
+"""
+วัดเวลา import ของ API process แยกตามโมดูล (ใช้ python -X importtime ใน process ใหม่ จึงเป็น cold import จริง)
+
+วิธีใช้ (รันจากโฟลเดอร์ backend):
+    python -m app.core.import_profile                 # WORKER_PROFILE ตาม .env
+    python -m app.core.import_profile --profile api   # ตรวจว่า worker แบบ api ไม่โหลด face/CV libraries
+    python -m app.core.import_profile --module app.worker --top 40
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# library ที่ไม่ควรถูก import ใน worker แบบ WORKER_PROFILE=api
+HEAVY_MODULES = ("cv2", "dlib", "face_recognition", "face_recognition_models")
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError: # Windows
+    max_rss_kb = None
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": max_rss_kb,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """แปลงบรรทัด "import time: self [us] | cumulative | imported package" เป็น (module, self_us, cumulative_us)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_imports(module: str = "app.main", worker_profile: Optional[str] = None) -> dict:
+    env = dict(os.environ)
+    if worker_profile:
+        env["WORKER_PROFILE"] = worker_profile
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-4000:]}")
+    summary = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    rows = _parse_importtime(completed.stderr)
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    summary["modules"] = rows
+    summary["packages"] = dict(packages)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show per-module import time of the API process.")
+    parser.add_argument("--module", default="app.main", help="โมดูลที่จะ import (ค่าเริ่มต้น app.main)")
+    parser.add_argument("--profile", choices=["full", "api"], default=None, help="WORKER_PROFILE ที่ใช้ตอน import")
+    parser.add_argument("--top", type=int, default=25, help="จำนวนโมดูล/package ที่แสดง")
+    args = parser.parse_args()
+
+    result = profile_imports(args.module, args.profile)
+    rss = f"{result['max_rss_kb'] / 1024:.0f} MB" if result["max_rss_kb"] else "n/a"
+    print(f"import {args.module}: {result['seconds'] * 1000:.0f} ms, max RSS {rss}")
+    print(f"heavy modules loaded: {', '.join(result['heavy_modules']) or 'none'}")
+
+    print(f"\nTop {args.top} packages by self time (ms):")
+    for name, self_us in sorted(result["packages"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:9.1f}  {name}")
+
+    print(f"\nTop {args.top} modules by cumulative time (ms):")
+    for name, self_us, cumulative_us in sorted(result["modules"], key=lambda row: -row[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f}  {self_us / 1000:7.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# backend/app/core/invalidation.py
+"""
+Bus สำหรับล้าง cache ในหน่วยความจำข้าม uvicorn worker ผ่าน PostgreSQL LISTEN/NOTIFY (ไม่ต้องมี broker แยก)
+
+- publish(kind, key): ล้าง cache ของ process นี้ทันที แล้ว NOTIFY ให้ worker อื่นล้าง key เดียวกัน
+  (publish_many ส่งหลาย key ในครั้งเดียว; attendance_feed ใช้ส่ง delta ของ live feed ข้าม worker ด้วย)
+- แต่ละ worker มี connection ของ psycopg2 หนึ่งเส้นที่ LISTEN อยู่ใน thread แยก
+  แล้วส่งต่อเข้า event loop ด้วย call_soon_threadsafe (message ของตัวเองจะถูกข้าม)
+- ถ้า listener หลุดแล้วเชื่อมต่อใหม่ได้ จะเรียก reset ของทุก kind เพราะอาจพลาด message ระหว่างนั้น
+- ถ้าฐานข้อมูลไม่ใช่ PostgreSQL จะทำงานแบบ process เดียว (ล้างเฉพาะ cache ของตัวเอง)
+- LISTEN ต้องต่อตรงไป PostgreSQL: เมื่อ DB_PGBOUNCER=True ให้ตั้ง CACHE_INVALIDATION_DATABASE_URL
+  ถ้าไม่ตั้ง worker นี้จะไม่ LISTEN (ยัง NOTIFY ได้) และ cache จะใหม่ขึ้นตาม TTL เท่านั้น
+"""
+import asyncio
+import inspect
+import json
+import select
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Union
+
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.database import SQLALCHEMY_DATABASE_URL, async_engine
+
+Handler = Callable[[str], Union[None, Awaitable[None]]]
+ResetHandler = Callable[[], Union[None, Awaitable[None]]]
+
+# NOTIFY รับ payload ได้ไม่เกิน 8000 bytes
+_MAX_PAYLOAD_BYTES = 7900
+
+
+class InvalidationBus:
+    """
+    ตัวกลางล้าง cache ต่อ kind: handler ที่ลงทะเบียนไว้ทำงานทั้งใน process ที่ publish และใน worker อื่น
+    ที่ได้รับ NOTIFY (หนึ่ง instance ต่อ process, ใช้ผ่าน invalidation_bus)
+    """
+
+    def __init__(
+        self, database_url: str, channel: str, reconnect_seconds: float,
+        listen_url: Optional[str] = None, pgbouncer: bool = False,
+    ):
+        url = make_url(database_url)
+        self._enabled = url.get_backend_name() == "postgresql"
+        # connection ที่ LISTEN ต้องเป็น session ของ PostgreSQL จริง (PgBouncer แบบ transaction pooling ใช้ไม่ได้)
+        if listen_url:
+            url = make_url(listen_url)
+        elif pgbouncer:
+            url = None
+        # psycopg2 รับ URI แบบ libpq (ไม่มีชื่อ driver)
+        self._dsn = (
+            url.set(drivername="postgresql").render_as_string(hide_password=False)
+            if self._enabled and url is not None else None
+        )
+        self._channel = channel
+        self._reconnect_seconds = max(reconnect_seconds, 0.1)
+        self._origin = uuid.uuid4().hex # แยก message ของ process นี้ออกจากของ worker อื่น
+        self._handlers: Dict[str, Handler] = {}
+        self._resets: Dict[str, ResetHandler] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._tasks = set()
+        self._connected = False
+        self._published = 0
+        self._publish_errors = 0
+        self._received = 0
+        self._applied = 0
+        self._handler_errors = 0
+        self._reconnects = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def register(self, kind: str, handler: Handler, reset: Optional[ResetHandler] = None):
+        """
+        ลงทะเบียนวิธีล้าง cache ของ kind หนึ่ง: handler(key) ล้าง key เดียว, reset() ล้างทั้งหมด
+        handler/reset เป็น async ได้ (จะถูกรันเป็น task ใน event loop)
+        """
+        self._handlers[kind] = handler
+        if reset is not None:
+            self._resets[kind] = reset
+
+    async def publish(self, kind: str, key, local: bool = True):
+        """
+        ล้าง key ใน cache ของทุก worker เรียกหลังจาก commit แล้วเท่านั้น
+        local=False เมื่อผู้เรียกอัปเดต cache ของ process นี้เองแล้ว
+        """
+        await self.publish_many(kind, [key], local=local)
+
+    async def publish_many(self, kind: str, keys: Iterable, local: bool = True):
+        """เหมือน publish แต่ส่งหลาย key ใน transaction เดียว (NOTIFY หนึ่งครั้งต่อ key, ลำดับคงเดิม)"""
+        keys = [str(key) for key in keys]
+        if local:
+            for key in keys:
+                await self._apply(kind, key)
+        if not self._enabled or not keys:
+            return
+        payloads = [
+            json.dumps({"kind": kind, "key": key, "origin": self._origin, "sent_at": time.time()})
+            for key in keys
+        ]
+        if any(len(payload.encode("utf-8")) > _MAX_PAYLOAD_BYTES for payload in payloads):
+            raise ValueError("Invalidation payload is too large for NOTIFY")
+        try:
+            async with async_engine.connect() as connection:
+                for payload in payloads:
+                    await connection.execute(sql_select(func.pg_notify(self._channel, payload)))
+                await connection.commit()
+            self._published += len(payloads)
+        except Exception as e:
+            # worker อื่นยังได้ข้อมูลใหม่เมื่อ entry หมดอายุตาม TTL
+            self._publish_errors += 1
+            target = keys[0] if len(keys) == 1 else f"{len(keys)} keys"
+            print(f"Cache invalidation publish failed ({kind}:{target}): {e}")
+
+    async def _apply(self, kind: str, key: str):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            return
+        try:
+            result = handler(key)
+            if inspect.isawaitable(result):
+                await result
+            self._applied += 1
+        except Exception as e:
+            self._handler_errors += 1
+            print(f"Cache invalidation handler failed ({kind}:{key}): {e}")
+
+    async def _reset_all(self):
+        for kind, reset in self._resets.items():
+            try:
+                result = reset()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self._handler_errors += 1
+                print(f"Cache invalidation reset failed ({kind}): {e}")
+
+    def _schedule(self, coroutine):
+        # เรียกใน event loop thread (ผ่าน call_soon_threadsafe)
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_notify(self, payload: str):
+        # เรียกใน listener thread
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == self._origin:
+            return
+        self._received += 1
+        sent_at = message.get("sent_at")
+        if isinstance(sent_at, (int, float)):
+            latency = max(time.time() - sent_at, 0.0)
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+        kind, key = message.get("kind"), message.get("key")
+        if isinstance(kind, str) and isinstance(key, str):
+            self._loop.call_soon_threadsafe(lambda: self._schedule(self._apply(kind, key)))
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """เริ่ม listener thread (เรียกใน lifespan ตอน startup)"""
+        if not self._enabled or self._thread is not None:
+            return
+        if self._dsn is None:
+            print(
+                "Cache invalidation listener disabled: DB_PGBOUNCER is set without CACHE_INVALIDATION_DATABASE_URL; "
+                "this worker will only see other workers' changes after cache TTLs expire"
+            )
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen_forever, name="cache-invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _listen_forever(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        backoff = 0.1
+        first = True
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(self._dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self._channel}"')
+                self._connected = True
+                backoff = 0.1
+                if not first:
+                    # อาจพลาด message ระหว่างที่หลุด: ล้าง cache ทั้งหมดของ process นี้
+                    self._reconnects += 1
+                    self._loop.call_soon_threadsafe(lambda: self._schedule(self._reset_all()))
+                first = False
+
+                while not self._stopping.is_set():
+                    # timeout สั้นๆ เพื่อให้ตรวจ _stopping ได้
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._on_notify(connection.notifies.pop(0).payload)
+            except Exception as e:
+                if not self._stopping.is_set():
+                    print(f"Cache invalidation listener disconnected: {e}")
+            finally:
+                self._connected = False
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, self._reconnect_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._enabled,
+            "channel": self._channel,
+            "listening": self._dsn is not None,
+            "connected": self._connected,
+            "kinds": sorted(self._handlers),
+            "published": self._published,
+            "publish_errors": self._publish_errors,
+            "received": self._received,
+            "applied": self._applied,
+            "handler_errors": self._handler_errors,
+            "reconnects": self._reconnects,
+            "avg_delivery_ms": (self._latency_total / self._received * 1000.0) if self._received else 0.0,
+            "max_delivery_ms": self._latency_max * 1000.0,
+        }
+
+
+invalidation_bus = InvalidationBus(
+    SQLALCHEMY_DATABASE_URL,
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+    reconnect_seconds=settings.CACHE_INVALIDATION_RECONNECT_SECONDS,
+    listen_url=settings.CACHE_INVALIDATION_DATABASE_URL,
+    pgbouncer=settings.DB_PGBOUNCER,
+)
@@ -0,0 +1,117 @@
+# backend/app/core/migrations.py
+"""
+ตรวจ/อัปเกรด schema ของฐานข้อมูลด้วย Alembic ตอน startup (แทน Base.metadata.create_all)
+
+- กรณีปกติ (schema เป็น revision ล่าสุดแล้ว) ใช้ query เดียวอ่าน alembic_version ไม่ต้องรอ lock
+- ถ้ายังไม่ล่าสุดและ DB_MIGRATE_ON_STARTUP เปิดอยู่ จะ upgrade ภายใต้ advisory lock:
+  worker process แรกที่ได้ lock เป็นคน migrate ตัวอื่นรอแล้วพบว่าเป็น revision ล่าสุดแล้ว
+- ฐานข้อมูลเดิมที่สร้างด้วย create_all (มีตารางแต่ไม่มี alembic_version) จะถูก stamp เป็น revision ที่ตาราง/คอลัมน์ตรงกัน
+  แล้ว upgrade ต่อจากนั้น ถ้าไม่ตรงกับ revision ใดเลยจะไม่ stamp (ต้องตรวจแล้วรัน `alembic stamp <revision>` เอง)
+production ควรรัน `alembic upgrade head` เป็นขั้นตอน deploy แล้วปิด DB_MIGRATE_ON_STARTUP
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.database import engine
+from app.services.attendance_partitions import PARTITION_NAME
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+MIGRATION_LOCK_KEY = "schema_migrations"
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """schema ของฐานข้อมูลไม่ใช่ revision ล่าสุดและ migrate ตอน startup ไม่ได้ (ปิดไว้ หรือระบุ revision ของฐานข้อมูลเดิมไม่ได้)"""
+
+
+# alembic (และ mako) import ภายในฟังก์ชัน: ใช้ครั้งเดียวตอน startup ไม่ต้องเพิ่มเวลา import ของ app.main
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return config
+
+
+def _current_revision(connection: Connection) -> Optional[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def _schema_columns(connection: Connection) -> Dict[str, Set[Tuple[str, bool]]]:
+    """ตาราง -> (ชื่อคอลัมน์, nullable) (ไม่รวม alembic_version และ partition รายเดือนของ attendance)"""
+    inspector = inspect(connection)
+    return {
+        table: {(column["name"], bool(column["nullable"])) for column in inspector.get_columns(table)}
+        for table in inspector.get_table_names()
+        if table != "alembic_version" and not PARTITION_NAME.match(table)
+    }
+
+
+def _revision_schemas(config) -> List[Tuple[str, Dict[str, Set[Tuple[str, bool]]]]]:
+    """schema ของทุก revision (เก่า -> ใหม่): upgrade SQLite ใน memory ทีละ revision แล้ว reflect"""
+    from alembic import command
+    from alembic.script import ScriptDirectory
+
+    revisions = [script.revision for script in ScriptDirectory.from_config(config).walk_revisions()][::-1]
+    scratch_config = alembic_config()
+    scratch = create_engine("sqlite://")
+    schemas = []
+    try:
+        with scratch.begin() as connection:
+            scratch_config.attributes["connection"] = connection
+            for revision in revisions:
+                command.upgrade(scratch_config, revision)
+                schemas.append((revision, _schema_columns(connection)))
+    finally:
+        scratch.dispose()
+    return schemas
+
+
+def detect_revision(connection: Connection, config) -> str:
+    """revision ที่ schema ตรงกับฐานข้อมูลที่ไม่มี alembic_version (raise SchemaOutOfDateError ถ้าไม่ตรงกับ revision ใด)"""
+    existing = _schema_columns(connection)
+    for revision, schema in reversed(_revision_schemas(config)):
+        if schema == existing:
+            return revision
+    raise SchemaOutOfDateError(
+        "Existing schema without alembic_version does not match any migration revision: "
+        "check it against migrations/versions and run `alembic stamp <revision>`"
+    )
+
+
+def ensure_schema(bind: Engine = engine, migrate: Optional[bool] = None) -> dict:
+    """ตรวจว่า schema เป็น revision ล่าสุด (upgrade ให้ถ้า migrate) คืน revision ก่อน/หลัง"""
+    from alembic import command
+    from alembic.script import ScriptDirectory
+
+    migrate = settings.DB_MIGRATE_ON_STARTUP if migrate is None else migrate
+    config = alembic_config()
+    head = ScriptDirectory.from_config(config).get_current_head()
+
+    with bind.connect() as connection:
+        current = _current_revision(connection)
+    if current == head:
+        return {"from": current, "to": head, "upgraded": False}
+    if not migrate:
+        raise SchemaOutOfDateError(
+            f"Database schema is at revision {current}, expected {head}: run `alembic upgrade head`"
+        )
+
+    with bind.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": MIGRATION_LOCK_KEY})
+        current = _current_revision(connection) # worker อื่นอาจ migrate ไปแล้วระหว่างรอ lock
+        if current == head:
+            return {"from": current, "to": head, "upgraded": False}
+        config.attributes["connection"] = connection
+        if current is None and inspect(connection).has_table("users"):
+            current = detect_revision(connection, config)
+            print(f"Existing schema without alembic_version: stamping as revision {current}.")
+            command.stamp(config, current)
+        command.upgrade(config, "head")
+    return {"from": current, "to": head, "upgraded": True}
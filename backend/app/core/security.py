@@ -1,14 +1,26 @@
 # backend/app/core/security.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 import uuid # เพิ่ม import นี้
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.schemas.user_schema import TokenData # TokenData ย้ายมาที่ user_schema
 
 # สำหรับ hashing รหัสผ่าน
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds = max_rounds = BCRYPT_ROUNDS ทำให้ hash ที่ใช้ cost อื่น "needs update" และถูก rehash ตอน login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 # สำหรับ JWT
 SECRET_KEY = settings.SECRET_KEY # ดึงมาจาก config
@@ -22,6 +34,112 @@ def get_password_hash(password: str) -> str:
     """Hash รหัสผ่านที่ใส่มา"""
     return pwd_context.hash(password)
 
+
+# --- Password hashing executor ---
+# bcrypt ใช้เวลาราว 250 ms ต่อครั้ง (cost 12) และปล่อย GIL ระหว่างคำนวณ
+# จึงรันใน thread pool ขนาดจำกัดแยกต่างหาก แทนที่จะรันใน event loop หรือ threadpool กลางของ Starlette
+
+# operation = ชื่อฟังก์ชันของ pwd_context (hash, verify, verify_and_update)
+password_hash_seconds = metrics.histogram(
+    "password_hash_seconds", "bcrypt hash/verify time in the password hashing executor.", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0, 2.0),
+)
+password_hash_queue_wait_seconds = metrics.histogram(
+    "password_hash_queue_wait_seconds", "Time spent waiting for a free password hashing thread."
+)
+
+
+class PasswordHasherBusyError(Exception):
+    """คิวงาน hash รหัสผ่านเต็ม"""
+
+
+class _PasswordHasher:
+    def __init__(self, workers: int, max_queue: int):
+        self._workers = workers
+        self._max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._queued = 0 # ส่งเข้ามาแล้วแต่ยังไม่เริ่มทำ
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._max_queued = 0
+
+    def _dequeue(self, started: list):
+        # เรียกได้ทั้งจาก thread ที่เริ่มทำงาน และจาก submit เมื่อ task ถูกยกเลิกก่อนงานเริ่ม: นับออกจากคิวครั้งเดียว
+        if not started[0]:
+            started[0] = True
+            self._queued -= 1
+
+    def _run(self, started: list, submitted: float, func, *args):
+        with self._lock:
+            self._dequeue(started)
+            self._running += 1
+        start = time.perf_counter()
+        password_hash_queue_wait_seconds.observe(start - submitted)
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            password_hash_seconds.observe(elapsed, func.__name__)
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._busy_seconds += elapsed
+
+    async def submit(self, func, *args):
+        with self._lock:
+            if self._queued >= self._max_queue:
+                self._rejected += 1
+                raise PasswordHasherBusyError("Password hashing queue is full")
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        started = [False]
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._run, started, time.perf_counter(), func, *args)
+        finally:
+            # ถ้า client ตัดการเชื่อมต่อระหว่างรอคิว งานใน executor ถูกยกเลิกและ _run ไม่ถูกเรียก
+            with self._lock:
+                self._dequeue(started)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queued,
+                "max_queue": self._max_queue,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_seconds": (self._busy_seconds / self._completed) if self._completed else 0.0,
+            }
+
+
+password_hasher = _PasswordHasher(workers=settings.PASSWORD_HASH_WORKERS, max_queue=settings.PASSWORD_HASH_MAX_QUEUE)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password ที่รันใน password hashing executor (ไม่ block event loop)"""
+    return await password_hasher.submit(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    ตรวจรหัสผ่าน และคืน hash ใหม่ถ้า hash เดิมใช้ work factor ไม่ตรงกับ BCRYPT_ROUNDS
+    คืน (ถูกต้องหรือไม่, hash ใหม่หรือ None)
+    """
+    return await password_hasher.submit(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash ที่รันใน password hashing executor (ไม่ block event loop)"""
+    return await password_hasher.submit(pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """สร้าง JWT Access Token"""
     to_encode = data.copy()
@@ -44,4 +162,4 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         token_data = TokenData(user_id=uuid.UUID(user_id), roles=roles)
     except JWTError:
         return None
-    return token_data
\ No newline at end of file
+    return token_data
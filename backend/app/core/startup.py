@@ -0,0 +1,62 @@
+# backend/app/core/startup.py
+"""
+จับเวลา startup ของ API process แยกตามขั้นตอน (import, schema, seed, โหลด face index ...)
+พิมพ์เวลาของแต่ละขั้นตอนลง log และดูย้อนหลังได้ที่ GET /admin/startup
+ต้อง import โมดูลนี้ก่อนโมดูลอื่นใน main.py เพื่อให้ขั้นตอน "imports" นับเวลา import ทั้งหมด
+ดูเวลา import แยกตามโมดูลได้ด้วย python -m app.core.import_profile
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    def __init__(self):
+        self._created = time.perf_counter()
+        self._started: Optional[float] = None
+        self._phases: Dict[str, float] = {}
+        self._total: Optional[float] = None
+
+    def begin(self):
+        """เรียกตอนเริ่ม lifespan: บันทึกเวลาตั้งแต่ import โมดูลนี้เป็นขั้นตอน "imports" """
+        self._started = time.perf_counter()
+        self._record("imports", self._started - self._created)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start)
+
+    def finish(self):
+        self._total = time.perf_counter() - self._created
+        slowest = max(self._phases, key=self._phases.get) if self._phases else None
+        print(f"Startup finished in {self._total * 1000:.0f} ms (slowest phase: {slowest}).")
+
+    def _record(self, name: str, seconds: float):
+        self._phases[name] = seconds
+        print(f"Startup phase {name}: {seconds * 1000:.1f} ms")
+
+    def stats(self) -> dict:
+        from app.core.config import settings
+        from app.core.import_profile import HEAVY_MODULES
+
+        try:
+            import resource
+            max_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        except ImportError: # Windows
+            max_rss_mb = None
+        return {
+            "worker_profile": settings.WORKER_PROFILE,
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self._phases.items()},
+            "total_ms": round(self._total * 1000, 1) if self._total is not None else None,
+            "max_rss_mb": max_rss_mb,
+            # ใน process นี้ (worker ของ face encoder pool เป็น process แยก)
+            "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+        }
+
+
+startup_timer = StartupTimer()
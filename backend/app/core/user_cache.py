@@ -0,0 +1,130 @@
+# backend/app/core/user_cache.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.schemas.user_schema import TokenData
+from app.services.db_service import get_user_for_token
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    ข้อมูลผู้ใช้ที่ยืนยันตัวตนแล้ว (snapshot ของแถวใน users + ชื่อ roles)
+    ใช้แทน ORM User ใน dependency ของการยืนยันตัวตน เพื่อให้ cache ข้าม request ได้อย่างปลอดภัย
+    """
+    user_id: uuid.UUID
+    username: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    email: str
+    student_id: Optional[str]
+    teacher_id: Optional[str]
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+    last_login_at: Optional[datetime]
+    role_names: List[str]
+
+    @classmethod
+    def from_user(cls, user, role_names: Optional[List[str]] = None) -> "CurrentUser":
+        return cls(
+            user_id=user.user_id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+            student_id=user.student_id,
+            teacher_id=user.teacher_id,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            last_login_at=user.last_login_at,
+            role_names=list(role_names if role_names is not None else user.role_names),
+        )
+
+
+class TTLCache:
+    """LRU cache ขนาดจำกัดที่แต่ละ entry หมดอายุหลัง ttl วินาที (thread-safe)"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self._ttl = ttl_seconds
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[object, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self._ttl <= 0 or self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "ttl_seconds": self._ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+# cache ของข้อมูลผู้ใช้ที่ active ต่อ process (key = user_id)
+# ต้องเรียก active_user_cache.invalidate(user_id) ทุกครั้งที่แก้ไข/ลบผู้ใช้
+active_user_cache = TTLCache(ttl_seconds=settings.USER_CACHE_TTL_SECONDS, max_size=settings.USER_CACHE_MAX_SIZE)
+
+
+async def resolve_current_user(db: AsyncSession, token_data: TokenData) -> Optional[CurrentUser]:
+    """
+    หา principal ของ access token ที่ verify แล้ว:
+    ใช้ข้อมูลจาก cache ถ้ามี (ไม่มี DB round-trip) ไม่เช่นนั้นโหลดจากฐานข้อมูลด้วย query เดียวแล้วเก็บลง cache
+    roles ใช้ค่าจาก token เป็นหลัก
+    """
+    cached = active_user_cache.get(token_data.user_id)
+    if cached is not None:
+        if token_data.roles and cached.role_names != token_data.roles:
+            return replace(cached, role_names=list(token_data.roles))
+        return cached
+
+    user = await get_user_for_token(db, token_data)
+    if user is None:
+        return None
+    current_user = CurrentUser.from_user(user)
+    active_user_cache.set(token_data.user_id, current_user)
+    return current_user
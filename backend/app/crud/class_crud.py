@@ -0,0 +1,128 @@
+# backend/app/crud/class_crud.py
+import uuid
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, exists, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.user_cache import CurrentUser
+from app.models.association import class_students, user_roles
+from app.models.class_model import Class
+from app.models.role import Role
+from app.models.user import User
+
+
+async def get_class_async(db: AsyncSession, class_id: uuid.UUID) -> Optional[Class]:
+    return (await db.execute(select(Class).where(Class.class_id == class_id))).scalar_one_or_none()
+
+
+async def get_class_for_staff(db: AsyncSession, class_id: uuid.UUID, current_user: CurrentUser) -> Class:
+    """คืนคลาสถ้าผู้ใช้เป็นอาจารย์ผู้สอนคลาสนั้นหรือเป็น admin (ไม่เช่นนั้น 404/403)"""
+    db_class = await get_class_async(db, class_id)
+    if db_class is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Class not found")
+    if db_class.teacher_id != current_user.user_id and "admin" not in current_user.role_names:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this class")
+    return db_class
+
+
+def _student_count():
+    return (
+        select(func.count())
+        .select_from(class_students)
+        .where(class_students.c.class_id == Class.class_id)
+        .scalar_subquery()
+    )
+
+
+async def list_classes_for_user(db: AsyncSession, current_user: CurrentUser, limit: int, offset: int) -> List[Tuple[Class, int]]:
+    """
+    คลาสที่ผู้ใช้เห็นได้ (admin = ทั้งหมด, อาจารย์ = ที่สอน, นักเรียน = ที่ลงทะเบียน) พร้อมจำนวนนักเรียน
+    จำนวนนักเรียนเป็น correlated subquery ใน query เดียวกัน (ไม่โหลด Class.students)
+    """
+    query = select(Class, _student_count().label("student_count")).order_by(Class.name, Class.class_id)
+    if "admin" not in current_user.role_names:
+        query = query.where(
+            or_(
+                Class.teacher_id == current_user.user_id,
+                exists()
+                .where(class_students.c.class_id == Class.class_id)
+                .where(class_students.c.student_id == current_user.user_id),
+            )
+        )
+    result = await db.execute(query.limit(limit).offset(offset))
+    return [(row.Class, row.student_count) for row in result]
+
+
+async def get_student_count(db: AsyncSession, class_id: uuid.UUID) -> int:
+    return (
+        await db.execute(select(func.count()).select_from(class_students).where(class_students.c.class_id == class_id))
+    ).scalar_one()
+
+
+async def _bump_roster_version(db: AsyncSession, class_id: uuid.UUID) -> int:
+    result = await db.execute(
+        update(Class)
+        .where(Class.class_id == class_id)
+        .values(roster_version=Class.roster_version + 1)
+        .returning(Class.roster_version)
+    )
+    return result.scalar_one()
+
+
+async def enroll_students(
+    db: AsyncSession, db_class: Class, student_ids: Iterable[uuid.UUID]
+) -> Tuple[int, List[uuid.UUID], List[uuid.UUID], List[uuid.UUID], List[uuid.UUID]]:
+    """
+    ลงทะเบียนนักเรียนหลายคนด้วย multi-row INSERT ... ON CONFLICT DO NOTHING ครั้งเดียว
+    ลงทะเบียนได้เฉพาะผู้ใช้ที่มี role student
+    คืน (roster_version, ที่ลงทะเบียนใหม่, ที่ลงทะเบียนอยู่แล้ว, ที่ไม่มีผู้ใช้นี้, ที่ไม่ใช่นักเรียน)
+    """
+    requested = list(dict.fromkeys(student_ids))
+    is_student = (
+        exists()
+        .where(user_roles.c.user_id == User.user_id, user_roles.c.role_id == Role.id, Role.name == "student")
+        .label("is_student")
+    )
+    users = dict((await db.execute(select(User.user_id, is_student).where(User.user_id.in_(requested)))).all())
+    known = {user_id for user_id, student in users.items() if student}
+    rows = [{"class_id": db_class.class_id, "student_id": student_id} for student_id in requested if student_id in known]
+
+    inserted = set()
+    if rows:
+        result = await db.execute(
+            pg_insert(class_students).values(rows).on_conflict_do_nothing().returning(class_students.c.student_id)
+        )
+        inserted = set(result.scalars())
+    version = await _bump_roster_version(db, db_class.class_id) if inserted else db_class.roster_version
+    await db.commit()
+
+    return (
+        version,
+        [student_id for student_id in requested if student_id in inserted],
+        [student_id for student_id in requested if student_id in known and student_id not in inserted],
+        [student_id for student_id in requested if student_id not in users],
+        [student_id for student_id in requested if student_id in users and student_id not in known],
+    )
+
+
+async def unenroll_students(
+    db: AsyncSession, db_class: Class, student_ids: Iterable[uuid.UUID]
+) -> Tuple[int, List[uuid.UUID], List[uuid.UUID]]:
+    """ถอนนักเรียนหลายคนด้วย DELETE ... WHERE student_id IN (...) ครั้งเดียว คืน (roster_version, ที่ถอน, ที่ไม่ได้ลงทะเบียน)"""
+    requested = list(dict.fromkeys(student_ids))
+    result = await db.execute(
+        delete(class_students)
+        .where(class_students.c.class_id == db_class.class_id, class_students.c.student_id.in_(requested))
+        .returning(class_students.c.student_id)
+    )
+    removed = set(result.scalars())
+    version = await _bump_roster_version(db, db_class.class_id) if removed else db_class.roster_version
+    await db.commit()
+    return (
+        version,
+        [student_id for student_id in requested if student_id in removed],
+        [student_id for student_id in requested if student_id not in removed],
+    )
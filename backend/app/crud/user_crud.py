@@ -0,0 +1,134 @@
+# backend/app/crud/user_crud.py
+import base64
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, exists, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.association import class_students, user_roles
+from app.models.role import Role
+from app.models.user import User
+
+# คอลัมน์ที่ใช้ตอบรายชื่อผู้ใช้ (ไม่ดึง password_hash และไม่โหลด relationships)
+USER_LIST_COLUMNS = (
+    User.user_id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.email,
+    User.student_id,
+    User.teacher_id,
+    User.is_active,
+    User.created_at,
+    User.updated_at,
+    User.last_login_at,
+)
+
+
+class InvalidCursorError(ValueError):
+    """cursor ของ pagination ไม่ถูกต้อง"""
+
+
+def encode_cursor(created_at: datetime, user_id: uuid.UUID) -> str:
+    """แปลงตำแหน่ง (created_at, user_id) ของแถวสุดท้ายเป็น cursor แบบ opaque"""
+    raw = f"{created_at.isoformat()}|{user_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, user_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(user_id)
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _user_list_query(
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    class_id: Optional[uuid.UUID] = None,
+) -> Select:
+    query = select(*USER_LIST_COLUMNS).order_by(User.created_at, User.user_id)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if role is not None:
+        query = query.where(
+            exists()
+            .where(user_roles.c.user_id == User.user_id)
+            .where(user_roles.c.role_id == Role.id)
+            .where(Role.name == role)
+        )
+    if class_id is not None:
+        query = query.where(
+            exists()
+            .where(class_students.c.student_id == User.user_id)
+            .where(class_students.c.class_id == class_id)
+        )
+    return query
+
+
+async def get_role_names_for_users(db: AsyncSession, user_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, List[str]]:
+    """ชื่อ roles ของผู้ใช้หลายคนใน query เดียว (แทนการ lazy load user.roles ทีละคน)"""
+    role_names: Dict[uuid.UUID, List[str]] = defaultdict(list)
+    if not user_ids:
+        return role_names
+    result = await db.execute(
+        select(user_roles.c.user_id, Role.name)
+        .join(Role, Role.id == user_roles.c.role_id)
+        .where(user_roles.c.user_id.in_(user_ids))
+        .order_by(Role.name)
+    )
+    for user_id, name in result:
+        role_names[user_id].append(name)
+    return role_names
+
+
+async def list_users_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    class_id: Optional[uuid.UUID] = None,
+) -> Tuple[list, Dict[uuid.UUID, List[str]], Optional[str]]:
+    """
+    รายชื่อผู้ใช้หนึ่งหน้าแบบ keyset pagination บน (created_at, user_id)
+    คืน (rows, role names ของแต่ละ user, cursor ของหน้าถัดไปหรือ None)
+    """
+    query = _user_list_query(role=role, is_active=is_active, class_id=class_id)
+    if cursor is not None:
+        after_created_at, after_user_id = decode_cursor(cursor)
+        query = query.where(tuple_(User.created_at, User.user_id) > tuple_(after_created_at, after_user_id))
+
+    # ดึงเกินมาหนึ่งแถวเพื่อรู้ว่ามีหน้าถัดไปหรือไม่
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].user_id)
+
+    role_names = await get_role_names_for_users(db, [row.user_id for row in rows])
+    return rows, role_names, next_cursor
+
+
+async def stream_users(
+    db: AsyncSession,
+    chunk_size: int = 1000,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    class_id: Optional[uuid.UUID] = None,
+) -> AsyncIterator[Tuple[object, List[str]]]:
+    """
+    ไล่ผู้ใช้ทั้งหมดผ่าน server-side cursor ทีละ chunk_size แถว (ไม่โหลดทั้งตารางเข้า memory)
+    yield (row, role names) และดึง roles แบบ batch ต่อ chunk
+    """
+    query = _user_list_query(role=role, is_active=is_active, class_id=class_id)
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        role_names = await get_role_names_for_users(db, [row.user_id for row in rows])
+        for row in rows:
+            yield row, role_names.get(row.user_id, [])
@@ -1,27 +1,74 @@
 # backend/app/main.py
 
+from app.core.startup import startup_timer # ต้องอยู่บรรทัดแรก: เริ่มจับเวลา import ของ process
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager # สำหรับ lifespan events
-from app.database import engine, Base, get_db
-from app.api.v1 import auth, users # Import เฉพาะ routers ที่สร้างแล้ว
-# from app.api.v1 import classes, attendance, admin # ถ้ายังไม่มีไฟล์เหล่านี้ ให้ comment ไว้ก่อน
+from app.database import async_engine, engine, get_db
+from app.core.migrations import ensure_schema
+from app.api.v1 import auth, users, attendance, admin, classes, jobs, metrics as metrics_api, storage as storage_api # Import เฉพาะ routers ที่สร้างแล้ว
 from app.services.db_service import initialize_roles_permissions
+from app.services.face_recognition_service import load_face_index
+from app.services.face_encoder_pool import face_encoder_pool
+from app.core.security import password_hasher
+from app.core.invalidation import invalidation_bus
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.services.storage_service import storage
+from app.services.face_derivatives import face_derivatives
+from app.services import cache_invalidation # noqa: F401 (ลงทะเบียน handler ของ invalidation_bus)
+from app.services.attendance_pipeline import attendance_writer
+from app.services.job_queue import JobWorker
+from app.services.attendance_partitions import maintain_attendance_partitions, run_partition_maintenance
+from app.core.config import settings
+import asyncio
 
 # ใช้ asynccontextmanager สำหรับ startup/shutdown events (ดีกว่า @app.on_event)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup event
-    print("Application startup: Creating database tables and initializing roles/permissions...")
+    startup_timer.begin()
+    with startup_timer.phase("schema"):
+        schema = ensure_schema(engine) # alembic: ตรวจ revision (upgrade ถ้าเปิด DB_MIGRATE_ON_STARTUP)
+    if schema["upgraded"]:
+        print(f"Database schema upgraded: {schema['from']} -> {schema['to']}")
+    with startup_timer.phase("attendance_partitions"):
+        maintain_attendance_partitions(engine) # partition รายเดือนของ attendance ต้องมีก่อนรับ check-in
     db_session = next(get_db()) # รับ db session
     try:
-        Base.metadata.create_all(bind=engine) # สร้างตารางทั้งหมด (ถ้ายังไม่มี)
-        initialize_roles_permissions(db_session) # สร้าง roles และ permissions เริ่มต้น
+        with startup_timer.phase("seed_roles_permissions"):
+            seeded = initialize_roles_permissions(db_session) # สร้าง roles และ permissions เริ่มต้นที่ยังไม่มี
+        if any(seeded.values()):
+            print(f"Seeded roles/permissions: {seeded}")
+        if settings.face_processing_enabled:
+            with startup_timer.phase("face_index"):
+                loaded = load_face_index(db_session) # โหลด face encodings ที่คำนวณไว้แล้วเข้า memory
+            print(f"Loaded {loaded} face encodings into the face index.")
     finally:
         db_session.close() # ปิด session
+    if settings.face_processing_enabled:
+        with startup_timer.phase("face_encoder_pool"):
+            face_encoder_pool.start() # โหลดโมเดล dlib ใน process นี้แล้วสร้าง worker processes
+    else:
+        print("WORKER_PROFILE=api: face index and face encoder pool are not loaded.")
+    with startup_timer.phase("invalidation_bus"):
+        invalidation_bus.start() # รับ invalidation จาก worker อื่น (LISTEN/NOTIFY)
+    partition_task = asyncio.create_task(run_partition_maintenance(settings.ATTENDANCE_PARTITION_CHECK_HOURS))
+    job_worker = JobWorker() if settings.JOB_WORKER_IN_API else None # ปกติรันแยกด้วย python -m app.worker
+    job_task = asyncio.create_task(job_worker.run()) if job_worker else None
+    startup_timer.finish()
     yield
     # Shutdown event (ถ้ามีอะไรต้อง cleanup)
+    partition_task.cancel()
+    if job_worker:
+        await job_worker.stop()
+        await job_task
+    invalidation_bus.stop()
+    await attendance_writer.drain() # เขียน check-in ที่ค้างใน buffer ให้เสร็จก่อนปิด
+    await face_derivatives.drain() # ใช้ face encoder pool จึงต้องเสร็จก่อนปิด pool
+    face_encoder_pool.shutdown()
+    password_hasher.shutdown()
+    storage.shutdown()
     print("Application shutdown.")
 
 app = FastAPI(title="Face Attendance API", version="1.0.0", lifespan=lifespan)
@@ -45,15 +92,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[users.NEXT_CURSOR_HEADER], # ให้ web client อ่าน cursor ของหน้าถัดไปได้
 )
 
+# Metrics: latency ต่อ route และจำนวน/เวลา query ต่อ request (GET /metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware) # เพิ่มทีหลัง = อยู่นอก CORS จึงนับเวลาทั้ง request
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+
 # รวม API Routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 # ถ้าคุณยังไม่ได้สร้าง routers อื่นๆ ให้ comment บรรทัดเหล่านี้ไว้ก่อน เพื่อป้องกัน ImportError
-# app.include_router(classes.router, prefix="/api/v1/classes", tags=["Classes"])
-# app.include_router(attendance.router, prefix="/api/v1/attendance", tags=["Attendance"])
-# app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(classes.class_router, prefix="/api/v1/classes", tags=["Classes"])
+app.include_router(attendance.attendance_router, prefix="/api/v1/attendance", tags=["Attendance"])
+app.include_router(admin.admin_router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(storage_api.storage_router, prefix="/api/v1/storage", tags=["Storage"])
+app.include_router(jobs.job_router, prefix="/api/v1/jobs", tags=["Jobs"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_api.metrics_router, tags=["Metrics"])
 
 
 # --- Optional: Default root endpoint ---
@@ -7,6 +7,9 @@ from .user import User
 from .role import Role
 from .permission import Permission
 from .class_model import Class # ตรวจสอบให้แน่ใจว่ามีไฟล์ class_model.py
+from .class_session import ClassSession
 from .attendance import Attendance # ตรวจสอบให้แน่ใจว่ามีไฟล์ attendance.py
+from .attendance_rollup import AttendanceSessionStats, AttendanceStudentStats, AttendanceDailyStats
 from .user_face_sample import UserFaceSample # ตรวจสอบให้แน่ใจว่ามีไฟล์ user_face_sample.py
+from .job import Job
 from .association import user_roles, role_permissions, class_students # ตรวจสอบให้แน่ใจว่ามีไฟล์ association.py
\ No newline at end of file
@@ -1,24 +1,34 @@
 # backend/app/models/attendance.py
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, Date, ForeignKey, Boolean, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from app.database import Base
+from app.database import Base, UTCDateTime
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # นักเรียนหนึ่งคนมีได้หนึ่งแถวต่อ session (ใช้เป็น conflict target ของ batched upsert)
+        # ตารางแบ่ง partition ตาม session_date จึงต้องมี session_date ใน unique constraint และ primary key ด้วย
+        UniqueConstraint("class_id", "session_id", "student_id", "session_date", name="uq_attendance_class_session_student"),
+        # แบ่ง partition รายเดือน (partition ถูกสร้าง/ลบโดย app.services.attendance_partitions)
+        {"postgresql_partition_by": "RANGE (session_date)"},
+    )
 
     attendance_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     class_id = Column(UUID(as_uuid=True), ForeignKey("classes.class_id"), nullable=False)
+    session_id = Column(UUID(as_uuid=True), ForeignKey("class_sessions.session_id"), nullable=False)
     student_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False) # สมมติว่านักเรียนเป็น User
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc)) # เวลาที่บันทึกการเข้าเรียน
+    timestamp = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc)) # เวลาที่บันทึกการเข้าเรียน
+    session_date = Column(Date, primary_key=True, default=lambda: datetime.now(timezone.utc).date()) # วันของ session (partition key)
     status = Column(String(50), nullable=False) # เช่น "present", "absent", "late"
     is_manual_override = Column(Boolean, default=False) # ระบุว่าเป็นการแก้ไขด้วยมือหรือไม่
     recorded_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=True) # บันทึกโดยใคร (อาจารย์/ผู้ดูแล)
 
     # Relationships
     class_rel = relationship("Class", back_populates="attendances")
+    session_rel = relationship("ClassSession", back_populates="attendances")
     student_rel = relationship("User", foreign_keys=[student_id], back_populates="attendances")
     recorder_rel = relationship("User", foreign_keys=[recorded_by_user_id], back_populates="recorded_attendances")
 
@@ -0,0 +1,43 @@
+# backend/app/models/attendance_rollup.py
+from sqlalchemy import Column, Date, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from app.models.attendance_enums import AttendanceStatus
+
+# ชื่อคอลัมน์นับจำนวนของแต่ละสถานะ (ตรงกับค่าใน AttendanceStatus)
+STATUS_COUNT_COLUMNS = [status.value for status in AttendanceStatus]
+
+
+class _StatusCounts:
+    """จำนวนแถว attendance แยกตามสถานะ (ถูกอัปเดตแบบ delta โดย app.services.attendance_rollups)"""
+    present = Column(Integer, nullable=False, default=0, server_default="0")
+    late = Column(Integer, nullable=False, default=0, server_default="0")
+    absent = Column(Integer, nullable=False, default=0, server_default="0")
+    left_early = Column(Integer, nullable=False, default=0, server_default="0")
+    unverified_face = Column(Integer, nullable=False, default=0, server_default="0")
+    manual_override = Column(Integer, nullable=False, default=0, server_default="0")
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class AttendanceSessionStats(_StatusCounts, Base):
+    """สรุปการเข้าเรียนต่อ session"""
+    __tablename__ = "attendance_session_stats"
+
+    session_id = Column(UUID(as_uuid=True), ForeignKey("class_sessions.session_id", ondelete="CASCADE"), primary_key=True)
+    class_id = Column(UUID(as_uuid=True), ForeignKey("classes.class_id", ondelete="CASCADE"), nullable=False, index=True)
+    session_date = Column(Date, nullable=False)
+
+
+class AttendanceStudentStats(_StatusCounts, Base):
+    """สรุปการเข้าเรียนของนักเรียนหนึ่งคนในหนึ่งคลาส"""
+    __tablename__ = "attendance_student_stats"
+
+    class_id = Column(UUID(as_uuid=True), ForeignKey("classes.class_id", ondelete="CASCADE"), primary_key=True)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class AttendanceDailyStats(_StatusCounts, Base):
+    """สรุปการเข้าเรียนของทุกคลาสรวมกันต่อวัน"""
+    __tablename__ = "attendance_daily_stats"
+
+    stat_date = Column(Date, primary_key=True)
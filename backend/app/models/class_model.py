@@ -1,10 +1,10 @@
 # backend/app/models/class_model.py
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, ForeignKey, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from app.database import Base
+from app.database import Base, UTCDateTime
 from app.models.association import class_students # ต้อง import ตารางเชื่อมความสัมพันธ์
 
 class Class(Base):
@@ -14,15 +14,17 @@ class Class(Base):
     name = Column(String(100), unique=True, index=True, nullable=False)
     description = Column(String(255), nullable=True)
     teacher_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False) # อาจารย์ผู้สอน (User ID)
-    start_time = Column(DateTime, nullable=True)
-    end_time = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    start_time = Column(UTCDateTime, nullable=True)
+    end_time = Column(UTCDateTime, nullable=True)
+    roster_version = Column(Integer, nullable=False, default=1, server_default="1") # เพิ่มขึ้นทุกครั้งที่รายชื่อนักเรียนเปลี่ยน
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     # Relationships
     teacher = relationship("User", back_populates="teaching_classes", foreign_keys=[teacher_id])
     students = relationship("User", secondary=class_students, back_populates="enrolled_classes")
     attendances = relationship("Attendance", back_populates="class_rel", cascade="all, delete-orphan")
+    sessions = relationship("ClassSession", back_populates="class_rel", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Class(name='{self.name}')>"
@@ -0,0 +1,28 @@
+# backend/app/models/class_session.py
+import uuid
+from sqlalchemy import Column, Date, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from app.database import Base, UTCDateTime
+
+class ClassSession(Base):
+    """คาบเรียนหนึ่งครั้งของคลาส (หนึ่งวันมีได้หลายคาบ ระบุด้วยเวลาเริ่ม ดู app.services.class_session_service)"""
+    __tablename__ = "class_sessions"
+    __table_args__ = (
+        UniqueConstraint("class_id", "starts_at", name="uq_class_sessions_class_starts_at"),
+    )
+
+    session_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    class_id = Column(UUID(as_uuid=True), ForeignKey("classes.class_id", ondelete="CASCADE"), nullable=False)
+    session_date = Column(Date, nullable=False) # วันของ starts_at ตามเวลาของวิทยาเขต (CAMPUS_TIMEZONE)
+    starts_at = Column(UTCDateTime, nullable=False)
+    ends_at = Column(UTCDateTime, nullable=True)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relationships
+    class_rel = relationship("Class", back_populates="sessions")
+    attendances = relationship("Attendance", back_populates="session_rel")
+
+    def __repr__(self):
+        return f"<ClassSession(class_id='{self.class_id}', starts_at='{self.starts_at}')>"
@@ -0,0 +1,47 @@
+# backend/app/models/job.py
+import uuid
+from enum import Enum as PyEnum
+from sqlalchemy import JSON, Boolean, Column, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+from app.database import Base, UTCDateTime
+
+
+class JobStatus(str, PyEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    """งาน background ในคิว (ดู services/job_queue.py) worker ดึงงานด้วย SELECT ... FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # query หลักของ worker: งาน queued ของ job_type ที่ถึงเวลาแล้ว เรียงตาม run_at
+        Index("ix_jobs_type_status_run_at", "job_type", "status", "run_at"),
+        Index("ix_jobs_created_by_created_at", "created_by_user_id", "created_at"),
+    )
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default=JobStatus.QUEUED.value)
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    progress = Column(Float, nullable=True) # 0.0 - 1.0 (None = ไม่ทราบจำนวนทั้งหมด)
+    progress_message = Column(String(255), nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    run_at = Column(UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)) # เริ่มได้ตั้งแต่เวลานี้ (ใช้ทำ retry backoff)
+    locked_by = Column(String(100), nullable=True) # worker ที่กำลังทำงานนี้
+    heartbeat_at = Column(UTCDateTime, nullable=True)
+    created_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(UTCDateTime, nullable=True)
+    finished_at = Column(UTCDateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Job(job_id='{self.job_id}', job_type='{self.job_type}', status='{self.status}')>"
@@ -1,14 +1,18 @@
 # backend/app/models/user.py
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship # <-- ตรวจสอบว่ามีบรรทัดนี้
 from datetime import datetime, timezone
-from app.database import Base
+from app.database import Base, UTCDateTime
 from app.models.association import user_roles, class_students # ตรวจสอบว่า import class_students ด้วย
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # สำหรับ keyset pagination ของรายชื่อผู้ใช้ (ORDER BY created_at, user_id)
+        Index("ix_users_created_at_user_id", "created_at", "user_id"),
+    )
 
     user_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String(80), unique=True, index=True, nullable=False)
@@ -19,9 +23,9 @@ class User(Base):
     student_id = Column(String(20), unique=True, index=True, nullable=True)
     teacher_id = Column(String(20), unique=True, index=True, nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-    last_login_at = Column(DateTime, nullable=True)
+    created_at = Column(UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)) # NOT NULL: เป็น key ของ keyset pagination
+    updated_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    last_login_at = Column(UTCDateTime, nullable=True)
 
     # Relationships
     # User -> Roles (Many-to-Many)
@@ -41,5 +45,19 @@ class User(Base):
     enrolled_classes = relationship("Class", secondary=class_students, back_populates="students")
     # ----------------------------------------------
 
+    # ชื่อ roles ที่ได้จาก JWT (ถ้ามี) เพื่อไม่ต้อง query ตาราง roles ทุก request
+    _token_role_names = None
+
+    @property
+    def role_names(self) -> list[str]:
+        """ชื่อ roles ของผู้ใช้: ใช้ค่าจาก token ถ้ามี ไม่เช่นนั้นอ่านจาก relationship roles"""
+        if self._token_role_names is not None:
+            return self._token_role_names
+        return [role.name for role in self.roles]
+
+    @role_names.setter
+    def role_names(self, names: list[str]):
+        self._token_role_names = list(names)
+
     def __repr__(self):
         return f"<User(username='{self.username}', email='{self.email}')>"
\ No newline at end of file
@@ -1,10 +1,10 @@
 # backend/app/models/user_face_sample.py
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy import JSON, Column, String, ForeignKey, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from app.database import Base
+from app.database import Base, UTCDateTime
 
 class UserFaceSample(Base):
     __tablename__ = "user_face_samples"
@@ -12,9 +12,13 @@ class UserFaceSample(Base):
     sample_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
     image_url = Column(String(255), nullable=True) # ถ้าเก็บเป็น URL
-    # หรือถ้าเก็บ binary data ใน DB โดยตรง (ไม่แนะนำสำหรับไฟล์ขนาดใหญ่)
-    # face_embedding = Column(LargeBinary, nullable=True) # For storing face recognition embeddings
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # face encoding ที่คำนวณไว้ตอนลงทะเบียน (float32 x 128 = 512 bytes) ไม่ต้อง detect/encode รูปซ้ำตอน match
+    face_encoding = Column(LargeBinary, nullable=True)
+    encoding_model = Column(String(50), nullable=True) # รุ่นของโมเดลที่ใช้สร้าง face_encoding
+    encoded_at = Column(UTCDateTime, nullable=True)
+    # รูปย่อ/รูปใบหน้าที่สร้างแล้ว: name -> {key, etag, size, content_type} (None = สร้างไม่ได้ เช่น ไม่พบใบหน้า)
+    derivatives = Column(JSON, nullable=True)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
     user = relationship("User", back_populates="face_samples")
@@ -0,0 +1,70 @@
+# backend/app/schemas/attendance_schema.py
+import uuid
+from pydantic import BaseModel, computed_field
+from typing import List, Optional
+from datetime import date, datetime
+
+from app.models.attendance_enums import AttendanceStatus
+
+
+class AttendanceResponse(BaseModel):
+    attendance_id: uuid.UUID
+    class_id: uuid.UUID
+    session_id: Optional[uuid.UUID] = None
+    student_id: uuid.UUID
+    status: AttendanceStatus
+    timestamp: datetime
+    session_date: Optional[date] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CheckInResponse(AttendanceResponse):
+    face_distance: Optional[float] = None # ระยะห่างของใบหน้าที่ match ได้ (ยิ่งน้อยยิ่งเหมือน)
+
+
+class AttendanceOverrideRequest(BaseModel):
+    status: AttendanceStatus
+
+
+# --- Schemas สำหรับสถิติการเข้าเรียน (อ่านจากตารางสรุป) ---
+
+class AttendanceCounts(BaseModel):
+    present: int = 0
+    late: int = 0
+    absent: int = 0
+    left_early: int = 0
+    unverified_face: int = 0
+    manual_override: int = 0
+    total: int = 0
+
+    @computed_field
+    @property
+    def attendance_rate(self) -> float:
+        """สัดส่วนของ present + late ต่อจำนวนแถวทั้งหมด"""
+        return (self.present + self.late) / self.total if self.total else 0.0
+
+    class Config:
+        from_attributes = True
+
+
+class SessionStatsResponse(AttendanceCounts):
+    session_id: uuid.UUID
+    class_id: uuid.UUID
+    session_date: date
+
+
+class StudentStatsResponse(AttendanceCounts):
+    class_id: uuid.UUID
+    student_id: uuid.UUID
+
+
+class DailyStatsResponse(AttendanceCounts):
+    stat_date: date
+
+
+class ClassStatsResponse(BaseModel):
+    class_id: uuid.UUID
+    totals: AttendanceCounts
+    sessions: List[SessionStatsResponse]
@@ -0,0 +1,73 @@
+# backend/app/schemas/class_schema.py
+import uuid
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+
+# --- Schemas สำหรับ Class ---
+
+class ClassCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=255)
+    teacher_id: Optional[uuid.UUID] = None # admin กำหนดอาจารย์ได้ ถ้าไม่ระบุ = ผู้สร้าง
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+class ClassResponse(BaseModel):
+    class_id: uuid.UUID
+    name: str
+    description: Optional[str] = None
+    teacher_id: uuid.UUID
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    roster_version: int
+    student_count: int = 0
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# --- Schemas สำหรับ Class Session ---
+
+class ClassSessionCreate(BaseModel):
+    starts_at: datetime # ถ้าไม่มี timezone ถือเป็น UTC
+    ends_at: Optional[datetime] = None # ไม่ระบุ = รับ check-in จนกว่าจะมี session ถัดไป
+
+class ClassSessionResponse(BaseModel):
+    session_id: uuid.UUID
+    class_id: uuid.UUID
+    session_date: date # วันตามเวลาของวิทยาเขต
+    starts_at: datetime
+    ends_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# --- Schemas สำหรับ Roster ---
+
+class RosterStudentResponse(BaseModel):
+    user_id: uuid.UUID
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    student_id: Optional[str] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+class RosterResponse(BaseModel):
+    class_id: uuid.UUID
+    roster_version: int
+    students: List[RosterStudentResponse]
+
+class EnrollmentRequest(BaseModel):
+    student_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=5000)
+
+class EnrollmentResult(BaseModel):
+    class_id: uuid.UUID
+    roster_version: int
+    changed: List[uuid.UUID] # ลงทะเบียน/ถอนสำเร็จ
+    unchanged: List[uuid.UUID] # ลงทะเบียนอยู่แล้ว / ไม่ได้ลงทะเบียนอยู่
+    not_found: List[uuid.UUID] = [] # ไม่มีผู้ใช้นี้
+    rejected: List[uuid.UUID] = [] # มีผู้ใช้นี้แต่ไม่มี role student
@@ -0,0 +1,33 @@
+# backend/app/schemas/job_schema.py
+import uuid
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+class JobCreate(BaseModel):
+    job_type: str = Field(..., max_length=50)
+    payload: Dict[str, Any] = {}
+
+class JobResponse(BaseModel):
+    job_id: uuid.UUID
+    job_type: str
+    status: str # queued, running, succeeded, failed, cancelled
+    progress: Optional[float] = None # 0.0 - 1.0 (None = ไม่ทราบจำนวนทั้งหมด ดู progress_message)
+    progress_message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool = False
+    result: Optional[Dict[str, Any]] = None
+    result_url: Optional[str] = None # presigned URL ของไฟล์ผลลัพธ์ (ถ้างานสร้างไฟล์)
+    error: Optional[str] = None
+    run_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobPage(BaseModel):
+    items: List[JobResponse]
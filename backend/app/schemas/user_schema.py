@@ -41,6 +41,47 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True # สำหรับ Pydantic v2
 
+# --- Schemas สำหรับ Bulk Import ---
+
+class UserImportRow(UserCreate):
+    roles: List[str] = [] # ชื่อ roles ที่จะกำหนดให้ เช่น ["student"]
+
+class UserImportRowResult(BaseModel):
+    row: int # ลำดับแถวในไฟล์ (เริ่มที่ 1 ไม่นับ header)
+    username: Optional[str] = None
+    status: str # "created", "skipped" (มีอยู่แล้ว) หรือ "failed"
+    error: Optional[str] = None
+    user_id: Optional[uuid.UUID] = None
+
+class UserImportReport(BaseModel):
+    total: int
+    created: int
+    skipped: int
+    failed: int
+    rows: List[UserImportRowResult]
+
+# --- Schemas สำหรับ Face Samples ---
+
+class FaceSampleResponse(BaseModel):
+    sample_id: uuid.UUID
+    user_id: uuid.UUID
+    image_url: Optional[str] = None # key ใน storage
+    image_download_url: Optional[str] = None # presigned GET URL (หมดอายุตาม STORAGE_PRESIGN_EXPIRES_SECONDS)
+    available_derivatives: List[str] = [] # รูปย่อที่สร้างแล้ว (ที่ยังไม่มีจะถูกสร้างเมื่อขอ)
+    encoding_model: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class FaceSampleUploadURL(BaseModel):
+    """ให้ client อัปโหลดรูปไปที่ storage โดยตรง แล้วเรียก complete ด้วย sample_id นี้"""
+    sample_id: uuid.UUID
+    upload_url: str
+    method: str = "PUT"
+    content_type: str
+    expires_in: int
+
 # --- Schemas สำหรับ Token / Authentication ---
 
 class Token(BaseModel):
@@ -0,0 +1,120 @@
+# backend/app/services/attendance_feed.py
+"""
+Live feed ของการเช็คชื่อต่อ session
+
+subscriber (WebSocket/SSE) ผูกกับ worker ที่รับการเชื่อมต่อ แต่ check-in อาจถูก flush ใน worker อื่น
+จึงส่ง delta ผ่าน invalidation_bus (kind "attendance_feed", LISTEN/NOTIFY) ให้ทุก worker
+แล้วแต่ละ worker กระจายให้ subscriber ของตัวเองผ่าน AttendanceFeedHub
+"""
+import asyncio
+import json
+import uuid
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+
+
+class FeedSubscription:
+    """ผู้ติดตาม feed ของ session หนึ่ง มีคิวขนาดจำกัดของตัวเอง"""
+
+    def __init__(self, topic: uuid.UUID, max_queue: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue + 1) # +1 สำหรับ sentinel ตอนถูกตัด
+        self._max_queue = max_queue
+        self.dropped = False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        รอ message ถัดไป คืน None ถ้าถูกตัดเพราะอ่านไม่ทัน
+        raise asyncio.TimeoutError ถ้าไม่มี message ภายใน timeout
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def _offer(self, message: dict) -> bool:
+        if self.dropped:
+            return False
+        if self.queue.qsize() >= self._max_queue:
+            # อ่านไม่ทัน: ทิ้ง message ที่ค้างทั้งหมดแล้วแจ้งให้ปิดการเชื่อมต่อ (client เชื่อมต่อใหม่และได้ snapshot ใหม่)
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+        self.queue.put_nowait(message)
+        return True
+
+
+class AttendanceFeedHub:
+    """
+    Pub/sub ภายใน process สำหรับ feed การเช็คชื่อแบบ real-time (topic = session_id)
+    delta จาก worker อื่นเข้ามาทาง publish_attendance_deltas/invalidation_bus
+
+    publish ไม่ block: แต่ละ subscriber มีคิวขนาดจำกัด ถ้าคิวเต็มจะถูกตัดทิ้งแทนที่จะทำให้ผู้อื่นช้าตาม
+    ทำงานใน event loop thread เท่านั้น
+    """
+
+    def __init__(self, max_queue: int):
+        self._max_queue = max_queue
+        self._topics: Dict[uuid.UUID, Set[FeedSubscription]] = {}
+        self._published = 0
+        self._delivered = 0
+        self._dropped_subscribers = 0
+
+    def subscribe(self, topic: uuid.UUID) -> FeedSubscription:
+        subscription = FeedSubscription(topic, self._max_queue)
+        self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription):
+        subscribers = self._topics.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._topics[subscription.topic]
+
+    def has_subscribers(self, topic: uuid.UUID) -> bool:
+        return topic in self._topics
+
+    def publish(self, topic: uuid.UUID, message: dict):
+        subscribers = self._topics.get(topic)
+        self._published += 1
+        if not subscribers:
+            return
+        for subscription in list(subscribers):
+            if subscription._offer(message):
+                self._delivered += 1
+            elif subscription.dropped:
+                self._dropped_subscribers += 1
+                self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(len(subscribers) for subscribers in self._topics.values()),
+            "max_queue": self._max_queue,
+            "published": self._published,
+            "delivered": self._delivered,
+            "dropped_subscribers": self._dropped_subscribers,
+        }
+
+
+attendance_feed = AttendanceFeedHub(max_queue=settings.ATTENDANCE_FEED_QUEUE_SIZE)
+
+
+def _relay(key: str):
+    # message จาก worker อื่น (หรือจาก process นี้เมื่อ local=True): ส่งให้ subscriber ใน process นี้
+    message = json.loads(key)
+    attendance_feed.publish(uuid.UUID(message["session_id"]), message)
+
+
+invalidation_bus.register("attendance_feed", _relay)
+
+
+async def publish_attendance_deltas(messages: Iterable[dict]):
+    """
+    ส่ง delta ให้ subscriber ของทุก worker เรียกหลัง commit แล้วเท่านั้น
+    message ต้องมี "session_id" (ดู attendance_pipeline.feed_message)
+    """
+    await invalidation_bus.publish_many("attendance_feed", [json.dumps(message) for message in messages])
@@ -0,0 +1,109 @@
+# backend/app/services/attendance_partitions.py
+"""
+สร้างและลบ partition รายเดือนของตาราง attendance (PARTITION BY RANGE (session_date))
+
+- สร้าง partition ล่วงหน้า ATTENDANCE_PARTITION_MONTHS_AHEAD เดือน (และเดือนก่อนหน้า สำหรับการแก้ไขย้อนหลัง)
+- ถ้ากำหนด ATTENDANCE_RETENTION_MONTHS จะ detach และ drop partition ที่เก่ากว่านั้น
+ทำงานตอน startup, เป็นระยะใน background และรันเองได้:
+    python -m app.services.attendance_partitions
+"""
+import asyncio
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.database import engine
+
+PARTITION_NAME = re.compile(r"^attendance_y(\d{4})m(\d{2})$")
+# กันหลาย worker process สร้าง/ลบ partition พร้อมกัน
+PARTITION_LOCK_KEY = "attendance_partitions"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"attendance_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """attendance เป็น partitioned table หรือไม่ (ตารางที่สร้างก่อนมี partition จะเป็นตารางธรรมดา)"""
+    if connection.dialect.name != "postgresql":
+        return False
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass('attendance')")
+    ).scalar()
+    return relkind == "p"
+
+
+def ensure_attendance_partitions(connection: Connection, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """สร้าง partition ตั้งแต่เดือนก่อนหน้าถึง months_ahead เดือนข้างหน้า คืนชื่อ partition ที่สร้างใหม่"""
+    current = _month_start(today or datetime.now(timezone.utc).date())
+    existing = set(connection.execute(text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'attendance'::regclass")).scalars())
+    created = []
+    for offset in range(-1, months_ahead + 1):
+        month = _add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF attendance "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def drop_expired_attendance_partitions(connection: Connection, retention_months: int, today: Optional[date] = None) -> List[str]:
+    """ลบ partition ที่ทั้งเดือนเก่ากว่า retention_months เดือน (0 = เก็บทั้งหมด) คืนชื่อ partition ที่ลบ"""
+    if retention_months <= 0:
+        return []
+    cutoff = _add_months(_month_start(today or datetime.now(timezone.utc).date()), -retention_months)
+    dropped = []
+    for name in connection.execute(text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'attendance'::regclass")).scalars():
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if _add_months(month, 1) <= cutoff:
+            connection.execute(text(f"ALTER TABLE attendance DETACH PARTITION {name}"))
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def maintain_attendance_partitions(bind: Engine = engine, today: Optional[date] = None) -> dict:
+    """สร้าง partition ที่ขาดและลบ partition ที่หมดอายุใน transaction เดียว"""
+    with bind.begin() as connection:
+        if not is_partitioned(connection):
+            return {"partitioned": False, "created": [], "dropped": []}
+        connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": PARTITION_LOCK_KEY})
+        created = ensure_attendance_partitions(connection, settings.ATTENDANCE_PARTITION_MONTHS_AHEAD, today)
+        dropped = drop_expired_attendance_partitions(connection, settings.ATTENDANCE_RETENTION_MONTHS, today)
+    return {"partitioned": True, "created": created, "dropped": dropped}
+
+
+async def run_partition_maintenance(interval_hours: float):
+    """ดูแล partition เป็นระยะ (background task ของ API process)"""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            result = await asyncio.to_thread(maintain_attendance_partitions)
+            if result["created"] or result["dropped"]:
+                print(f"Attendance partitions: {result}")
+        except Exception as e:
+            print(f"Attendance partition maintenance failed: {e}")
+
+
+if __name__ == "__main__":
+    print(f"Attendance partitions: {maintain_attendance_partitions()}")
@@ -0,0 +1,288 @@
+# backend/app/services/attendance_pipeline.py
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.attendance import Attendance
+from app.models.attendance_enums import AttendanceStatus
+from app.services.attendance_feed import publish_attendance_deltas
+from app.services.attendance_rollups import AttendanceChange, apply_attendance_changes
+
+# (class_id, session_id, student_id, session_date) ตรงกับ uq_attendance_class_session_student
+AttendanceKey = Tuple[uuid.UUID, uuid.UUID, uuid.UUID, date]
+
+
+class AttendanceBufferFullError(Exception):
+    """buffer ของ attendance writer เต็ม (ฐานข้อมูลเขียนไม่ทัน)"""
+
+
+@dataclass
+class AttendanceEvent:
+    class_id: uuid.UUID
+    session_id: uuid.UUID
+    student_id: uuid.UUID
+    session_date: date # วันของ session (ตามเวลาวิทยาเขต ไม่ใช่วัน UTC ของ timestamp)
+    status: str
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    is_manual_override: bool = False
+    recorded_by_user_id: Optional[uuid.UUID] = None
+
+    @property
+    def key(self) -> AttendanceKey:
+        return self.class_id, self.session_id, self.student_id, self.session_date
+
+
+@dataclass
+class AttendanceRecord:
+    """แถวใน attendance หลัง upsert (อาจเป็นแถวเดิมถ้าเช็คชื่อไปแล้ว)"""
+    attendance_id: uuid.UUID
+    class_id: uuid.UUID
+    session_id: uuid.UUID
+    student_id: uuid.UUID
+    session_date: date
+    status: str
+    timestamp: datetime
+
+
+@dataclass
+class _PendingEvent:
+    event: AttendanceEvent
+    future: asyncio.Future
+
+
+def feed_message(row, previous_status: Optional[str] = None) -> dict:
+    """message ของ live feed สำหรับแถว attendance หนึ่งแถว (สถานะล่าสุดทั้งแถว จึงนำไปใช้ซ้ำได้)"""
+    return {
+        "type": "attendance",
+        "attendance_id": str(row.attendance_id),
+        "session_id": str(row.session_id),
+        "student_id": str(row.student_id),
+        "status": row.status,
+        "previous_status": previous_status,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+    }
+
+
+def _merge(current: AttendanceEvent, new: AttendanceEvent) -> AttendanceEvent:
+    """รวม event ของ key เดียวกันใน batch เดียว ด้วยกติกาเดียวกับ ON CONFLICT ด้านล่าง"""
+    if new.is_manual_override:
+        return new
+    if current.is_manual_override or current.status == AttendanceStatus.PRESENT.value:
+        return current
+    return new
+
+
+class AttendanceWriter:
+    """
+    รับ check-in event เข้า buffer ในหน่วยความจำ แล้วเขียนลงฐานข้อมูลทีละหลายแถว
+    ด้วย INSERT ... ON CONFLICT (class_id, session_id, student_id, session_date) DO UPDATE ครั้งเดียวต่อ flush
+
+    - flush เมื่อ buffer ครบ flush_size หรือเมื่อ event แรกรอครบ flush_interval_ms
+    - submit() คืนค่าหลังจาก transaction ของ flush นั้น commit แล้วเท่านั้น
+    - buffer มีขนาดจำกัด (max_buffer) เกินแล้ว raise AttendanceBufferFullError
+    - ตารางสรุป (attendance_rollups) ถูกอัปเดตด้วย delta ใน transaction เดียวกับการ upsert
+
+    ทำงานใน event loop thread เท่านั้น (ไม่ต้องใช้ lock ของ threading)
+    """
+
+    def __init__(self, flush_size: int, flush_interval_ms: int, max_buffer: int):
+        self._flush_size = max(flush_size, 1)
+        self._interval = max(flush_interval_ms, 0) / 1000.0
+        self._max_buffer = max(max_buffer, self._flush_size)
+        self._buffer: List[_PendingEvent] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._running: Set[asyncio.Task] = set()
+        # event ที่รับแล้วแต่ยังไม่ durable (รอใน buffer + กำลังเขียน)
+        self._outstanding = 0
+        self._started_at = time.monotonic()
+        self._events = 0
+        self._rows_written = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._flush_seconds = 0.0
+        self._max_flush_seconds = 0.0
+        self._last_flush_seconds = 0.0
+
+    async def submit(self, event: AttendanceEvent) -> AttendanceRecord:
+        """ส่ง event เข้า buffer แล้วรอจนเขียนลงฐานข้อมูลเรียบร้อย"""
+        if self._outstanding >= self._max_buffer:
+            raise AttendanceBufferFullError("Attendance write buffer is full")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._buffer.append(_PendingEvent(event, future))
+        self._outstanding += 1
+        self._events += 1
+
+        if len(self._buffer) >= self._flush_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._interval, self._flush)
+        try:
+            return await future
+        finally:
+            self._outstanding -= 1
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        task = asyncio.get_running_loop().create_task(self._write_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _write_batch(self, batch: List[_PendingEvent]):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # เขียนทีละ flush เพื่อให้ event ของ key เดียวกันถูกเขียนตามลำดับที่เข้ามา
+        async with self._flush_lock:
+            merged: Dict[AttendanceKey, AttendanceEvent] = {}
+            for pending in batch:
+                key = pending.event.key
+                merged[key] = _merge(merged[key], pending.event) if key in merged else pending.event
+
+            start = time.perf_counter()
+            try:
+                records = await self._upsert(merged)
+            except Exception as e:
+                self._failed_flushes += 1
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                return
+            elapsed = time.perf_counter() - start
+
+            self._flushes += 1
+            self._rows_written += len(records)
+            self._flush_seconds += elapsed
+            self._last_flush_seconds = elapsed
+            self._max_flush_seconds = max(self._max_flush_seconds, elapsed)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_result(records[pending.event.key])
+
+    async def _upsert(self, events: Dict[AttendanceKey, AttendanceEvent]) -> Dict[AttendanceKey, AttendanceRecord]:
+        values = [
+            {
+                "attendance_id": uuid.uuid4(),
+                "class_id": class_id,
+                "session_id": session_id,
+                "student_id": student_id,
+                "session_date": session_date,
+                "status": event.status,
+                "timestamp": event.timestamp,
+                "is_manual_override": event.is_manual_override,
+                "recorded_by_user_id": event.recorded_by_user_id,
+            }
+            for (class_id, session_id, student_id, session_date), event in events.items()
+        ]
+        statement = pg_insert(Attendance).values(values)
+        excluded = statement.excluded
+        # ถ้าเช็คชื่อซ้ำในวันเดียวกัน: การแก้ไขด้วยมือชนะเสมอ, ไม่ลดสถานะ present ที่บันทึกไว้แล้ว
+        keep_existing = (~excluded.is_manual_override) & (
+            (Attendance.is_manual_override == True) | (Attendance.status == AttendanceStatus.PRESENT.value)  # noqa: E712
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[Attendance.class_id, Attendance.session_id, Attendance.student_id, Attendance.session_date],
+            set_={
+                "status": case((keep_existing, Attendance.status), else_=excluded.status),
+                "timestamp": case((keep_existing, Attendance.timestamp), else_=excluded.timestamp),
+                "is_manual_override": case((keep_existing, Attendance.is_manual_override), else_=excluded.is_manual_override),
+                "recorded_by_user_id": case((keep_existing, Attendance.recorded_by_user_id), else_=excluded.recorded_by_user_id),
+            },
+        ).returning(
+            Attendance.attendance_id, Attendance.class_id, Attendance.session_id, Attendance.student_id,
+            Attendance.session_date, Attendance.status, Attendance.timestamp,
+        )
+
+        keys = list(events)
+        async with AsyncSessionLocal() as db:
+            if db.bind.dialect.name == "postgresql":
+                # ให้ flush ที่แตะ session เดียวกันเขียนทีละ transaction (ข้าม worker process)
+                # สถานะเดิมที่อ่านด้านล่างจึงไม่เปลี่ยนก่อน upsert และ delta ของตารางสรุปถูกต้อง
+                for session_id in sorted({key[1] for key in keys}, key=str):
+                    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(session_id)))))
+            previous = {
+                (row.class_id, row.session_id, row.student_id, row.session_date): row.status
+                for row in await db.execute(
+                    select(Attendance.class_id, Attendance.session_id, Attendance.student_id, Attendance.session_date, Attendance.status)
+                    .where(tuple_(Attendance.class_id, Attendance.session_id, Attendance.student_id, Attendance.session_date).in_(keys))
+                )
+            }
+            rows = (await db.execute(statement)).all()
+            changes = [
+                AttendanceChange(
+                    class_id=row.class_id,
+                    session_id=row.session_id,
+                    student_id=row.student_id,
+                    session_date=row.session_date,
+                    old_status=previous.get((row.class_id, row.session_id, row.student_id, row.session_date)),
+                    new_status=row.status,
+                )
+                for row in rows
+            ]
+            await apply_attendance_changes(db, changes)
+            await db.commit()
+
+        # ส่ง delta ให้ผู้ติดตาม live feed ของ session (ทุก worker) หลังจาก commit แล้วเท่านั้น
+        await publish_attendance_deltas(
+            feed_message(row, change.old_status)
+            for row, change in zip(rows, changes)
+            if change.old_status != change.new_status
+        )
+        return {
+            (row.class_id, row.session_id, row.student_id, row.session_date): AttendanceRecord(
+                attendance_id=row.attendance_id,
+                class_id=row.class_id,
+                session_id=row.session_id,
+                student_id=row.student_id,
+                session_date=row.session_date,
+                status=row.status,
+                timestamp=row.timestamp,
+            )
+            for row in rows
+        }
+
+    async def drain(self):
+        """flush event ที่ค้างอยู่ทั้งหมดแล้วรอให้เขียนเสร็จ (ใช้ตอน shutdown)"""
+        self._flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> dict:
+        uptime = time.monotonic() - self._started_at
+        return {
+            "flush_size": self._flush_size,
+            "flush_interval_ms": self._interval * 1000.0,
+            "max_buffer": self._max_buffer,
+            "buffered": len(self._buffer),
+            "outstanding": self._outstanding,
+            "events": self._events,
+            "rows_written": self._rows_written,
+            "flushes": self._flushes,
+            "failed_flushes": self._failed_flushes,
+            "avg_rows_per_flush": (self._rows_written / self._flushes) if self._flushes else 0.0,
+            "avg_flush_ms": (self._flush_seconds / self._flushes * 1000.0) if self._flushes else 0.0,
+            "max_flush_ms": self._max_flush_seconds * 1000.0,
+            "last_flush_ms": self._last_flush_seconds * 1000.0,
+            "rows_per_second": (self._rows_written / uptime) if uptime > 0 else 0.0,
+        }
+
+
+attendance_writer = AttendanceWriter(
+    flush_size=settings.ATTENDANCE_FLUSH_SIZE,
+    flush_interval_ms=settings.ATTENDANCE_FLUSH_INTERVAL_MS,
+    max_buffer=settings.ATTENDANCE_BUFFER_MAX,
+)
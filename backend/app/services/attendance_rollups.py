@@ -0,0 +1,146 @@
+# backend/app/services/attendance_rollups.py
+"""
+ตารางสรุปการเข้าเรียน (attendance_session_stats, attendance_student_stats, attendance_daily_stats)
+
+ทุกครั้งที่ attendance writer upsert แถว จะส่งการเปลี่ยนแปลงของสถานะ (เดิม -> ใหม่) มาที่ apply_attendance_changes
+ภายใน transaction เดียวกัน ตารางสรุปจึงตรงกับข้อมูลดิบเสมอ และ endpoint อ่านได้ด้วย primary key lookup
+
+ถ้าต้องการคำนวณใหม่ทั้งหมดจากข้อมูลดิบ (เช่น หลังแก้ข้อมูลด้วยมือใน DB):
+    python -m app.services.attendance_rollups --rebuild
+"""
+import argparse
+import asyncio
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.attendance import Attendance
+from app.models.attendance_rollup import (
+    STATUS_COUNT_COLUMNS, AttendanceDailyStats, AttendanceSessionStats, AttendanceStudentStats,
+)
+
+
+@dataclass
+class AttendanceChange:
+    class_id: uuid.UUID
+    session_id: uuid.UUID
+    student_id: uuid.UUID
+    session_date: date
+    old_status: Optional[str] # None = แถวใหม่
+    new_status: str
+
+
+def _deltas(changes: Iterable[AttendanceChange], key) -> Dict[Hashable, Counter]:
+    deltas: Dict[Hashable, Counter] = defaultdict(Counter)
+    for change in changes:
+        if change.old_status == change.new_status:
+            continue
+        counter = deltas[key(change)]
+        if change.old_status is None:
+            counter["total"] += 1
+        elif change.old_status in STATUS_COUNT_COLUMNS:
+            counter[change.old_status] -= 1
+        if change.new_status in STATUS_COUNT_COLUMNS:
+            counter[change.new_status] += 1
+    return {k: counter for k, counter in deltas.items() if any(counter.values())}
+
+
+async def _upsert_deltas(db: AsyncSession, model, key_columns: List[str], rows: List[dict]):
+    if not rows:
+        return
+    for row in rows:
+        for column in STATUS_COUNT_COLUMNS + ["total"]:
+            row.setdefault(column, 0)
+    statement = pg_insert(model).values(rows)
+    table = model.__table__
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c[column] for column in key_columns],
+            set_={
+                column: table.c[column] + statement.excluded[column]
+                for column in STATUS_COUNT_COLUMNS + ["total"]
+            },
+        )
+    )
+
+
+async def apply_attendance_changes(db: AsyncSession, changes: List[AttendanceChange]):
+    """
+    อัปเดตตารางสรุปทั้งสามด้วย delta ของการเปลี่ยนสถานะ (ไม่ commit, ใช้ transaction ของผู้เรียก)
+    ผู้เรียกต้องกันไม่ให้ session เดียวกันถูกเขียนพร้อมกัน เพื่อให้สถานะเดิมที่อ่านมาถูกต้อง
+    """
+    sessions = {change.session_id: change for change in changes}
+    await _upsert_deltas(db, AttendanceSessionStats, ["session_id"], [
+        {"session_id": session_id, "class_id": sessions[session_id].class_id,
+         "session_date": sessions[session_id].session_date, **counter}
+        for session_id, counter in _deltas(changes, lambda c: c.session_id).items()
+    ])
+    await _upsert_deltas(db, AttendanceStudentStats, ["class_id", "student_id"], [
+        {"class_id": class_id, "student_id": student_id, **counter}
+        for (class_id, student_id), counter in _deltas(changes, lambda c: (c.class_id, c.student_id)).items()
+    ])
+    await _upsert_deltas(db, AttendanceDailyStats, ["stat_date"], [
+        {"stat_date": stat_date, **counter}
+        for stat_date, counter in _deltas(changes, lambda c: c.session_date).items()
+    ])
+
+
+def _count_columns():
+    return [
+        *(func.coalesce(func.sum(case((Attendance.status == status, 1), else_=0)), 0) for status in STATUS_COUNT_COLUMNS),
+        func.count(),
+    ]
+
+
+async def rebuild_attendance_rollups(db: AsyncSession) -> dict:
+    """คำนวณตารางสรุปใหม่ทั้งหมดจากตาราง attendance (GROUP BY ครั้งเดียวต่อตาราง)"""
+    if db.bind.dialect.name == "postgresql":
+        # กัน attendance writer เขียนระหว่างคำนวณใหม่ (อ่านได้ตามปกติ)
+        await db.execute(text("LOCK TABLE attendance IN SHARE MODE"))
+    count_names = STATUS_COUNT_COLUMNS + ["total"]
+
+    for model in (AttendanceSessionStats, AttendanceStudentStats, AttendanceDailyStats):
+        await db.execute(delete(model))
+
+    await db.execute(insert(AttendanceSessionStats).from_select(
+        ["session_id", "class_id", "session_date", *count_names],
+        select(Attendance.session_id, Attendance.class_id, Attendance.session_date, *_count_columns())
+        .group_by(Attendance.session_id, Attendance.class_id, Attendance.session_date),
+    ))
+    await db.execute(insert(AttendanceStudentStats).from_select(
+        ["class_id", "student_id", *count_names],
+        select(Attendance.class_id, Attendance.student_id, *_count_columns())
+        .group_by(Attendance.class_id, Attendance.student_id),
+    ))
+    await db.execute(insert(AttendanceDailyStats).from_select(
+        ["stat_date", *count_names],
+        select(Attendance.session_date, *_count_columns()).group_by(Attendance.session_date),
+    ))
+    await db.commit()
+
+    return {
+        model.__tablename__: (await db.execute(select(func.count()).select_from(model))).scalar_one()
+        for model in (AttendanceSessionStats, AttendanceStudentStats, AttendanceDailyStats)
+    }
+
+
+async def _main(rebuild: bool):
+    if not rebuild:
+        print("Nothing to do (use --rebuild).")
+        return
+    async with AsyncSessionLocal() as db:
+        print(f"Rebuilt attendance rollups: {await rebuild_attendance_rollups(db)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain attendance rollup tables.")
+    parser.add_argument("--rebuild", action="store_true", help="คำนวณตารางสรุปใหม่ทั้งหมดจาก attendance")
+    args = parser.parse_args()
+    asyncio.run(_main(args.rebuild))
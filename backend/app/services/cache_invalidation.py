@@ -0,0 +1,92 @@
+# backend/app/services/cache_invalidation.py
+"""
+ชนิดของ cache ที่ล้างข้าม worker ผ่าน invalidation_bus และ helper สำหรับฝั่งที่เขียนข้อมูล
+
+- "user"   (key = user_id):  active_user_cache และ roster snapshot ที่มีผู้ใช้คนนี้
+- "roster" (key = class_id): roster snapshot และ face sub-index ของ class
+- "sessions" (key = class_id): session ของคลาสที่ class_session_service จำไว้ (หลังอาจารย์เพิ่ม session)
+- "face"   (key = user_id):  encodings ของผู้ใช้ใน face index (โหลดใหม่จากฐานข้อมูล)
+  ไม่ลงทะเบียนใน worker แบบ WORKER_PROFILE=api ซึ่งไม่มี face index
+"""
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.user_cache import active_user_cache
+from app.database import AsyncSessionLocal, SessionLocal
+from app.services.class_session_service import class_sessions
+from app.services.face_recognition_service import class_face_indexes, load_face_index, reload_user_faces
+from app.services.roster_service import class_rosters
+
+
+def _invalidate_user(key: str):
+    user_id = uuid.UUID(key)
+    active_user_cache.invalidate(user_id)
+    class_rosters.invalidate_student(user_id)
+
+
+def _reset_users():
+    active_user_cache.clear()
+    class_rosters.invalidate_all()
+
+
+def _invalidate_roster(key: str):
+    class_id = uuid.UUID(key)
+    class_rosters.invalidate_class(class_id)
+    class_face_indexes.invalidate_class(class_id)
+
+
+def _reset_rosters():
+    class_rosters.invalidate_all()
+    class_face_indexes.invalidate_all()
+
+
+def _invalidate_sessions(key: str):
+    class_sessions.invalidate_class(uuid.UUID(key))
+
+
+def _reset_sessions():
+    class_sessions.invalidate_all()
+
+
+async def _reload_faces(key: str):
+    async with AsyncSessionLocal() as db:
+        await reload_user_faces(db, uuid.UUID(key))
+
+
+def _load_all_faces() -> int:
+    with SessionLocal() as db:
+        return load_face_index(db)
+
+
+async def _reset_faces():
+    # โหลด index ทั้งก้อนใน thread แยก เพื่อไม่ให้ block event loop
+    await asyncio.to_thread(_load_all_faces)
+
+
+invalidation_bus.register("user", _invalidate_user, reset=_reset_users)
+invalidation_bus.register("roster", _invalidate_roster, reset=_reset_rosters)
+invalidation_bus.register("sessions", _invalidate_sessions, reset=_reset_sessions)
+if settings.face_processing_enabled:
+    invalidation_bus.register("face", _reload_faces, reset=_reset_faces)
+
+
+async def invalidate_user(user_id: uuid.UUID):
+    """เรียกหลัง commit การแก้ไข/ลบผู้ใช้"""
+    await invalidation_bus.publish("user", user_id)
+
+
+async def invalidate_class_roster(class_id: uuid.UUID):
+    """เรียกหลัง commit การลงทะเบียน/ถอนนักเรียน"""
+    await invalidation_bus.publish("roster", class_id)
+
+
+async def invalidate_class_sessions(class_id: uuid.UUID):
+    """เรียกหลัง commit การเพิ่ม session ของคลาส"""
+    await invalidation_bus.publish("sessions", class_id)
+
+
+async def invalidate_user_faces(user_id: uuid.UUID, local: bool = True):
+    """เรียกหลัง commit การเปลี่ยน face samples หรือสถานะ active ของผู้ใช้"""
+    await invalidation_bus.publish("face", user_id, local=local)
@@ -0,0 +1,143 @@
+# backend/app/services/class_session_service.py
+"""
+session (คาบเรียน) ของคลาส: หนึ่งคลาสมีได้หลาย session ต่อวัน แต่ละ session ระบุด้วยเวลาเริ่ม (starts_at)
+session_date คือวันของ starts_at ตามเวลาของวิทยาเขต (CAMPUS_TIMEZONE) ไม่ใช่วัน UTC
+จึงเป็นวันเดียวกับที่ผู้ใช้เห็น (check-in ก่อน 07:00 ที่ไทยไม่ถูกนับเป็นวันก่อนหน้า) และเป็น partition key ของ attendance
+
+- session ที่อาจารย์กำหนดไว้ (POST /classes/{class_id}/sessions) รับ check-in ตั้งแต่
+  CLASS_SESSION_EARLY_CHECKIN_MINUTES ก่อนเวลาเริ่มจนถึง ends_at
+- check-in ที่ไม่อยู่ในช่วงของ session ใดเลยเข้า session ของทั้งวัน (เริ่มเที่ยงคืนตามเวลาวิทยาเขต สร้างอัตโนมัติ)
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.class_session import ClassSession
+
+CAMPUS_TZ = ZoneInfo(settings.CAMPUS_TIMEZONE)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # ค่าจากฐานข้อมูล (UTCDateTime) เป็น naive UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def campus_date(moment: datetime) -> date:
+    """วันตามเวลาของวิทยาเขตของเวลาที่กำหนด (naive = UTC)"""
+    return _as_utc(moment).astimezone(CAMPUS_TZ).date()
+
+
+def campus_day_start(day: date) -> datetime:
+    """เที่ยงคืนของวันตามเวลาของวิทยาเขต เป็นเวลา UTC"""
+    return datetime.combine(day, time(), tzinfo=CAMPUS_TZ).astimezone(timezone.utc)
+
+
+@dataclass(frozen=True)
+class ResolvedSession:
+    session_id: uuid.UUID
+    session_date: date
+    starts_at: datetime
+    ends_at: Optional[datetime]
+
+    def accepts(self, moment: datetime) -> bool:
+        """รับ check-in ณ เวลานี้ได้หรือไม่"""
+        early = timedelta(minutes=settings.CLASS_SESSION_EARLY_CHECKIN_MINUTES)
+        return self.starts_at - early <= moment and (self.ends_at is None or moment <= self.ends_at)
+
+
+def _resolved(session) -> ResolvedSession:
+    return ResolvedSession(
+        session_id=session.session_id,
+        session_date=session.session_date,
+        starts_at=_as_utc(session.starts_at),
+        ends_at=_as_utc(session.ends_at) if session.ends_at is not None else None,
+    )
+
+
+class ClassSessionResolver:
+    """
+    หา session ที่ check-in ณ เวลาหนึ่งควรเข้า (สร้าง session ของทั้งวันถ้ายังไม่มี)
+    จำ session ของแต่ละคลาสต่อวันไว้ใน process เพราะ check-in ทั้งคาบใช้ session เดียวกัน จึงไม่ต้อง query ทุก request
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self._max_size = max_size
+        # (class_id, วันตามเวลาวิทยาเขต) -> session ของวันนั้นเรียงตาม starts_at
+        self._sessions: Dict[Tuple[uuid.UUID, date], List[ResolvedSession]] = {}
+
+    async def _load_day(self, db: AsyncSession, class_id: uuid.UUID, day: date) -> List[ResolvedSession]:
+        day_start = campus_day_start(day)
+        rows = await db.execute(
+            select(ClassSession.session_id, ClassSession.session_date, ClassSession.starts_at, ClassSession.ends_at)
+            .where(
+                ClassSession.class_id == class_id,
+                ClassSession.starts_at >= day_start,
+                ClassSession.starts_at < campus_day_start(day + timedelta(days=1)),
+            )
+            .order_by(ClassSession.starts_at)
+        )
+        return [_resolved(row) for row in rows]
+
+    async def resolve(self, db: AsyncSession, class_id: uuid.UUID, at: Optional[datetime] = None) -> ResolvedSession:
+        at = _as_utc(at or datetime.now(timezone.utc))
+        day = campus_date(at)
+        key = (class_id, day)
+        sessions = self._sessions.get(key)
+        if sessions is None:
+            sessions = await self._load_day(db, class_id, day)
+
+        # session ที่เริ่มล่าสุดและยังรับ check-in อยู่ (session ของทั้งวันเริ่มก่อนทุก session จึงถูกเลือกท้ายสุด)
+        for session in reversed(sessions):
+            if session.accepts(at):
+                break
+        else:
+            session = await self._create_day_session(db, class_id, day)
+            sessions = sorted({*sessions, session}, key=lambda s: s.starts_at)
+
+        self._remember(key, sessions)
+        return session
+
+    async def _create_day_session(self, db: AsyncSession, class_id: uuid.UUID, day: date) -> ResolvedSession:
+        starts_at = campus_day_start(day)
+        # INSERT ... ON CONFLICT DO NOTHING กันกรณีหลาย worker สร้าง session เดียวกันพร้อมกัน
+        await db.execute(
+            pg_insert(ClassSession)
+            .values(
+                session_id=uuid.uuid4(), class_id=class_id, session_date=day, starts_at=starts_at,
+                created_at=datetime.now(timezone.utc),
+            )
+            .on_conflict_do_nothing(index_elements=[ClassSession.class_id, ClassSession.starts_at])
+        )
+        row = (
+            await db.execute(
+                select(ClassSession.session_id, ClassSession.session_date, ClassSession.starts_at, ClassSession.ends_at)
+                .where(ClassSession.class_id == class_id, ClassSession.starts_at == starts_at)
+            )
+        ).one()
+        await db.commit()
+        return _resolved(row)
+
+    def _remember(self, key: Tuple[uuid.UUID, date], sessions: List[ResolvedSession]):
+        if key not in self._sessions and len(self._sessions) >= self._max_size:
+            # session ของวันก่อนๆ ไม่ถูกใช้แล้ว
+            today = campus_date(datetime.now(timezone.utc))
+            self._sessions = {k: v for k, v in self._sessions.items() if k[1] >= today}
+            if len(self._sessions) >= self._max_size:
+                self._sessions.clear()
+        self._sessions[key] = sessions
+
+    def invalidate_class(self, class_id: uuid.UUID):
+        self._sessions = {k: v for k, v in self._sessions.items() if k[0] != class_id}
+
+    def invalidate_all(self):
+        self._sessions.clear()
+
+
+class_sessions = ClassSessionResolver()
@@ -1,11 +1,18 @@
 # backend/app/services/db_service.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, true, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from app.models.user import User
 from app.models.role import Role
 from app.models.permission import Permission
+from app.models.association import role_permissions
+from app.schemas.user_schema import TokenData
 import uuid # เพิ่ม import นี้
 
+# --- Sync helpers (ใช้กับ get_db / SessionLocal) ---
+
 def get_user_by_username(db: Session, username: str):
     """ดึงข้อมูลผู้ใช้จาก username"""
     return db.query(User).filter(User.username == username).first()
@@ -18,67 +25,85 @@ def get_user_by_id(db: Session, user_id: uuid.UUID):
     """ดึงข้อมูลผู้ใช้จาก user_id"""
     return db.query(User).filter(User.user_id == user_id).first()
 
-def initialize_roles_permissions(db: Session):
-    """
-    สร้าง Roles และ Permissions เริ่มต้นถ้ายังไม่มีในฐานข้อมูล
-    """
-    print("Initializing roles and permissions...")
-    # ตรวจสอบและสร้าง Role 'admin'
-    admin_role = db.query(Role).filter(Role.name == "admin").first()
-    if not admin_role:
-        admin_role = Role(name="admin", description="Administrator role with full access")
-        db.add(admin_role)
-
-    # ตรวจสอบและสร้าง Role 'teacher'
-    teacher_role = db.query(Role).filter(Role.name == "teacher").first()
-    if not teacher_role:
-        teacher_role = Role(name="teacher", description="Teacher role with class management permissions")
-        db.add(teacher_role)
+# --- Async helpers (ใช้กับ get_async_db / AsyncSessionLocal) ---
+# AsyncSession ไม่รองรับ lazy loading จึงโหลด roles มาพร้อมกันใน query เดียว (joinedload)
 
-    # ตรวจสอบและสร้าง Role 'student'
-    student_role = db.query(Role).filter(Role.name == "student").first()
-    if not student_role:
-        student_role = Role(name="student", description="Student role with attendance viewing permissions")
-        db.add(student_role)
+async def _first_user(db: AsyncSession, query):
+    result = await db.execute(query)
+    return result.unique().scalars().first()
 
-    # ตัวอย่าง permissions
-    view_users_perm = db.query(Permission).filter(Permission.name == "view_users").first()
-    if not view_users_perm:
-        view_users_perm = Permission(name="view_users", description="Can view all user details")
-        db.add(view_users_perm)
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    """ดึงข้อมูลผู้ใช้จาก username (พร้อม roles)"""
+    return await _first_user(db, select(User).options(joinedload(User.roles)).where(User.username == username))
 
-    manage_classes_perm = db.query(Permission).filter(Permission.name == "manage_classes").first()
-    if not manage_classes_perm:
-        manage_classes_perm = Permission(name="manage_classes", description="Can create, update, delete classes")
-        db.add(manage_classes_perm)
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    """ดึงข้อมูลผู้ใช้จาก email (พร้อม roles)"""
+    return await _first_user(db, select(User).options(joinedload(User.roles)).where(User.email == email))
 
-    try:
-        db.commit() # Commit changes to save new roles/permissions
-        # db.refresh(admin_role) # refresh objects after commit to ensure relationships are loaded
-        # db.refresh(teacher_role)
-        # db.refresh(student_role)
-        # db.refresh(view_users_perm)
-        # db.refresh(manage_classes_perm)
-        print("Roles and Permissions added/checked.")
-    except Exception as e:
-        db.rollback()
-        print(f"Error during initial role/permission creation commit: {e}")
+async def get_user_by_id_async(db: AsyncSession, user_id: uuid.UUID, with_roles: bool = True):
+    """ดึงข้อมูลผู้ใช้จาก user_id (with_roles=False ถ้าไม่ต้องการ roles จะไม่ join ตาราง roles)"""
+    query = select(User).where(User.user_id == user_id)
+    if with_roles:
+        query = query.options(joinedload(User.roles))
+    return await _first_user(db, query)
 
-    # กำหนดความสัมพันธ์ระหว่าง Role และ Permission (ถ้ายังไม่มี)
-    if admin_role and view_users_perm and manage_classes_perm:
-        # โหลด relationship collections ก่อนใช้งานเพื่อหลีกเลี่ยง DetachedInstanceError
-        if view_users_perm not in admin_role.permissions:
-            admin_role.permissions.append(view_users_perm)
-        if manage_classes_perm not in admin_role.permissions:
-            admin_role.permissions.append(manage_classes_perm)
+async def get_user_for_token(db: AsyncSession, token_data: TokenData):
+    """
+    โหลดผู้ใช้ของ access token ด้วย query เดียว
+    ถ้า token มี roles อยู่แล้วจะใช้ชื่อ roles จาก token และไม่ query roles เลย
+    """
+    user = await get_user_by_id_async(db, user_id=token_data.user_id, with_roles=not token_data.roles)
+    if user is not None and token_data.roles:
+        user.role_names = token_data.roles
+    return user
 
-    if teacher_role and manage_classes_perm:
-        if manage_classes_perm not in teacher_role.permissions:
-            teacher_role.permissions.append(manage_classes_perm)
+# Roles/Permissions เริ่มต้น (เพิ่มรายการที่นี่ แล้วจะถูกสร้างตอน startup ครั้งถัดไป)
+DEFAULT_ROLES = {
+    "admin": "Administrator role with full access",
+    "teacher": "Teacher role with class management permissions",
+    "student": "Student role with attendance viewing permissions",
+}
+DEFAULT_PERMISSIONS = {
+    "view_users": "Can view all user details",
+    "manage_classes": "Can create, update, delete classes",
+}
+DEFAULT_ROLE_PERMISSIONS = [
+    ("admin", "view_users"),
+    ("admin", "manage_classes"),
+    ("teacher", "manage_classes"),
+]
+SEED_LOCK_KEY = "seed_roles_permissions"
 
-    try:
-        db.commit()
-        print("Role-Permission relationships assigned.")
-    except Exception as e:
-        db.rollback()
-        print(f"Error during role-permission assignment commit: {e}")
\ No newline at end of file
+def initialize_roles_permissions(db: Session) -> dict:
+    """
+    สร้าง Roles, Permissions และความสัมพันธ์เริ่มต้นที่ยังไม่มี ด้วย INSERT ... ON CONFLICT DO NOTHING
+    ตารางละหนึ่ง statement ใน transaction เดียว (ภายใต้ advisory lock เพราะทุก worker process เรียกตอน startup)
+    คืนจำนวนแถวที่สร้างใหม่ (ครั้งถัดไปเป็น 0 ทั้งหมด)
+    """
+    if db.bind.dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(SEED_LOCK_KEY))))
+    created_roles = db.execute(
+        pg_insert(Role)
+        .values([{"name": name, "description": description} for name, description in DEFAULT_ROLES.items()])
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Role.id)
+    ).all()
+    created_permissions = db.execute(
+        pg_insert(Permission)
+        .values([{"name": name, "description": description} for name, description in DEFAULT_PERMISSIONS.items()])
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(Permission.id)
+    ).all()
+    created_links = db.execute(
+        pg_insert(role_permissions)
+        .from_select(
+            ["role_id", "permission_id"],
+            select(Role.id, Permission.id)
+            .join(Permission, true())
+            .where(tuple_(Role.name, Permission.name).in_(DEFAULT_ROLE_PERMISSIONS)),
+        )
+        .on_conflict_do_nothing()
+        .returning(role_permissions.c.role_id)
+    ).all()
+    db.commit()
+    return {"roles": len(created_roles), "permissions": len(created_permissions), "role_permissions": len(created_links)}
@@ -0,0 +1,129 @@
+# backend/app/services/face_backfill.py
+"""
+Backfill face encodings ของ UserFaceSample ที่ยังไม่มี encoding (หรือเป็นโมเดลรุ่นเก่า)
+โดยกระจายงาน detect/encode ไปหลาย process
+
+วิธีใช้ (รันจากโฟลเดอร์ backend):
+    python -m app.services.face_backfill --workers 4 --batch-size 200
+"""
+import argparse
+import asyncio
+import os
+import urllib.request
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.user_face_sample import UserFaceSample
+from app.services.face_recognition_service import FACE_ENCODING_MODEL, encode_face_image, encoding_to_bytes
+from app.services.storage_service import storage
+
+
+def _read_image(image_url: str) -> bytes:
+    """อ่านไฟล์รูปจาก URL (http/https), path ในเครื่อง (ข้อมูลเก่า) หรือ key ใน storage"""
+    if image_url.startswith(("http://", "https://")):
+        with urllib.request.urlopen(image_url, timeout=30) as response:
+            return response.read()
+    if os.path.isabs(image_url) and os.path.isfile(image_url):
+        with open(image_url, "rb") as image_file:
+            return image_file.read()
+    return storage.read_sync(image_url)
+
+
+def _encode_sample(job: Tuple[uuid.UUID, str]) -> Tuple[uuid.UUID, Optional[bytes], Optional[str]]:
+    """ทำงานใน worker process: คืน (sample_id, encoding bytes, error)"""
+    sample_id, image_url = job
+    try:
+        encoding = encode_face_image(_read_image(image_url))
+    except Exception as e:
+        return sample_id, None, str(e)
+    if encoding is None:
+        return sample_id, None, "no face detected"
+    return sample_id, encoding_to_bytes(encoding), None
+
+
+def _pending_samples(db: Session, limit: int, after: Optional[uuid.UUID]) -> List[Tuple[uuid.UUID, uuid.UUID, str]]:
+    """คืน (sample_id, user_id, image_url) ของ sample ที่ยังต้อง encode เรียงตาม sample_id"""
+    query = (
+        select(UserFaceSample.sample_id, UserFaceSample.user_id, UserFaceSample.image_url)
+        .where(
+            UserFaceSample.image_url.isnot(None),
+            or_(
+                UserFaceSample.face_encoding.is_(None),
+                UserFaceSample.encoding_model.is_distinct_from(FACE_ENCODING_MODEL),
+            ),
+        )
+        .order_by(UserFaceSample.sample_id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(UserFaceSample.sample_id > after)
+    return [(row.sample_id, row.user_id, row.image_url) for row in db.execute(query)]
+
+
+def backfill_face_encodings(
+    workers: Optional[int] = None, batch_size: int = 200,
+    on_batch: Optional[Callable[[dict, Set[uuid.UUID]], None]] = None,
+) -> dict:
+    """
+    Encode ทุก sample ที่ค้างอยู่ คืนสรุปจำนวนที่สำเร็จ/ล้มเหลว
+    on_batch(summary, user_ids) ถูกเรียกหลัง commit แต่ละรอบ พร้อม user_id ที่ได้ encoding ใหม่ในรอบนั้น
+    (ใช้รายงาน progress ของ background job และแจ้ง worker อื่นให้โหลด face index ของผู้ใช้เหล่านั้นใหม่)
+    """
+    summary = {"encoded": 0, "failed": 0}
+    last_sample_id = None
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool, SessionLocal() as db:
+        while True:
+            batch = _pending_samples(db, batch_size, last_sample_id)
+            if not batch:
+                break
+            last_sample_id = batch[-1][0]
+            owners: Dict[uuid.UUID, uuid.UUID] = {sample_id: user_id for sample_id, user_id, _ in batch}
+            encoded_users: Set[uuid.UUID] = set()
+
+            encoded_at = datetime.now(timezone.utc)
+            jobs = [(sample_id, image_url) for sample_id, _, image_url in batch]
+            for sample_id, encoding, error in pool.map(_encode_sample, jobs, chunksize=4):
+                if encoding is None:
+                    summary["failed"] += 1
+                    print(f"Sample {sample_id}: {error}")
+                    continue
+                db.execute(
+                    update(UserFaceSample)
+                    .where(UserFaceSample.sample_id == sample_id)
+                    .values(face_encoding=encoding, encoding_model=FACE_ENCODING_MODEL, encoded_at=encoded_at)
+                )
+                summary["encoded"] += 1
+                encoded_users.add(owners[sample_id])
+            db.commit()
+            if on_batch is not None:
+                on_batch(dict(summary), encoded_users)
+            print(f"Backfill progress: {summary['encoded']} encoded, {summary['failed']} failed")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode stored face samples that have no face encoding yet.")
+    parser.add_argument("--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น = จำนวน CPU)")
+    parser.add_argument("--batch-size", type=int, default=200, help="จำนวน sample ต่อรอบการ commit")
+    args = parser.parse_args()
+    updated_users: Set[uuid.UUID] = set()
+    result = backfill_face_encodings(
+        workers=args.workers, batch_size=args.batch_size,
+        on_batch=lambda summary, user_ids: updated_users.update(user_ids),
+    )
+    print(f"Backfill finished: {result}")
+    if updated_users:
+        # แจ้ง API worker ที่รันอยู่ให้โหลด encodings ใหม่ของผู้ใช้เหล่านี้ (process นี้ไม่มี face index)
+        from app.services.cache_invalidation import invalidate_user_faces
+
+        async def _notify():
+            for user_id in updated_users:
+                await invalidate_user_faces(user_id, local=False)
+
+        asyncio.run(_notify())
@@ -0,0 +1,129 @@
+# backend/app/services/face_batcher.py
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.face_encoder_pool import EncoderBusyError, FaceEncoderPool, face_encoder_pool
+from app.services.face_recognition_service import FaceEmbeddingIndex, FaceMatch
+
+
+@dataclass
+class ProbeResult:
+    face_found: bool
+    match: Optional[FaceMatch] = None
+
+
+@dataclass
+class _PendingProbe:
+    image_bytes: bytes
+    index: FaceEmbeddingIndex
+    tolerance: float
+    future: asyncio.Future
+
+
+class FaceCheckInBatcher:
+    """
+    รวม check-in ที่เข้ามาในช่วงเวลาสั้นๆ (window_ms) เป็น batch เดียว
+    แล้ว encode ทั้ง batch ใน process pool และคำนวณ distance แบบ matrix-vs-matrix ครั้งเดียวต่อ class
+    แต่ละ request ยังคงได้ผลลัพธ์ของตัวเองผ่าน future
+
+    ทำงานใน event loop thread เท่านั้น (ไม่ต้องใช้ lock)
+    """
+
+    def __init__(self, pool: FaceEncoderPool, window_ms: int, max_batch_size: int):
+        self._pool = pool
+        self._window = max(window_ms, 0) / 1000.0
+        self._max_batch_size = max(max_batch_size, 1)
+        self._queue: List[_PendingProbe] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        # probe ที่รับเข้ามาแล้วแต่ยังไม่ได้ผล (รอใน window + กำลัง encode)
+        self._outstanding = 0
+        self._batches = 0
+        self._probes = 0
+
+    async def verify(self, image_bytes: bytes, index: FaceEmbeddingIndex, tolerance: float) -> ProbeResult:
+        """Encode รูปแล้วหา user ที่ใกล้ที่สุดใน index (raise EncoderBusyError ถ้างานค้างเต็ม)"""
+        # นับงานจริงของ pool (รวม encode/derivatives จากที่อื่น) บวก probe ที่ยังรออยู่ใน window
+        if self._pool.pending + len(self._queue) >= self._pool.max_pending:
+            raise EncoderBusyError("Face encoder queue is full")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append(_PendingProbe(image_bytes, index, tolerance, future))
+        self._outstanding += 1
+
+        if len(self._queue) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window, self._flush)
+        try:
+            return await future
+        finally:
+            self._outstanding -= 1
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._queue:
+            return
+        batch, self._queue = self._queue, []
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[_PendingProbe]):
+        self._batches += 1
+        self._probes += len(batch)
+        try:
+            encodings = await self._pool.encode_batch([probe.image_bytes for probe in batch])
+            self._resolve(batch, encodings)
+        except Exception as e:
+            # probe ที่ยังไม่ได้ผล (encode ล้มเหลว หรือ match ผิดพลาดกลางทาง) ต้องไม่ค้างรอตลอดไป
+            for probe in batch:
+                if not probe.future.done():
+                    probe.future.set_exception(e)
+
+    @staticmethod
+    def _resolve(batch: List[_PendingProbe], encodings: list):
+        # จัดกลุ่ม probe ที่ใช้ index (class) เดียวกัน แล้ว match ทั้งกลุ่มด้วย matrix เดียว
+        groups: Dict[tuple, List[int]] = {}
+        for position, (probe, encoding) in enumerate(zip(batch, encodings)):
+            if encoding is None or isinstance(encoding, Exception):
+                if not probe.future.done():
+                    if encoding is None:
+                        probe.future.set_result(ProbeResult(face_found=False))
+                    else:
+                        probe.future.set_exception(encoding)
+                continue
+            groups.setdefault((id(probe.index), probe.tolerance), []).append(position)
+
+        for positions in groups.values():
+            first = batch[positions[0]]
+            matches = first.index.match_batch(np.vstack([encodings[p] for p in positions]), tolerance=first.tolerance)
+            for position, match in zip(positions, matches):
+                probe = batch[position]
+                if not probe.future.done():
+                    probe.future.set_result(ProbeResult(face_found=True, match=match))
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self._window * 1000.0,
+            "max_batch_size": self._max_batch_size,
+            "queued": len(self._queue),
+            "outstanding": self._outstanding,
+            "batches": self._batches,
+            "probes": self._probes,
+            "avg_batch_size": (self._probes / self._batches) if self._batches else 0.0,
+        }
+
+
+face_checkin_batcher = FaceCheckInBatcher(
+    pool=face_encoder_pool,
+    window_ms=settings.FACE_BATCH_WINDOW_MS,
+    max_batch_size=settings.FACE_BATCH_MAX_SIZE,
+)
@@ -0,0 +1,205 @@
+# backend/app/services/face_derivatives.py
+"""
+รูปย่อ (thumbnail) และรูปใบหน้าที่ปรับแนวแล้วของ UserFaceSample
+
+- สร้างทันทีแบบ background หลังลงทะเบียนใบหน้า (ใน face encoder process pool) แล้วเก็บลง storage
+  และบันทึก key/etag ไว้ในคอลัมน์ derivatives ของแถว
+- ถ้า derivative ที่ขอยังไม่มี (สร้างไม่ทัน, pool เต็ม, ไฟล์หาย หรือเพิ่ม spec ใหม่) จะถูกสร้างตอนที่ขอ
+- เนื้อหาไม่เปลี่ยนหลังสร้าง etag จึงเป็น hash ของ bytes (strong ETag) และ cache ได้นาน
+"""
+import asyncio
+import hashlib
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.user_face_sample import UserFaceSample
+from app.services.face_encoder_pool import EncoderBusyError, face_encoder_pool
+from app.services.image_pipeline import ImageTooLargeError, InvalidImageError
+from app.services.storage_service import ObjectNotFoundError, face_sample_derivative_key, storage
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    name: str
+    kind: str # "thumbnail" (crop ตรงกลางเป็นสี่เหลี่ยมจัตุรัส) หรือ "face" (ใบหน้าที่ปรับแนวแล้ว)
+    size: int
+    format: str # รูปแบบของ Pillow
+    quality: int
+    content_type: str
+
+    def as_job(self) -> Tuple[str, str, int, str, int]:
+        return self.name, self.kind, self.size, self.format, self.quality
+
+
+DERIVATIVES: Dict[str, DerivativeSpec] = {
+    spec.name: spec
+    for spec in (
+        DerivativeSpec("thumb-160.webp", "thumbnail", 160, "WEBP", 80, "image/webp"),
+        DerivativeSpec("thumb-160.jpg", "thumbnail", 160, "JPEG", 85, "image/jpeg"),
+        DerivativeSpec("thumb-480.webp", "thumbnail", 480, "WEBP", 82, "image/webp"),
+        DerivativeSpec("thumb-480.jpg", "thumbnail", 480, "JPEG", 85, "image/jpeg"),
+        DerivativeSpec("face-224.jpg", "face", 224, "JPEG", 90, "image/jpeg"),
+    )
+}
+
+
+class DerivativeNotAvailableError(Exception):
+    """สร้าง derivative ไม่ได้ (ไม่มีรูปต้นฉบับ, รูปต้นฉบับเปิดไม่ได้ หรือไม่พบใบหน้าในรูป)"""
+
+
+class FaceDerivativePipeline:
+    """
+    สร้างและเก็บ derivatives ของ UserFaceSample
+    การสร้างของ sample เดียวกันที่ถูกขอพร้อมกันหลาย request จะรอผลของงานเดียวกัน
+    ทำงานใน event loop thread เท่านั้น
+    """
+
+    def __init__(self, specs: Dict[str, DerivativeSpec]):
+        self._specs = specs
+        self._inflight: Dict[uuid.UUID, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._generated = 0
+        self._lazy = 0
+        self._skipped_busy = 0
+        self._failures = 0
+
+    def schedule(self, sample: UserFaceSample):
+        """สร้าง derivatives ทั้งหมดแบบ background (ไม่ต้องรอ) หลังลงทะเบียนใบหน้า"""
+        task = asyncio.get_running_loop().create_task(
+            self._generate_background(sample.sample_id, sample.user_id, sample.image_url)
+        )
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _generate_background(self, sample_id: uuid.UUID, user_id: uuid.UUID, image_key: Optional[str]):
+        try:
+            await self._generate_shared(sample_id, user_id, image_key, self._specs)
+        except EncoderBusyError:
+            # pool กำลังยุ่งกับการ check-in: ปล่อยให้สร้างตอนที่มีคนขอ
+            self._skipped_busy += 1
+        except Exception as e:
+            self._failures += 1
+            print(f"Generating face sample derivatives failed ({sample_id}): {e}")
+
+    async def ensure(self, sample: UserFaceSample, name: str, force: bool = False) -> dict:
+        """คืน record ของ derivative (key, etag, size, content_type) สร้างก่อนถ้ายังไม่มี"""
+        records = sample.derivatives or {}
+        if not force and name in records:
+            if records[name] is None:
+                raise self._not_available(name)
+            return records[name]
+
+        self._lazy += 1
+        records = await self._generate_shared(sample.sample_id, sample.user_id, sample.image_url, {name: self._specs[name]})
+        if records.get(name) is None:
+            raise self._not_available(name)
+        return records[name]
+
+    def _not_available(self, name: str) -> DerivativeNotAvailableError:
+        # record เป็น None เมื่อไม่พบใบหน้า (face) หรือรูปต้นฉบับเปิด/ย่อไม่ได้
+        if self._specs[name].kind == "face":
+            return DerivativeNotAvailableError("No face detected in this sample or the original image cannot be processed")
+        return DerivativeNotAvailableError("The original image cannot be processed")
+
+    async def read(self, sample: UserFaceSample, name: str) -> Tuple[dict, bytes]:
+        """คืน (record, bytes) ของ derivative ถ้าไฟล์ใน storage หายจะสร้างใหม่"""
+        record = await self.ensure(sample, name)
+        try:
+            return record, await storage.read(record["key"])
+        except ObjectNotFoundError:
+            record = await self.ensure(sample, name, force=True)
+            return record, await storage.read(record["key"])
+
+    async def _generate_shared(
+        self, sample_id: uuid.UUID, user_id: uuid.UUID, image_key: Optional[str], specs: Dict[str, DerivativeSpec]
+    ) -> Dict[str, Optional[dict]]:
+        inflight = self._inflight.get(sample_id)
+        if inflight is not None:
+            records = await asyncio.shield(inflight)
+            if all(name in records for name in specs):
+                return records
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[sample_id] = future
+        try:
+            records = await self._generate(sample_id, user_id, image_key, specs.values())
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() # กัน warning "exception was never retrieved" เมื่อไม่มีใครรอ
+            raise
+        else:
+            future.set_result(records)
+            return records
+        finally:
+            if self._inflight.get(sample_id) is future:
+                del self._inflight[sample_id]
+
+    async def _generate(
+        self, sample_id: uuid.UUID, user_id: uuid.UUID, image_key: Optional[str], specs: Iterable[DerivativeSpec]
+    ) -> Dict[str, Optional[dict]]:
+        if image_key is None:
+            raise DerivativeNotAvailableError("Face sample has no stored image")
+        try:
+            image_bytes = await storage.read(image_key)
+        except ObjectNotFoundError:
+            raise DerivativeNotAvailableError("Original image is missing from storage")
+
+        specs = list(specs)
+        try:
+            rendered = await face_encoder_pool.render(image_bytes, [spec.as_job() for spec in specs])
+        except (InvalidImageError, ImageTooLargeError) as e:
+            # ต้นฉบับเปิดไม่ได้ทุกครั้งที่ลอง: บันทึกเป็น None เหมือนกรณีไม่พบใบหน้า จะได้ไม่ส่งเข้า pool ซ้ำทุก request
+            await self._record(sample_id, {spec.name: None for spec in specs})
+            raise DerivativeNotAvailableError(f"The original image cannot be processed: {e}")
+        records: Dict[str, Optional[dict]] = {}
+        for spec in specs:
+            data = rendered.get(spec.name)
+            if data is None:
+                records[spec.name] = None
+                continue
+            key = face_sample_derivative_key(user_id, sample_id, spec.name)
+            await storage.save(key, data, spec.content_type)
+            records[spec.name] = {
+                "key": key,
+                "etag": hashlib.sha256(data).hexdigest(),
+                "size": len(data),
+                "content_type": spec.content_type,
+            }
+        await self._record(sample_id, records)
+        self._generated += len(records)
+        return records
+
+    @staticmethod
+    async def _record(sample_id: uuid.UUID, records: Dict[str, Optional[dict]]):
+        # รวมกับ record เดิมภายใต้ row lock เพื่อไม่ให้งานที่สร้างพร้อมกันเขียนทับกัน
+        async with AsyncSessionLocal() as db:
+            sample = (
+                await db.execute(select(UserFaceSample).where(UserFaceSample.sample_id == sample_id).with_for_update())
+            ).scalar_one_or_none()
+            if sample is None:
+                return # ถูกลบไประหว่างสร้าง
+            sample.derivatives = {**(sample.derivatives or {}), **records}
+            await db.commit()
+
+    async def drain(self):
+        """รองานที่สร้างแบบ background ให้เสร็จ (ใช้ตอน shutdown ก่อนปิด face encoder pool)"""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "specs": sorted(self._specs),
+            "inflight": len(self._inflight),
+            "background": len(self._background),
+            "generated": self._generated,
+            "lazy_requests": self._lazy,
+            "skipped_busy": self._skipped_busy,
+            "failures": self._failures,
+        }
+
+
+face_derivatives = FaceDerivativePipeline(DERIVATIVES)
@@ -0,0 +1,219 @@
+# backend/app/services/face_encoder_pool.py
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# เวลาตั้งแต่ส่งงานจนได้ผล (รวมเวลารอ worker ว่างและ IPC) ต่อการเรียกหนึ่งครั้ง
+face_encoder_seconds = metrics.histogram(
+    "face_encoder_seconds", "Face encoder pool call latency including queueing.", ("operation",),
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0),
+)
+face_encoder_batch_images = metrics.histogram(
+    "face_encoder_batch_images", "Images per encode_batch call.", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+
+class EncoderBusyError(Exception):
+    """คิวงาน encode เต็ม ผู้เรียกควรตอบ 429 ให้ client ลองใหม่"""
+
+
+def _init_worker():
+    # face_recognition โหลดโมเดลของ dlib (HOG detector, landmarks, ResNet) ตอน import
+    # จึง import ครั้งเดียวตอน worker process เริ่มทำงาน ไม่ใช่ทุก request
+    import face_recognition  # noqa: F401
+
+
+def preload_face_models():
+    """
+    import face/CV libraries ใน process หลักก่อนสร้าง pool: worker ที่ fork ออกไปจะใช้หน่วยความจำของโมเดล
+    ร่วมกันแบบ copy-on-write แทนที่จะโหลดแยกกันทุก worker (เรียกเฉพาะ process ที่รัน pool)
+    ได้ประโยชน์เฉพาะ start method แบบ fork: spawn/forkserver เริ่ม worker จาก interpreter ใหม่ที่ต้อง import เองอยู่ดี
+    """
+    import cv2  # noqa: F401
+    import face_recognition  # noqa: F401
+
+
+class FaceProcessingUnavailableError(RuntimeError):
+    """process นี้ไม่ได้รัน face encoder pool (เช่น WORKER_PROFILE=api) ผู้เรียกควรตอบ 503"""
+
+
+def _warm_up() -> bool:
+    return True
+
+
+def _encode_in_worker(image_bytes: bytes) -> Optional[bytes]:
+    from app.services.face_recognition_service import encode_face_image, encoding_to_bytes
+
+    encoding = encode_face_image(image_bytes)
+    return encoding_to_bytes(encoding) if encoding is not None else None
+
+
+def _encode_batch_in_worker(images: List[bytes]) -> List[Union[bytes, None, Exception]]:
+    # ส่งหลายรูปในการเรียกครั้งเดียว ลด overhead ของการ pickle/IPC ต่อรูป
+    # รูปที่ผิดพลาดคืน exception เป็นรายรูป เพื่อไม่ให้รูปเดียวทำให้ทั้ง batch ล้มเหลว
+    results = []
+    for image_bytes in images:
+        try:
+            results.append(_encode_in_worker(image_bytes))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _render_in_worker(image_bytes: bytes, specs: List[Tuple[str, str, int, str, int]]) -> Dict[str, Optional[bytes]]:
+    """
+    สร้างรูปย่อ/รูปใบหน้าตาม specs ของ (name, kind, size, format, quality)
+    คืน name -> bytes ที่ encode แล้ว (None ถ้าเป็นรูปใบหน้าแต่ไม่พบใบหน้า)
+    """
+    from app.services.image_pipeline import encode_image, render_aligned_face, render_thumbnail
+
+    results: Dict[str, Optional[bytes]] = {}
+    for name, kind, size, image_format, quality in specs:
+        image = render_aligned_face(image_bytes, size) if kind == "face" else render_thumbnail(image_bytes, size)
+        results[name] = encode_image(image, image_format, quality) if image is not None else None
+    return results
+
+
+def _to_encoding(result):
+    if result is None or isinstance(result, Exception):
+        return result
+    return np.frombuffer(result, dtype=np.float32)
+
+
+class FaceEncoderPool:
+    """
+    Process pool สำหรับงาน detect/encode ใบหน้า (CPU-bound และถือ GIL นาน)
+    handler แบบ async รอผลผ่าน future ได้โดยไม่ block event loop ของ uvicorn
+
+    จำกัดจำนวนงานที่ค้าง (กำลังทำ + รอคิว) ไว้ที่ max_pending ถ้าเกินจะ raise EncoderBusyError ทันที
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # ถูกแก้ไขจาก event loop thread เท่านั้น จึงไม่ต้องใช้ lock
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._preloaded = False
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def max_pending(self) -> int:
+        return self._max_pending
+
+    def start(self):
+        if self._executor is not None:
+            return
+        # preload เฉพาะเมื่อ worker ถูก fork (ไม่เช่นนั้นเป็นแค่หน่วยความจำที่เสียเปล่าใน process หลัก)
+        if multiprocessing.get_start_method() == "fork":
+            preload_face_models()
+            self._preloaded = True
+        self._executor = ProcessPoolExecutor(max_workers=self._workers, initializer=_init_worker)
+        # สร้าง worker ทุกตัวและโหลดโมเดลตั้งแต่ตอน startup แทนที่จะรอ request แรก
+        for future in [self._executor.submit(_warm_up) for _ in range(self._workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def encode(self, image_bytes: bytes) -> Optional[np.ndarray]:
+        """Encode ใบหน้าที่ใหญ่ที่สุดในรูป คืน None ถ้าไม่พบใบหน้า"""
+        if self._executor is None:
+            raise FaceProcessingUnavailableError("Face encoder pool is not started")
+        if self._pending >= self._max_pending:
+            self._rejected += 1
+            raise EncoderBusyError("Face encoder queue is full")
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, _encode_in_worker, image_bytes)
+        finally:
+            self._pending -= 1
+            face_encoder_seconds.observe(time.perf_counter() - start, "encode")
+        self._completed += 1
+        return _to_encoding(result)
+
+    async def encode_batch(self, images: List[bytes]) -> List[Union[np.ndarray, None, Exception]]:
+        """
+        Encode หลายรูปพร้อมกัน โดยแบ่งเป็น chunk ละ worker (ผลลัพธ์เรียงตาม images
+        รูปที่ไม่พบใบหน้าได้ None และรูปที่ decode ไม่ได้ได้ exception ของรูปนั้น)
+        ไม่ตรวจ max_pending เอง ผู้เรียก (เช่น FaceCheckInBatcher) ต้องจำกัดจำนวนงานก่อนส่งเข้ามา
+        """
+        if self._executor is None:
+            raise FaceProcessingUnavailableError("Face encoder pool is not started")
+        if not images:
+            return []
+
+        chunk_count = min(self._workers, len(images))
+        chunk_size = -(-len(images) // chunk_count)
+        chunks = [images[i:i + chunk_size] for i in range(0, len(images), chunk_size)]
+
+        self._pending += len(images)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            results = await asyncio.gather(
+                *[loop.run_in_executor(self._executor, _encode_batch_in_worker, chunk) for chunk in chunks]
+            )
+        finally:
+            self._pending -= len(images)
+            face_encoder_seconds.observe(time.perf_counter() - start, "encode_batch")
+            face_encoder_batch_images.observe(len(images))
+        self._completed += len(images)
+        return [_to_encoding(result) for chunk_results in results for result in chunk_results]
+
+    async def render(self, image_bytes: bytes, specs: List[Tuple[str, str, int, str, int]]) -> Dict[str, Optional[bytes]]:
+        """
+        สร้าง derivatives ของรูป (ดู face_derivatives) ใน worker process เดียวกับงาน encode
+        ซึ่งโหลด face_recognition ไว้แล้ว ใช้ max_pending เดียวกัน เกินแล้ว raise EncoderBusyError
+        """
+        if self._executor is None:
+            raise FaceProcessingUnavailableError("Face encoder pool is not started")
+        if self._pending >= self._max_pending:
+            self._rejected += 1
+            raise EncoderBusyError("Face encoder queue is full")
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _render_in_worker, image_bytes, specs)
+        finally:
+            self._pending -= 1
+            face_encoder_seconds.observe(time.perf_counter() - start, "render")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self._workers,
+            "max_pending": self._max_pending,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "preloaded": self._preloaded,
+        }
+
+
+face_encoder_pool = FaceEncoderPool(
+    workers=settings.FACE_ENCODER_WORKERS,
+    max_pending=settings.FACE_ENCODER_MAX_PENDING,
+)
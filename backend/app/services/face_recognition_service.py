@@ -0,0 +1,362 @@
+# backend/app/services/face_recognition_service.py
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.user_face_sample import UserFaceSample
+from app.services.image_pipeline import locate_largest_face
+from app.services.roster_service import RosterCache, class_rosters
+
+# dlib (face_recognition) สร้าง encoding ขนาด 128 มิติต่อใบหน้า
+FACE_ENCODING_DIM = 128
+# ชื่อรุ่นของโมเดลที่บันทึกไว้คู่กับ encoding ใน user_face_samples
+# ถ้าเปลี่ยนโมเดล ให้เปลี่ยนค่านี้แล้วรัน backfill ใหม่ (encoding ต่างรุ่นนำมาเทียบกันไม่ได้)
+FACE_ENCODING_MODEL = "dlib_resnet_v1"
+# ระยะห่างสูงสุดที่ยังถือว่าเป็นคนเดียวกัน (ค่าแนะนำของ face_recognition)
+DEFAULT_MATCH_TOLERANCE = 0.6
+
+EncodingLike = Union[np.ndarray, bytes, bytearray, memoryview, List[float]]
+
+
+@dataclass(frozen=True)
+class FaceMatch:
+    user_id: uuid.UUID
+    distance: float
+
+
+def as_encoding(value: EncodingLike) -> np.ndarray:
+    """แปลง encoding (ndarray / list / float32 bytes) ให้เป็น float32 vector ขนาด 128"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        vector = np.frombuffer(value, dtype=np.float32)
+    else:
+        vector = np.asarray(value, dtype=np.float32).reshape(-1)
+    if vector.shape[0] != FACE_ENCODING_DIM:
+        raise ValueError(f"Face encoding must have {FACE_ENCODING_DIM} dimensions, got {vector.shape[0]}")
+    return vector
+
+
+def encoding_to_bytes(encoding: EncodingLike) -> bytes:
+    """แปลง encoding เป็น float32 bytes (512 bytes) สำหรับเก็บในคอลัมน์ face_encoding"""
+    return as_encoding(encoding).tobytes()
+
+
+def encode_face_image(image_bytes: bytes) -> Optional[np.ndarray]:
+    """
+    Detect ใบหน้าในรูปแล้วคืน encoding ของใบหน้าที่ใหญ่ที่สุด (None ถ้าไม่พบใบหน้า)
+    เป็นงาน CPU-bound (dlib HOG + ResNet) ไม่ควรเรียกใน event loop โดยตรง
+
+    detect บนรูปที่ย่อแล้ว และ encode เฉพาะ crop รอบใบหน้า (ดู image_pipeline.locate_largest_face)
+    """
+    import face_recognition # โหลดเฉพาะใน process ที่ encode จริง (face encoder pool, backfill)
+
+    face = locate_largest_face(image_bytes)
+    if face is None:
+        return None
+    encodings = face_recognition.face_encodings(face.image, known_face_locations=[face.box])
+    if not encodings:
+        return None
+    return encodings[0].astype(np.float32)
+
+
+def _user_keys(user_ids: Iterable[uuid.UUID]) -> np.ndarray:
+    """แปลง UUID เป็น array แบบ 16 bytes เพื่อให้ numpy เปรียบเทียบ/ค้นหาได้แบบ vectorized"""
+    return np.array([user_id.bytes for user_id in user_ids], dtype="S16")
+
+
+class _IndexSnapshot:
+    """ข้อมูลของ index ณ เวลาหนึ่ง (immutable) เพื่อให้การค้นหาไม่ต้องถือ lock"""
+
+    __slots__ = ("encodings", "user_ids", "user_keys", "sq_norms")
+
+    def __init__(self, encodings: np.ndarray, user_ids: np.ndarray, user_keys: Optional[np.ndarray] = None):
+        self.encodings = np.ascontiguousarray(encodings, dtype=np.float32)
+        self.user_ids = user_ids
+        self.user_keys = user_keys if user_keys is not None else _user_keys(user_ids)
+        # ||e||^2 ของแต่ละแถว คำนวณไว้ล่วงหน้าสำหรับสูตร ||p - e||^2 = ||p||^2 + ||e||^2 - 2 p.e
+        self.sq_norms = np.einsum("ij,ij->i", self.encodings, self.encodings)
+
+
+def _empty_snapshot() -> _IndexSnapshot:
+    return _IndexSnapshot(np.empty((0, FACE_ENCODING_DIM), dtype=np.float32), np.empty(0, dtype=object))
+
+
+class FaceEmbeddingIndex:
+    """
+    In-memory index ของ face encodings ทั้งหมด เก็บเป็น float32 matrix (N x 128) ต่อเนื่องกัน
+    คู่กับ array ของ user_id (หนึ่ง user มีได้หลาย sample)
+
+    การ match ใช้ matrix multiplication ครั้งเดียวต่อ probe (หรือต่อ batch ของ probe)
+    แทนการวน loop ทีละ UserFaceSample การแก้ไขจะสร้าง snapshot ใหม่แล้วสลับ reference
+    ดังนั้นผู้อ่านหลายคนค้นหาพร้อมกันได้โดยไม่ต้องรอ lock
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = _empty_snapshot()
+        self._listeners: List[Callable[[Optional[Set[uuid.UUID]]], None]] = []
+
+    def __len__(self) -> int:
+        return self._snapshot.encodings.shape[0]
+
+    @property
+    def user_ids(self) -> np.ndarray:
+        return self._snapshot.user_ids
+
+    def subscribe(self, listener: Callable[[Optional[Set[uuid.UUID]]], None]):
+        """
+        ลงทะเบียน callback ที่จะถูกเรียกเมื่อข้อมูลใน index เปลี่ยน
+        callback ได้รับ set ของ user_id ที่เปลี่ยน หรือ None ถ้ามีการ build ใหม่ทั้งหมด
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, changed: Optional[Set[uuid.UUID]]):
+        for listener in self._listeners:
+            listener(changed)
+
+    def build(self, rows: Iterable[Tuple[uuid.UUID, EncodingLike]]):
+        """แทนที่ข้อมูลทั้งหมดด้วย rows ของ (user_id, encoding)"""
+        user_ids = []
+        encodings = []
+        for user_id, encoding in rows:
+            user_ids.append(user_id)
+            encodings.append(as_encoding(encoding))
+        self.load(user_ids, np.vstack(encodings) if encodings else None)
+
+    def load(self, user_ids: List[uuid.UUID], encodings: Optional[np.ndarray]):
+        """แทนที่ข้อมูลทั้งหมดด้วย matrix (N x 128) ที่เตรียมไว้แล้ว และ user_ids ที่เรียงตรงกัน"""
+        if encodings is not None and len(user_ids):
+            encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, FACE_ENCODING_DIM)
+            if encodings.shape[0] != len(user_ids):
+                raise ValueError("user_ids and encodings must have the same length")
+            snapshot = _IndexSnapshot(encodings, np.array(user_ids, dtype=object))
+        else:
+            snapshot = _empty_snapshot()
+        with self._lock:
+            self._snapshot = snapshot
+        self._notify(None)
+
+    def add(self, user_id: uuid.UUID, encoding: EncodingLike):
+        """เพิ่ม encoding หนึ่งรายการ (เช่น หลังจากลงทะเบียนใบหน้าใหม่)"""
+        vector = as_encoding(encoding)
+        with self._lock:
+            current = self._snapshot
+            self._snapshot = _IndexSnapshot(
+                np.vstack([current.encodings, vector[np.newaxis, :]]),
+                np.append(current.user_ids, np.array([user_id], dtype=object)),
+                np.append(current.user_keys, _user_keys([user_id])),
+            )
+        self._notify({user_id})
+
+    def replace_user(self, user_id: uuid.UUID, encodings: List[EncodingLike]):
+        """แทนที่ encodings ทั้งหมดของ user ด้วยชุดใหม่ (ว่าง = ลบออก) แล้วแจ้ง listener ครั้งเดียว"""
+        vectors = [as_encoding(encoding) for encoding in encodings]
+        with self._lock:
+            current = self._snapshot
+            keep = current.user_keys != user_id.bytes
+            if keep.all() and not vectors:
+                return
+            snapshot = _IndexSnapshot(current.encodings[keep], current.user_ids[keep], current.user_keys[keep])
+            if vectors:
+                snapshot = _IndexSnapshot(
+                    np.vstack([snapshot.encodings, np.vstack(vectors)]),
+                    np.append(snapshot.user_ids, np.array([user_id] * len(vectors), dtype=object)),
+                    np.append(snapshot.user_keys, _user_keys([user_id] * len(vectors))),
+                )
+            self._snapshot = snapshot
+        self._notify({user_id})
+
+    def remove_user(self, user_id: uuid.UUID):
+        """ลบ encodings ทั้งหมดของ user ออกจาก index"""
+        with self._lock:
+            current = self._snapshot
+            keep = current.user_keys != user_id.bytes
+            if keep.all():
+                return
+            self._snapshot = _IndexSnapshot(current.encodings[keep], current.user_ids[keep], current.user_keys[keep])
+        self._notify({user_id})
+
+    def subset(self, user_ids: Iterable[uuid.UUID]) -> "FaceEmbeddingIndex":
+        """สร้าง index ใหม่ที่มีเฉพาะ encodings ของ user_ids ที่กำหนด (copy ของแถวที่เลือก)"""
+        snapshot = self._snapshot
+        mask = np.isin(snapshot.user_keys, _user_keys(user_ids))
+        sub_index = FaceEmbeddingIndex()
+        sub_index._snapshot = _IndexSnapshot(
+            snapshot.encodings[mask], snapshot.user_ids[mask], snapshot.user_keys[mask]
+        )
+        return sub_index
+
+    def match(self, probe: EncodingLike, tolerance: float = DEFAULT_MATCH_TOLERANCE) -> Optional[FaceMatch]:
+        """หา user ที่ใกล้ที่สุดกับ probe หนึ่งใบหน้า คืน None ถ้าไม่มีใครอยู่ในระยะ tolerance"""
+        return self.match_batch(as_encoding(probe)[np.newaxis, :], tolerance)[0]
+
+    def match_batch(self, probes: np.ndarray, tolerance: float = DEFAULT_MATCH_TOLERANCE) -> List[Optional[FaceMatch]]:
+        """
+        Match หลาย probe พร้อมกัน (M x 128) ด้วยการคำนวณ distance matrix (M x N) ครั้งเดียว
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, FACE_ENCODING_DIM)
+        snapshot = self._snapshot
+        if snapshot.encodings.shape[0] == 0 or probes.shape[0] == 0:
+            return [None] * probes.shape[0]
+
+        sq_dist = (
+            np.einsum("ij,ij->i", probes, probes)[:, np.newaxis]
+            + snapshot.sq_norms[np.newaxis, :]
+            - 2.0 * (probes @ snapshot.encodings.T)
+        )
+        best_rows = np.argmin(sq_dist, axis=1)
+        best_dist = np.sqrt(np.maximum(sq_dist[np.arange(probes.shape[0]), best_rows], 0.0))
+
+        results: List[Optional[FaceMatch]] = []
+        for row, distance in zip(best_rows, best_dist):
+            if distance <= tolerance:
+                results.append(FaceMatch(user_id=snapshot.user_ids[row], distance=float(distance)))
+            else:
+                results.append(None)
+        return results
+
+
+class _ClassIndexEntry:
+    __slots__ = ("roster_version", "student_ids", "index")
+
+    def __init__(self, roster_version: Optional[int], student_ids: Set[uuid.UUID], index: FaceEmbeddingIndex):
+        self.roster_version = roster_version
+        self.student_ids = student_ids
+        self.index = index
+
+
+class ClassFaceIndexCache:
+    """
+    Cache ของ sub-index ต่อ class (key = class_id) ที่มีเฉพาะนักเรียนใน roster ของ class
+    ทำให้การเช็คชื่อเปรียบเทียบกับ encodings ของนักเรียนในห้อง (ราวๆ 40 คน) แทนทั้งมหาวิทยาลัย
+
+    รายชื่อนักเรียนมาจาก RosterCache (snapshot เดียวกับที่หน้าเช็คชื่อใช้) และ entry จะถูกสร้างใหม่เมื่อ:
+    - roster_version ของ snapshot เปลี่ยน (มีการลงทะเบียน/ถอนนักเรียน)
+    - encodings ของนักเรียนคนใดใน class เปลี่ยน (รับแจ้งจาก index หลักอัตโนมัติ)
+    """
+
+    def __init__(self, parent: FaceEmbeddingIndex, rosters: RosterCache):
+        self._parent = parent
+        self._rosters = rosters
+        self._lock = threading.Lock()
+        self._entries: Dict[uuid.UUID, _ClassIndexEntry] = {}
+        # เพิ่มขึ้นทุกครั้งที่มีการ invalidate เพื่อไม่ให้ entry ที่สร้างจากข้อมูลเก่าถูกเก็บลง cache
+        self._generation = 0
+        parent.subscribe(self._on_parent_change)
+
+    async def get(self, db: AsyncSession, class_id: uuid.UUID) -> FaceEmbeddingIndex:
+        roster = await self._rosters.get(db, class_id)
+        roster_version = roster.version if roster is not None else None
+        entry = self._entries.get(class_id)
+        if entry is not None and entry.roster_version == roster_version:
+            return entry.index
+
+        generation = self._generation
+        student_ids = set(roster.student_ids) if roster is not None else set()
+        entry = _ClassIndexEntry(roster_version, student_ids, self._parent.subset(student_ids))
+        with self._lock:
+            if generation == self._generation:
+                self._entries[class_id] = entry
+        return entry.index
+
+    def invalidate_class(self, class_id: uuid.UUID):
+        """เรียกเมื่อมีการลงทะเบียน/ถอนนักเรียนออกจาก class"""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(class_id, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def _on_parent_change(self, changed: Optional[Set[uuid.UUID]]):
+        if changed is None:
+            self.invalidate_all()
+            return
+        with self._lock:
+            self._generation += 1
+            stale = [class_id for class_id, entry in self._entries.items() if entry.student_ids & changed]
+            for class_id in stale:
+                del self._entries[class_id]
+
+
+def load_face_index(db: Session, index: Optional[FaceEmbeddingIndex] = None) -> int:
+    """
+    โหลด encodings ที่บันทึกไว้ของผู้ใช้ที่ active ทั้งหมดเข้า index (ไม่มีการ decode รูปภาพ)
+    คืนจำนวน encodings ที่โหลด
+    """
+    index = index if index is not None else face_index
+    rows = db.execute(
+        select(UserFaceSample.user_id, UserFaceSample.face_encoding)
+        .join(User, User.user_id == UserFaceSample.user_id)
+        .where(
+            User.is_active.is_(True),
+            UserFaceSample.face_encoding.isnot(None),
+            UserFaceSample.encoding_model == FACE_ENCODING_MODEL,
+        )
+        .execution_options(yield_per=5000)
+    )
+    user_ids = []
+    blobs = []
+    for user_id, blob in rows:
+        user_ids.append(user_id)
+        blobs.append(blob)
+    encodings = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(-1, FACE_ENCODING_DIM) if blobs else None
+    index.load(user_ids, encodings)
+    return len(user_ids)
+
+
+async def reload_user_faces(db: AsyncSession, user_id: uuid.UUID, index: Optional[FaceEmbeddingIndex] = None) -> int:
+    """
+    โหลด encodings ของ user คนเดียวจากฐานข้อมูลเข้า index ใหม่ (เช่น เมื่อ worker อื่นลงทะเบียนใบหน้า
+    หรือปิดการใช้งานบัญชี) ผู้ใช้ที่ไม่ active หรือถูกลบจะถูกเอาออกจาก index คืนจำนวน encodings
+    """
+    index = index if index is not None else face_index
+    result = await db.execute(
+        select(UserFaceSample.face_encoding)
+        .join(User, User.user_id == UserFaceSample.user_id)
+        .where(
+            UserFaceSample.user_id == user_id,
+            User.is_active.is_(True),
+            UserFaceSample.face_encoding.isnot(None),
+            UserFaceSample.encoding_model == FACE_ENCODING_MODEL,
+        )
+    )
+    encodings = [blob for (blob,) in result]
+    index.replace_user(user_id, encodings)
+    return len(encodings)
+
+
+async def enroll_face_sample(
+    db: AsyncSession, user_id: uuid.UUID, encoding: EncodingLike, image_url: Optional[str] = None,
+    sample_id: Optional[uuid.UUID] = None,
+) -> UserFaceSample:
+    """
+    ลงทะเบียนใบหน้า: บันทึก encoding ที่คำนวณแล้ว (จาก face_encoder_pool) ลง user_face_samples
+    พร้อมรุ่นโมเดล แล้วเพิ่มเข้า index ของ process นี้ทันที
+    """
+    sample = UserFaceSample(
+        sample_id=sample_id or uuid.uuid4(),
+        user_id=user_id,
+        image_url=image_url,
+        face_encoding=encoding_to_bytes(encoding),
+        encoding_model=FACE_ENCODING_MODEL,
+        encoded_at=datetime.now(timezone.utc),
+    )
+    db.add(sample)
+    await db.commit()
+    face_index.add(user_id, encoding)
+    return sample
+
+
+# index หลักของ process นี้ (หนึ่งชุดต่อ uvicorn worker) และ sub-index ต่อ class
+face_index = FaceEmbeddingIndex()
+class_face_indexes = ClassFaceIndexCache(face_index, class_rosters)
@@ -0,0 +1,195 @@
+# backend/app/services/image_pipeline.py
+"""
+อ่านไฟล์รูปที่อัปโหลด และ decode/detect/crop/render รูปใบหน้า
+
+cv2 และ face_recognition (dlib) import ภายในฟังก์ชันที่ใช้เท่านั้น: ฟังก์ชันเหล่านั้นทำงานใน face encoder pool
+ส่วน API process (โดยเฉพาะ WORKER_PROFILE=api) ใช้แค่ส่วนอ่านไฟล์อัปโหลดและไม่ต้องโหลด library ที่หนัก
+"""
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from fastapi import UploadFile
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.services.uploads import UploadTooLargeError, read_upload_limited
+
+# ขยายกรอบใบหน้าออกไปรอบด้าน (สัดส่วนของขนาดใบหน้า) ก่อน crop เพื่อให้ landmarks ไม่หลุดขอบ
+FACE_CROP_MARGIN = 0.35
+
+# (top, right, bottom, left) ตามรูปแบบของ face_recognition
+FaceBox = Tuple[int, int, int, int]
+
+
+class ImageTooLargeError(Exception):
+    """ไฟล์รูปใหญ่เกิน MAX_UPLOAD_IMAGE_BYTES หรือมีจำนวน pixel เกิน MAX_IMAGE_PIXELS"""
+
+
+class InvalidImageError(Exception):
+    """ไม่สามารถ decode ไฟล์เป็นรูปภาพได้"""
+
+
+async def read_image_upload(upload: UploadFile) -> bytes:
+    """อ่านไฟล์รูปที่อัปโหลดทั้งไฟล์ (ส่งไป encode) จำกัดขนาดที่ MAX_UPLOAD_IMAGE_BYTES"""
+    try:
+        return await read_upload_limited(upload, settings.MAX_UPLOAD_IMAGE_BYTES)
+    except UploadTooLargeError:
+        raise ImageTooLargeError(f"Image must be at most {settings.MAX_UPLOAD_IMAGE_BYTES} bytes")
+
+
+def decode_image(image_bytes: bytes, max_side: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    Decode รูปเป็น RGB array โดยด้านที่ยาวที่สุดไม่เกิน max_side
+    คืน (image, scale) โดย scale = ขนาดที่ได้ / ขนาดจริงของรูป
+
+    สำหรับ JPEG ใช้ draft mode ให้ libjpeg decode ที่ 1/2, 1/4, 1/8 ได้เลย
+    ซึ่งเร็วกว่าและใช้ memory น้อยกว่า decode เต็มขนาดแล้วค่อยย่อมาก
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        full_width, full_height = image.size
+        if full_width * full_height > settings.MAX_IMAGE_PIXELS:
+            raise ImageTooLargeError("Image resolution is too large")
+
+        if max_side and max(full_width, full_height) > max_side:
+            ratio = max_side / max(full_width, full_height)
+            image.draft("RGB", (max(int(full_width * ratio), 1), max(int(full_height * ratio), 1)))
+        # รูปจากมือถือมักเก็บการหมุนไว้ใน EXIF orientation
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except ImageTooLargeError:
+        raise
+    except Exception as e:
+        raise InvalidImageError(f"Cannot decode image: {e}")
+
+    array = np.asarray(image)
+    # exif_transpose อาจสลับกว้าง/สูง จึงเทียบกับด้านที่ยาวที่สุดของรูปจริง
+    full_long_side = max(full_width, full_height)
+    if max_side and max(array.shape[:2]) > max_side:
+        ratio = max_side / max(array.shape[:2])
+        new_size = (max(int(array.shape[1] * ratio), 1), max(int(array.shape[0] * ratio), 1))
+        import cv2
+
+        array = cv2.resize(array, new_size, interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(array), max(array.shape[:2]) / full_long_side
+
+
+def _scale_box(box: FaceBox, factor: float) -> FaceBox:
+    top, right, bottom, left = box
+    return int(top * factor), int(right * factor), int(bottom * factor), int(left * factor)
+
+
+@dataclass
+class FaceCrop:
+    image: np.ndarray # RGB crop รอบใบหน้า
+    box: FaceBox # ตำแหน่งใบหน้าภายใน crop
+
+
+def locate_largest_face(image_bytes: bytes) -> Optional[FaceCrop]:
+    """
+    หาใบหน้าที่ใหญ่ที่สุดแล้วคืน crop รอบใบหน้าที่ความละเอียดพอสำหรับการ encode
+
+    1. Detect บนรูปที่ย่อแล้ว (FACE_DETECT_MAX_SIDE) ซึ่งเป็นขั้นตอนที่แพงที่สุด
+    2. Decode ใหม่ที่ความละเอียดที่ทำให้ใบหน้ากว้างประมาณ FACE_ENCODE_FACE_SIZE pixels
+       (ไม่เกินขนาดจริง) แล้ว crop เฉพาะบริเวณใบหน้า
+    """
+    import face_recognition
+
+    detect_image, detect_scale = decode_image(image_bytes, settings.FACE_DETECT_MAX_SIDE)
+    locations = face_recognition.face_locations(detect_image, model="hog")
+    if not locations:
+        return None
+    # (top, right, bottom, left) -> เลือกกรอบที่พื้นที่มากที่สุด
+    largest = max(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+
+    face_side_full = max(largest[2] - largest[0], largest[1] - largest[3]) / detect_scale
+    encode_scale = min(1.0, settings.FACE_ENCODE_FACE_SIZE / max(face_side_full, 1.0))
+    if encode_scale <= detect_scale:
+        encode_image, encode_scale = detect_image, detect_scale
+    else:
+        full_long_side = max(detect_image.shape[:2]) / detect_scale
+        encode_image, encode_scale = decode_image(image_bytes, int(round(full_long_side * encode_scale)))
+
+    top, right, bottom, left = _scale_box(largest, encode_scale / detect_scale)
+    margin = int(max(bottom - top, right - left) * FACE_CROP_MARGIN)
+    height, width = encode_image.shape[:2]
+    crop_top, crop_left = max(top - margin, 0), max(left - margin, 0)
+    crop_bottom, crop_right = min(bottom + margin, height), min(right + margin, width)
+
+    crop = np.ascontiguousarray(encode_image[crop_top:crop_bottom, crop_left:crop_right])
+    return FaceCrop(
+        image=crop,
+        box=(top - crop_top, right - crop_left, bottom - crop_top, left - crop_left),
+    )
+
+
+# ตำแหน่งของกึ่งกลางระหว่างตาในรูปใบหน้าที่ปรับแนวแล้ว (สัดส่วนของความสูง) และระยะห่างระหว่างตา (สัดส่วนของความกว้าง)
+ALIGNED_EYE_CENTER_Y = 0.4
+ALIGNED_EYE_DISTANCE = 0.36
+
+
+def _open_image(image_bytes: bytes, min_side: int) -> Image.Image:
+    """เปิดรูปโดยให้ libjpeg decode ที่ความละเอียดต่ำสุดที่ยังไม่เล็กกว่า min_side (draft mode)"""
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        if image.size[0] * image.size[1] > settings.MAX_IMAGE_PIXELS:
+            raise ImageTooLargeError("Image resolution is too large")
+        image.draft("RGB", (min_side, min_side))
+        return ImageOps.exif_transpose(image).convert("RGB")
+    except ImageTooLargeError:
+        raise
+    except Exception as e:
+        raise InvalidImageError(f"Cannot decode image: {e}")
+
+
+def encode_image(image: Image.Image, image_format: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    options = {"quality": quality}
+    if image_format == "WEBP":
+        options["method"] = 4
+    elif image_format == "JPEG":
+        options.update(optimize=True, progressive=True)
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def render_thumbnail(image_bytes: bytes, size: int) -> Image.Image:
+    """ย่อและ crop ตรงกลางเป็นสี่เหลี่ยมจัตุรัสขนาด size x size"""
+    image = _open_image(image_bytes, size)
+    return ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+
+
+def render_aligned_face(image_bytes: bytes, size: int) -> Optional[Image.Image]:
+    """
+    crop ใบหน้าที่ใหญ่ที่สุดแล้วหมุนให้ตาทั้งสองข้างอยู่ในแนวนอน ขนาด size x size
+    (ตำแหน่งและระยะห่างของตาคงที่ทุกรูป) คืน None ถ้าไม่พบใบหน้า
+    """
+    import cv2
+    import face_recognition
+
+    crop = locate_largest_face(image_bytes)
+    if crop is None:
+        return None
+    top, right, bottom, left = crop.box
+    landmarks = face_recognition.face_landmarks(crop.image, [crop.box], model="small")
+    if landmarks and landmarks[0].get("left_eye") and landmarks[0].get("right_eye"):
+        eyes = sorted(
+            (np.mean(landmarks[0]["left_eye"], axis=0), np.mean(landmarks[0]["right_eye"], axis=0)),
+            key=lambda point: point[0],
+        )
+        (x1, y1), (x2, y2) = eyes
+        angle = float(np.degrees(np.arctan2(y2 - y1, x2 - x1)))
+        center = ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+        scale = size * ALIGNED_EYE_DISTANCE / max(float(np.hypot(x2 - x1, y2 - y1)), 1.0)
+    else:
+        # ไม่ได้ landmarks: ใช้กรอบใบหน้าโดยไม่หมุน
+        angle = 0.0
+        center = ((left + right) / 2.0, top + (bottom - top) * ALIGNED_EYE_CENTER_Y)
+        scale = size / max(bottom - top, right - left, 1) / (1 + FACE_CROP_MARGIN)
+
+    matrix = cv2.getRotationMatrix2D(center, angle, scale)
+    matrix[0, 2] += size / 2.0 - center[0]
+    matrix[1, 2] += size * ALIGNED_EYE_CENTER_Y - center[1]
+    aligned = cv2.warpAffine(crop.image, matrix, (size, size), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return Image.fromarray(aligned)
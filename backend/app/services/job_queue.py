@@ -0,0 +1,410 @@
+# backend/app/services/job_queue.py
+"""
+คิวงาน background บน PostgreSQL (ตาราง jobs) ไม่ต้องมี broker แยก
+
+- enqueue(): เพิ่มงานลงคิว (ใช้ใน API)
+- JobWorker: ดึงงานด้วย UPDATE ... WHERE job_id IN (SELECT ... FOR UPDATE SKIP LOCKED) หลาย worker process
+  ดึงพร้อมกันได้โดยไม่ได้งานซ้ำกัน เพิ่ม worker ได้ตามต้องการ (python -m app.worker)
+- จำกัดจำนวนงานที่ทำพร้อมกันต่อ job type ทั้งระบบ (concurrency) ด้วย advisory lock ตอนดึงงาน
+- งานที่ล้มเหลวถูก retry ตาม backoff (JOB_RETRY_BASE_SECONDS x 2^n) จนครบ max_attempts
+- งานที่กำลังทำบันทึก progress และ heartbeat เป็นระยะ ถ้า worker ตาย (heartbeat หยุด) งานจะถูกนำกลับเข้าคิว
+  worker ที่ยังไม่ตายแต่ heartbeat ไม่ทัน (เช่น event loop ค้าง) จะเห็นตอน heartbeat ถัดไปว่าไม่ได้ถืองานแล้ว และหยุด handler
+"""
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.job import Job, JobStatus
+
+
+class JobCancelledError(Exception):
+    """งานถูกขอให้ยกเลิกระหว่างทำ (handler raise ผ่าน JobContext.check_cancelled)"""
+
+
+class JobPermanentError(Exception):
+    """งานล้มเหลวแบบที่ retry แล้วก็ไม่สำเร็จ (เช่นไฟล์ input ผิดรูปแบบ): ถูก mark failed ทันที"""
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    handler: Callable[["JobContext"], Awaitable[Optional[dict]]]
+    concurrency: Optional[int] = None # งานที่ทำพร้อมกันได้ทั้งระบบ (None = ไม่จำกัด)
+    max_attempts: int = 3
+    timeout_seconds: Optional[float] = None
+    api_enqueue: bool = True # สร้างผ่าน POST /jobs ได้ (False = มี endpoint เฉพาะ)
+
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+
+def job_type(name: str, concurrency: Optional[int] = None, max_attempts: int = 3,
+             timeout_seconds: Optional[float] = None, api_enqueue: bool = True):
+    """ลงทะเบียน async handler(ctx) -> result (dict ที่แปลงเป็น JSON ได้) ของ job type"""
+    def decorator(handler):
+        JOB_TYPES[name] = JobType(name, handler, concurrency, max_attempts, timeout_seconds, api_enqueue)
+        return handler
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue(
+    db: AsyncSession,
+    name: str,
+    payload: Optional[dict] = None,
+    created_by_user_id: Optional[uuid.UUID] = None,
+    run_at: Optional[datetime] = None,
+) -> Job:
+    """เพิ่มงานลงคิวแล้ว commit (worker จะเห็นงานภายใน JOB_POLL_INTERVAL_SECONDS)"""
+    if name not in JOB_TYPES:
+        raise ValueError(f"Unknown job type: {name}")
+    job = Job(
+        job_type=name,
+        status=JobStatus.QUEUED.value,
+        payload=payload or {},
+        max_attempts=JOB_TYPES[name].max_attempts,
+        run_at=run_at or _now(),
+        created_by_user_id=created_by_user_id,
+    )
+    db.add(job)
+    await db.commit()
+    return job
+
+
+async def request_cancel(db: AsyncSession, job: Job) -> Job:
+    """ยกเลิกงานที่ยังรออยู่ทันที หรือขอให้งานที่กำลังทำหยุด (handler ตรวจผ่าน ctx.check_cancelled)"""
+    if job.status == JobStatus.QUEUED.value:
+        await db.execute(
+            update(Job)
+            .where(Job.job_id == job.job_id, Job.status == JobStatus.QUEUED.value)
+            .values(status=JobStatus.CANCELLED.value, finished_at=_now())
+        )
+    elif job.status == JobStatus.RUNNING.value:
+        await db.execute(update(Job).where(Job.job_id == job.job_id).values(cancel_requested=True))
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def queue_stats(db: AsyncSession) -> dict:
+    """จำนวนงานต่อ job type และ status (query เดียว)"""
+    counts: Dict[str, Dict[str, int]] = {}
+    rows = await db.execute(select(Job.job_type, Job.status, func.count()).group_by(Job.job_type, Job.status))
+    for name, job_status, count in rows:
+        counts.setdefault(name, {})[job_status] = count
+    oldest = (
+        await db.execute(select(func.min(Job.run_at)).where(Job.status == JobStatus.QUEUED.value, Job.run_at <= _now()))
+    ).scalar_one_or_none()
+    return {
+        "types": {
+            name: {"concurrency": spec.concurrency, "max_attempts": spec.max_attempts, "counts": counts.get(name, {})}
+            for name, spec in sorted(JOB_TYPES.items())
+        },
+        "oldest_ready_seconds": (
+            (_now() - (oldest if oldest.tzinfo else oldest.replace(tzinfo=timezone.utc))).total_seconds() if oldest else 0.0
+        ),
+    }
+
+
+class JobContext:
+    """
+    ส่งให้ handler: payload ของงาน และการรายงาน progress
+    set_progress() เรียกจาก thread ใดก็ได้ (ค่าถูกบันทึกลงฐานข้อมูลพร้อม heartbeat ถัดไป)
+    """
+
+    def __init__(self, job: Job):
+        self.job_id: uuid.UUID = job.job_id
+        self.job_type: str = job.job_type
+        self.payload: dict = job.payload or {}
+        self.attempt: int = job.attempts
+        self.created_by_user_id: Optional[uuid.UUID] = job.created_by_user_id
+        self._lock = threading.Lock()
+        self._progress: Optional[float] = None
+        self._message: Optional[str] = None
+        self._dirty = False
+        self.cancelled = False
+        self.lost = False # งานถูกนำกลับเข้าคิวโดยตัว reaper (worker นี้ไม่ได้ถืองานแล้ว)
+
+    def set_progress(self, fraction: Optional[float], message: Optional[str] = None):
+        with self._lock:
+            self._progress = None if fraction is None else min(max(float(fraction), 0.0), 1.0)
+            self._message = message[:255] if message else None
+            self._dirty = True
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelledError("Job was cancelled")
+
+    def _take_progress(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+            return dirty, self._progress, self._message
+
+
+class JobWorker:
+    """
+    ดึงและทำงานจากคิว ทำงานพร้อมกันได้ไม่เกิน concurrency งานต่อ process
+    types = job type ที่ worker นี้รับ (None = ทุก type ที่ลงทะเบียนไว้)
+    """
+
+    def __init__(self, types: Optional[Iterable[str]] = None, concurrency: Optional[int] = None,
+                 poll_interval: Optional[float] = None):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._type_names = list(types) if types else None
+        self._concurrency = max(concurrency or settings.JOB_WORKER_CONCURRENCY, 1)
+        self._poll_interval = poll_interval or settings.JOB_POLL_INTERVAL_SECONDS
+        self._running: Dict[uuid.UUID, asyncio.Task] = {}
+        self._running_by_type: Dict[str, int] = {}
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._last_reap = 0.0
+        self._completed = 0
+        self._failed = 0
+        self._retried = 0
+        self._lost = 0
+
+    @property
+    def types(self) -> List[JobType]:
+        names = self._type_names or sorted(JOB_TYPES)
+        unknown = [name for name in names if name not in JOB_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown job types: {', '.join(unknown)}")
+        return [JOB_TYPES[name] for name in names]
+
+    async def run(self):
+        """วนดึงงานจนกว่าจะเรียก stop()"""
+        print(f"Job worker {self.worker_id} started (types: {', '.join(spec.name for spec in self.types)}).")
+        while not self._stopping:
+            try:
+                if time.monotonic() - self._last_reap >= settings.JOB_STALE_SECONDS / 2:
+                    self._last_reap = time.monotonic()
+                    await self._requeue_stale()
+                for spec in self.types:
+                    free = self._concurrency - len(self._running)
+                    if free <= 0 or self._stopping:
+                        break
+                    for job in await self._claim(spec, free):
+                        self._start(spec, job)
+            except Exception as e:
+                # เช่น ฐานข้อมูลหลุดชั่วคราว: ลองใหม่รอบถัดไป
+                print(f"Job worker poll failed: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: float = 30.0):
+        """หยุดดึงงานใหม่ แล้วรองานที่กำลังทำ (งานที่ไม่เสร็จในเวลาจะถูกยกเลิกและนำกลับเข้าคิว)"""
+        self._stopping = True
+        self._wake.set()
+        if not self._running:
+            return
+        done, pending = await asyncio.wait(list(self._running.values()), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _claim(self, spec: JobType, free: int) -> List[Job]:
+        async with AsyncSessionLocal() as db:
+            limit = free
+            if spec.concurrency is not None:
+                if db.bind.dialect.name == "postgresql":
+                    # ดึงงานของ type เดียวกันทีละ worker เพื่อให้นับจำนวนที่กำลังทำได้ถูกต้อง
+                    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"job_queue:{spec.name}"))))
+                running = (
+                    await db.execute(
+                        select(func.count()).select_from(Job)
+                        .where(Job.job_type == spec.name, Job.status == JobStatus.RUNNING.value)
+                    )
+                ).scalar_one()
+                limit = min(limit, spec.concurrency - running)
+            if limit <= 0:
+                await db.commit()
+                return []
+
+            now = _now()
+            candidates = (
+                select(Job.job_id)
+                .where(Job.job_type == spec.name, Job.status == JobStatus.QUEUED.value, Job.run_at <= now)
+                .order_by(Job.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = list(
+                (
+                    await db.execute(
+                        update(Job)
+                        .where(Job.job_id.in_(candidates.scalar_subquery()))
+                        .values(
+                            status=JobStatus.RUNNING.value,
+                            attempts=Job.attempts + 1,
+                            locked_by=self.worker_id,
+                            heartbeat_at=now,
+                            started_at=func.coalesce(Job.started_at, now),
+                            error=None,
+                        )
+                        .returning(Job)
+                        .execution_options(synchronize_session=False)
+                    )
+                ).scalars()
+            )
+            await db.commit()
+            return jobs
+
+    def _start(self, spec: JobType, job: Job):
+        task = asyncio.get_running_loop().create_task(self._execute(spec, JobContext(job), job.max_attempts))
+        self._running[job.job_id] = task
+        self._running_by_type[spec.name] = self._running_by_type.get(spec.name, 0) + 1
+
+        def done(_):
+            self._running.pop(job.job_id, None)
+            self._running_by_type[spec.name] -= 1
+            self._wake.set() # มีที่ว่าง ดึงงานถัดไปได้ทันที
+
+        task.add_done_callback(done)
+
+    async def _execute(self, spec: JobType, ctx: JobContext, max_attempts: int):
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(ctx, asyncio.current_task()))
+        try:
+            if spec.timeout_seconds:
+                result = await asyncio.wait_for(spec.handler(ctx), spec.timeout_seconds)
+            else:
+                result = await spec.handler(ctx)
+        except JobCancelledError:
+            await self._finish(ctx, JobStatus.CANCELLED, error="Cancelled")
+        except JobPermanentError as e:
+            self._failed += 1
+            await self._finish(ctx, JobStatus.FAILED, error=str(e))
+        except asyncio.CancelledError:
+            if ctx.lost:
+                # ถูกหยุดโดย heartbeat: งานเป็นของ worker อื่นแล้ว ไม่ต้องเขียนอะไร
+                return
+            # worker กำลังปิด: คืนงานเข้าคิวโดยไม่นับ attempt นี้
+            await self._release(ctx)
+            raise
+        except Exception as e:
+            await self._fail(ctx, max_attempts, f"{type(e).__name__}: {e}")
+        else:
+            await self._finish(ctx, JobStatus.SUCCEEDED, result=result)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, ctx: JobContext, execution: asyncio.Task):
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            dirty, progress, message = ctx._take_progress()
+            values: Dict[str, Any] = {"heartbeat_at": _now()}
+            if dirty:
+                values.update(progress=progress, progress_message=message)
+            try:
+                async with AsyncSessionLocal() as db:
+                    owned = (
+                        await db.execute(
+                            update(Job)
+                            .where(Job.job_id == ctx.job_id, Job.locked_by == self.worker_id,
+                                   Job.status == JobStatus.RUNNING.value)
+                            .values(**values)
+                            .returning(Job.cancel_requested)
+                        )
+                    ).first()
+                    await db.commit()
+            except Exception as e:
+                print(f"Job heartbeat failed ({ctx.job_id}): {e}")
+                continue
+            if owned is None:
+                # reaper นำงานกลับเข้าคิวแล้ว (อาจมี worker อื่นทำอยู่): หยุด handler
+                # ส่วนที่ทำใน thread หยุดไม่ได้ แต่ check_cancelled() จะ raise
+                print(f"Job {ctx.job_id} is no longer owned by {self.worker_id}, stopping it.")
+                self._lost += 1
+                ctx.lost = ctx.cancelled = True
+                execution.cancel()
+                return
+            ctx.cancelled = bool(owned.cancel_requested)
+
+    async def _update_owned(self, ctx: JobContext, **values) -> bool:
+        # อัปเดตเฉพาะงานที่ worker นี้ยังถืออยู่ (ถ้าถูกนำกลับเข้าคิวเพราะ heartbeat หาย จะไม่เขียนทับ)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.job_id == ctx.job_id, Job.locked_by == self.worker_id, Job.status == JobStatus.RUNNING.value)
+                .values(**values)
+            )
+            await db.commit()
+            return result.rowcount > 0
+
+    async def _finish(self, ctx: JobContext, job_status: JobStatus, result: Optional[dict] = None,
+                      error: Optional[str] = None):
+        _, progress, message = ctx._take_progress()
+        values = dict(status=job_status.value, result=result, error=error, locked_by=None, finished_at=_now(),
+                      progress_message=message)
+        if job_status == JobStatus.SUCCEEDED:
+            values["progress"] = 1.0
+            self._completed += 1
+        else:
+            values["progress"] = progress
+        await self._update_owned(ctx, **values)
+
+    async def _fail(self, ctx: JobContext, max_attempts: int, error: str):
+        if ctx.attempt < max_attempts:
+            delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (ctx.attempt - 1), settings.JOB_RETRY_MAX_SECONDS)
+            delay *= random.uniform(0.8, 1.2) # ไม่ให้งานที่ล้มเหลวพร้อมกัน retry พร้อมกัน
+            self._retried += 1
+            await self._update_owned(
+                ctx, status=JobStatus.QUEUED.value, error=error, locked_by=None,
+                run_at=_now() + timedelta(seconds=delay),
+            )
+        else:
+            self._failed += 1
+            await self._finish(ctx, JobStatus.FAILED, error=error)
+
+    async def _release(self, ctx: JobContext):
+        try:
+            await asyncio.shield(self._update_owned(
+                ctx, status=JobStatus.QUEUED.value, locked_by=None, attempts=Job.attempts - 1, run_at=_now(),
+            ))
+        except Exception as e:
+            print(f"Releasing job {ctx.job_id} failed: {e}")
+
+    async def _requeue_stale(self):
+        """นำงาน running ที่ heartbeat หยุดไปนานกลับเข้าคิว (หรือ failed ถ้าครบ max_attempts แล้ว)"""
+        cutoff = _now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        stale = (Job.status == JobStatus.RUNNING.value) & (Job.heartbeat_at < cutoff)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Job).where(stale, Job.attempts >= Job.max_attempts)
+                .values(status=JobStatus.FAILED.value, locked_by=None, finished_at=_now(), error="Worker stopped responding")
+            )
+            await db.execute(
+                update(Job).where(stale)
+                .values(status=JobStatus.QUEUED.value, locked_by=None, run_at=_now(), error="Worker stopped responding")
+            )
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self._concurrency,
+            "running": len(self._running),
+            "running_by_type": {name: count for name, count in self._running_by_type.items() if count},
+            "completed": self._completed,
+            "failed": self._failed,
+            "retried": self._retried,
+            "lost": self._lost,
+        }
@@ -0,0 +1,106 @@
+# backend/app/services/jobs.py
+"""
+Handler ของงาน background (ลงทะเบียนกับ job_queue เมื่อ import โมดูลนี้)
+
+- face_backfill: encode face sample ที่ยังไม่มี encoding (ทีละงานทั้งระบบ)
+- attendance_rollups_rebuild: คำนวณตารางสรุป attendance ใหม่ทั้งหมด (ทีละงานทั้งระบบ)
+- user_import: import ผู้ใช้จากไฟล์ที่อัปโหลดไว้ใน storage (POST /admin/users/import/jobs)
+- users_export: export ผู้ใช้เป็นไฟล์ใน storage (POST /users/export/jobs)
+"""
+import asyncio
+import json
+import uuid
+
+from app.database import AsyncSessionLocal
+from app.services.attendance_rollups import rebuild_attendance_rollups
+from app.services.cache_invalidation import invalidate_user_faces
+from app.services.face_backfill import backfill_face_encodings
+from app.services.job_queue import JobContext, JobPermanentError, job_type
+from app.services.storage_service import job_result_key, storage
+from app.services.user_export_service import EXPORT_MEDIA_TYPES, export_user_chunks
+from app.services.user_import_service import UserImportFormatError, import_users
+
+
+@job_type("face_backfill", concurrency=1, max_attempts=2)
+async def run_face_backfill(ctx: JobContext) -> dict:
+    loop = asyncio.get_running_loop()
+
+    async def reload_faces(user_ids):
+        for user_id in user_ids:
+            await invalidate_user_faces(user_id)
+
+    def on_batch(summary: dict, user_ids):
+        # เรียกใน thread ของ backfill: ให้ทุก worker โหลด encodings ที่เพิ่ง commit ก่อนรอบถัดไป
+        asyncio.run_coroutine_threadsafe(reload_faces(user_ids), loop).result()
+        ctx.set_progress(None, f"{summary['encoded']} encoded, {summary['failed']} failed")
+        ctx.check_cancelled() # หยุดหลัง commit รอบนี้ (รันต่อใหม่ได้ เพราะเลือกเฉพาะ sample ที่ยังค้าง)
+
+    return await asyncio.to_thread(
+        backfill_face_encodings,
+        workers=ctx.payload.get("workers"),
+        batch_size=ctx.payload.get("batch_size", 200),
+        on_batch=on_batch,
+    )
+
+
+@job_type("attendance_rollups_rebuild", concurrency=1)
+async def run_attendance_rollups_rebuild(ctx: JobContext) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await rebuild_attendance_rollups(db)
+
+
+@job_type("user_import", api_enqueue=False)
+async def run_user_import(ctx: JobContext) -> dict:
+    """payload: storage_key, format ผลลัพธ์ฉบับเต็ม (รายแถว) ถูกเก็บเป็นไฟล์ JSON ใน storage"""
+    storage_key = ctx.payload["storage_key"]
+    content = await storage.read(storage_key)
+
+    def on_chunk(done: int, total: int):
+        ctx.set_progress(done / total if total else 1.0, f"{done}/{total} rows")
+        ctx.check_cancelled() # chunk ที่ commit แล้วคงอยู่ import ซ้ำได้ (แถวเดิมจะเป็น "skipped")
+
+    async with AsyncSessionLocal() as db:
+        try:
+            report = await import_users(db, content, ctx.payload["format"], on_chunk=on_chunk)
+        except UserImportFormatError as e:
+            raise JobPermanentError(str(e))
+
+    report_key = job_result_key(ctx.job_id, "report.json")
+    await storage.save(report_key, json.dumps(report.model_dump(mode="json")).encode(), "application/json")
+    await storage.delete(storage_key)
+    return {
+        "total": report.total,
+        "created": report.created,
+        "skipped": report.skipped,
+        "failed": report.failed,
+        "storage_key": report_key,
+        "content_type": "application/json",
+    }
+
+
+@job_type("users_export", api_enqueue=False)
+async def run_users_export(ctx: JobContext) -> dict:
+    """payload: format และ filter เดียวกับ GET /users/export (role, is_active, class_id)"""
+    file_format = ctx.payload.get("format", "ndjson")
+    key = job_result_key(ctx.job_id, f"users.{file_format}")
+    class_id = uuid.UUID(ctx.payload["class_id"]) if ctx.payload.get("class_id") else None
+    written = 0
+
+    async def chunks():
+        nonlocal written
+        async with AsyncSessionLocal() as db:
+            async for chunk in export_user_chunks(
+                db,
+                file_format,
+                role=ctx.payload.get("role"),
+                is_active=ctx.payload.get("is_active"),
+                class_id=class_id,
+            ):
+                data = chunk.encode()
+                written += len(data)
+                ctx.set_progress(None, f"{written} bytes written")
+                ctx.check_cancelled()
+                yield data
+
+    stored = await storage.save_stream(key, chunks(), EXPORT_MEDIA_TYPES[file_format])
+    return {"storage_key": stored.key, "size": stored.size, "content_type": EXPORT_MEDIA_TYPES[file_format]}
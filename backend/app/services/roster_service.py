@@ -0,0 +1,139 @@
+# backend/app/services/roster_service.py
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from app.core.config import settings
+from app.models.class_model import Class
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class RosterStudent:
+    user_id: uuid.UUID
+    username: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    student_id: Optional[str]
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class RosterSnapshot:
+    """รายชื่อนักเรียนของคลาส ณ roster_version หนึ่ง (immutable ใช้ร่วมกันได้หลาย request)"""
+    class_id: uuid.UUID
+    version: int
+    students: Tuple[RosterStudent, ...]
+    student_ids: FrozenSet[uuid.UUID]
+
+
+class RosterCache:
+    """
+    Cache ของ RosterSnapshot ต่อ class ใช้ร่วมกันระหว่างหน้าเช็คชื่อ, roster endpoint และ ClassFaceIndexCache
+
+    Entry จะถูกลบเมื่อมีการลงทะเบียน/ถอนนักเรียน (invalidate_class) หรือเมื่อเก่ากว่า ttl_seconds
+    (กันกรณีรายชื่อถูกแก้จาก process อื่น)
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[uuid.UUID, Tuple[float, RosterSnapshot]] = {}
+        # เพิ่มขึ้นทุกครั้งที่มีการ invalidate เพื่อไม่ให้ snapshot ที่โหลดจากข้อมูลเก่าถูกเก็บลง cache
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    async def get(self, db: AsyncSession, class_id: uuid.UUID) -> Optional[RosterSnapshot]:
+        """คืน snapshot ของ class (None ถ้าไม่มี class นี้)"""
+        cached = self._entries.get(class_id)
+        if cached is not None and time.monotonic() - cached[0] < self._ttl:
+            self._hits += 1
+            return cached[1]
+        self._misses += 1
+
+        generation = self._generation
+        snapshot = await self._load(db, class_id)
+        if snapshot is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[class_id] = (time.monotonic(), snapshot)
+        return snapshot
+
+    @staticmethod
+    async def _load(db: AsyncSession, class_id: uuid.UUID) -> Optional[RosterSnapshot]:
+        # selectinload: class + นักเรียนทั้งห้องใน query เดียว (WHERE class_id IN ...) ไม่ lazy load ทีละคน
+        result = await db.execute(
+            select(Class)
+            .where(Class.class_id == class_id)
+            .options(
+                load_only(Class.class_id, Class.roster_version),
+                selectinload(Class.students).load_only(
+                    User.user_id, User.username, User.first_name, User.last_name, User.student_id, User.is_active
+                ),
+            )
+            .execution_options(populate_existing=True)
+        )
+        db_class = result.scalar_one_or_none()
+        if db_class is None:
+            return None
+        students = tuple(
+            sorted(
+                (
+                    RosterStudent(
+                        user_id=student.user_id,
+                        username=student.username,
+                        first_name=student.first_name,
+                        last_name=student.last_name,
+                        student_id=student.student_id,
+                        is_active=student.is_active,
+                    )
+                    for student in db_class.students
+                ),
+                key=lambda student: (student.student_id or "", student.username),
+            )
+        )
+        return RosterSnapshot(
+            class_id=db_class.class_id,
+            version=db_class.roster_version,
+            students=students,
+            student_ids=frozenset(student.user_id for student in students),
+        )
+
+    def invalidate_class(self, class_id: uuid.UUID):
+        """เรียกเมื่อมีการลงทะเบียน/ถอนนักเรียนออกจาก class"""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(class_id, None)
+
+    def invalidate_student(self, user_id: uuid.UUID):
+        """ลบ snapshot ของทุก class ที่มีนักเรียนคนนี้ (เช่น แก้ชื่อหรือปิดการใช้งานบัญชี)"""
+        with self._lock:
+            self._generation += 1
+            stale = [class_id for class_id, (_, snapshot) in self._entries.items() if user_id in snapshot.student_ids]
+            for class_id in stale:
+                del self._entries[class_id]
+
+    def invalidate_all(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "ttl_seconds": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": (self._hits / lookups) if lookups else 0.0,
+        }
+
+
+class_rosters = RosterCache(ttl_seconds=settings.ROSTER_CACHE_TTL_SECONDS)
@@ -0,0 +1,403 @@
+# backend/app/services/storage_service.py
+"""
+ที่เก็บไฟล์ (รูปใบหน้า ฯลฯ) แบบเลือก backend ได้จาก STORAGE_BACKEND
+
+- "local": เก็บในโฟลเดอร์ LOCAL_STORAGE_DIR, presigned URL เป็น URL ของ API ที่ลงลายเซ็น HMAC (ใช้ตอนพัฒนา)
+- "s3":    S3 หรือ S3-compatible (MinIO ฯลฯ ผ่าน S3_ENDPOINT_URL), presigned URL ของ S3 โดยตรง
+           client ดาวน์โหลด/อัปโหลดกับ S3 เองโดยไม่ผ่าน API process
+
+การเรียกที่ block (boto3, ไฟล์) ทำใน thread pool ของ storage ที่ใช้ร่วมกันทั้ง process
+ไม่ block event loop ของ uvicorn และ boto3 client ตัวเดียวใช้ connection pool ขนาดเท่ากับจำนวน thread
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterable, Optional
+from urllib.parse import quote, urlencode
+
+from app.core.config import settings
+
+LOCAL_PRESIGN_PATH = "/api/v1/storage/objects/"
+
+
+class StorageError(Exception):
+    """อ่าน/เขียน storage ไม่สำเร็จ"""
+
+
+class ObjectNotFoundError(StorageError):
+    """ไม่มี object ตาม key ที่ระบุ"""
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+
+
+async def _single_chunk(data: bytes):
+    yield data
+
+
+def face_sample_image_key(user_id: uuid.UUID, sample_id: uuid.UUID) -> str:
+    """key ของรูปต้นฉบับของ UserFaceSample"""
+    return f"face-samples/{user_id}/{sample_id}"
+
+
+def face_sample_derivative_key(user_id: uuid.UUID, sample_id: uuid.UUID, name: str) -> str:
+    """key ของรูปย่อ/รูปใบหน้าที่สร้างจากรูปต้นฉบับของ UserFaceSample"""
+    return f"face-samples/{user_id}/{sample_id}.d/{name}"
+
+
+def user_import_upload_key(upload_id: uuid.UUID, file_format: str) -> str:
+    """key ของไฟล์ import ผู้ใช้ที่รอ background job ประมวลผล"""
+    return f"imports/users/{upload_id}.{file_format}"
+
+
+def job_result_key(job_id: uuid.UUID, filename: str) -> str:
+    """key ของไฟล์ผลลัพธ์ของ background job (เช่นไฟล์ export)"""
+    return f"jobs/{job_id}/{filename}"
+
+
+class StorageBackend:
+    """ส่วนที่ใช้ร่วมกันของทุก backend: thread pool และสถิติ"""
+
+    name = "base"
+
+    def __init__(self, workers: int, presign_expires: int):
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="storage")
+        self._presign_expires = presign_expires
+        self._uploads = 0
+        self._upload_bytes = 0
+        self._downloads = 0
+        self._download_bytes = 0
+        self._deletes = 0
+        self._presigned = 0
+        self._errors = 0
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def save(self, key: str, data: bytes, content_type: Optional[str] = None) -> StoredObject:
+        """บันทึก bytes ที่มีอยู่แล้วในหน่วยความจำ"""
+        return await self.save_stream(key, _single_chunk(data), content_type)
+
+    async def save_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: Optional[str] = None) -> StoredObject:
+        """บันทึกข้อมูลจาก async iterator ทีละ chunk (ไม่ต้องมีทั้งไฟล์ในหน่วยความจำ)"""
+        try:
+            stored = await self._save_stream(key, chunks, content_type)
+        except Exception:
+            self._errors += 1
+            raise
+        self._uploads += 1
+        self._upload_bytes += stored.size
+        return stored
+
+    async def read(self, key: str) -> bytes:
+        data = await self._run(self.read_sync, key)
+        self._downloads += 1
+        self._download_bytes += len(data)
+        return data
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        """ข้อมูลของ object (None ถ้าไม่มี)"""
+        return await self._run(self.stat_sync, key)
+
+    async def delete(self, key: str):
+        await self._run(self.delete_sync, key)
+        self._deletes += 1
+
+    def presigned_url(self, key: str, method: str = "GET", expires: Optional[int] = None,
+                      content_type: Optional[str] = None) -> str:
+        """URL สำหรับให้ client GET หรือ PUT object นี้ได้โดยตรงภายในเวลาที่กำหนด"""
+        self._presigned += 1
+        return self._presigned_url(key, method.upper(), expires or self._presign_expires, content_type)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "uploads": self._uploads,
+            "upload_bytes": self._upload_bytes,
+            "downloads": self._downloads,
+            "download_bytes": self._download_bytes,
+            "deletes": self._deletes,
+            "presigned_urls": self._presigned,
+            "errors": self._errors,
+        }
+
+    # --- ส่วนที่แต่ละ backend ต้อง implement ---
+
+    async def _save_stream(self, key, chunks, content_type) -> StoredObject:
+        raise NotImplementedError
+
+    def read_sync(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def stat_sync(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    def delete_sync(self, key: str):
+        raise NotImplementedError
+
+    def _presigned_url(self, key, method, expires, content_type) -> str:
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """เก็บไฟล์ในโฟลเดอร์ของเครื่อง (content type เก็บเป็นไฟล์ .meta คู่กัน)"""
+
+    name = "local"
+
+    def __init__(self, root: str, secret_key: str, workers: int, presign_expires: int):
+        super().__init__(workers, presign_expires)
+        self._root = os.path.abspath(root)
+        self._secret = secret_key.encode("utf-8")
+
+    def path_for(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self._root, key))
+        if not key or key.startswith("/") or not path.startswith(self._root + os.sep):
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+
+    async def _save_stream(self, key, chunks, content_type) -> StoredObject:
+        path = self.path_for(key)
+        await self._run(os.makedirs, os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.part"
+        digest = hashlib.md5()
+        size = 0
+        handle = await self._run(open, temp_path, "wb")
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                await self._run(handle.write, chunk)
+            await self._run(handle.close)
+            # เขียนลงไฟล์ชั่วคราวก่อนแล้วค่อย rename ผู้อ่านจึงไม่เห็นไฟล์ที่เขียนไม่ครบ
+            await self._run(self._write_meta, path, content_type)
+            await self._run(os.replace, temp_path, path)
+        except BaseException:
+            handle.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return StoredObject(key=key, size=size, etag=digest.hexdigest(), content_type=content_type)
+
+    @staticmethod
+    def _write_meta(path: str, content_type: Optional[str]):
+        meta_path = f"{path}.meta"
+        if content_type:
+            with open(meta_path, "w", encoding="utf-8") as meta:
+                meta.write(content_type)
+        elif os.path.exists(meta_path):
+            os.remove(meta_path)
+
+    def read_sync(self, key: str) -> bytes:
+        try:
+            with open(self.path_for(key), "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            raise ObjectNotFoundError(key)
+
+    def stat_sync(self, key: str) -> Optional[StoredObject]:
+        path = self.path_for(key)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return None
+        content_type = None
+        if os.path.exists(f"{path}.meta"):
+            with open(f"{path}.meta", encoding="utf-8") as meta:
+                content_type = meta.read().strip() or None
+        return StoredObject(key=key, size=size, content_type=content_type)
+
+    def delete_sync(self, key: str):
+        path = self.path_for(key)
+        for target in (path, f"{path}.meta"):
+            if os.path.exists(target):
+                os.remove(target)
+
+    def _signature(self, method: str, key: str, expires: int, content_type: Optional[str] = None) -> str:
+        message = f"{method}\n{key}\n{expires}\n{content_type or ''}".encode("utf-8")
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def verify_signature(self, method: str, key: str, expires: int, signature: str,
+                         content_type: Optional[str] = None) -> bool:
+        """
+        ตรวจ URL ที่สร้างจาก presigned_url (ใช้ใน storage router)
+        PUT: ถ้า URL ถูกสร้างพร้อม content_type ต้องส่ง Content-Type เดียวกันนั้น (เหมือน presigned PUT ของ S3)
+        """
+        if expires < time.time():
+            return False
+        method = method.upper()
+        candidates = [self._signature(method, key, expires)]
+        if method == "PUT" and content_type:
+            candidates.append(self._signature(method, key, expires, content_type))
+        # เทียบทุกค่าเสมอ (list ไม่ใช่ generator) เวลาที่ใช้จึงไม่บอกว่าตรงกับค่าไหน
+        return any([hmac.compare_digest(candidate, signature) for candidate in candidates])
+
+    def _presigned_url(self, key, method, expires, content_type) -> str:
+        self.path_for(key) # ตรวจ key
+        expires_at = int(time.time()) + expires
+        signature = self._signature(method, key, expires_at, content_type if method == "PUT" else None)
+        query = urlencode({"expires": expires_at, "signature": signature})
+        return f"{LOCAL_PRESIGN_PATH}{quote(key)}?{query}"
+
+
+class S3Storage(StorageBackend):
+    """S3 หรือ S3-compatible storage ผ่าน boto3 (client ตัวเดียวต่อ process, thread-safe)"""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, workers: int, presign_expires: int, part_size: int,
+                 region: Optional[str] = None, endpoint_url: Optional[str] = None,
+                 access_key_id: Optional[str] = None, secret_access_key: Optional[str] = None):
+        super().__init__(workers, presign_expires)
+        self._bucket = bucket
+        # S3 กำหนดให้ทุก part ยกเว้น part สุดท้ายมีขนาดอย่างน้อย 5 MB
+        self._part_size = max(part_size, 5 * 1024 * 1024)
+        self._client_options = {
+            "region_name": region,
+            "endpoint_url": endpoint_url,
+            "aws_access_key_id": access_key_id,
+            "aws_secret_access_key": secret_access_key,
+        }
+        self._max_pool_connections = max(workers, 1)
+        self._client = None
+
+    @property
+    def client(self):
+        # สร้างตอนใช้ครั้งแรก เพื่อไม่ต้อง import boto3 ใน process ที่ไม่ได้ใช้ S3
+        if self._client is None:
+            import boto3
+            from botocore.config import Config
+
+            config = Config(
+                max_pool_connections=self._max_pool_connections,
+                signature_version="s3v4",
+                retries={"max_attempts": 3, "mode": "standard"},
+                # MinIO และ S3-compatible ส่วนใหญ่ต้องใช้ path-style
+                s3={"addressing_style": "path"} if self._client_options["endpoint_url"] else None,
+            )
+            self._client = boto3.session.Session().client("s3", config=config, **self._client_options)
+        return self._client
+
+    async def _save_stream(self, key, chunks, content_type) -> StoredObject:
+        extra = {"ContentType": content_type} if content_type else {}
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                size += len(chunk)
+                if len(buffer) < self._part_size:
+                    continue
+                if upload_id is None:
+                    response = await self._run(self.client.create_multipart_upload, Bucket=self._bucket, Key=key, **extra)
+                    upload_id = response["UploadId"]
+                part, buffer = bytes(buffer), bytearray()
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, part))
+
+            if upload_id is None:
+                # ไฟล์เล็กกว่า part เดียว: PUT ครั้งเดียว
+                response = await self._run(self.client.put_object, Bucket=self._bucket, Key=key, Body=bytes(buffer), **extra)
+                return StoredObject(key=key, size=size, etag=response.get("ETag", "").strip('"') or None, content_type=content_type)
+
+            if buffer:
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            response = await self._run(
+                self.client.complete_multipart_upload,
+                Bucket=self._bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            if upload_id is not None:
+                # ไม่ให้ part ที่อัปโหลดไปแล้วค้างอยู่ใน bucket
+                await self._run(self.client.abort_multipart_upload, Bucket=self._bucket, Key=key, UploadId=upload_id)
+            raise
+        return StoredObject(key=key, size=size, etag=response.get("ETag", "").strip('"') or None, content_type=content_type)
+
+    async def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> dict:
+        response = await self._run(
+            self.client.upload_part, Bucket=self._bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data,
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        response = getattr(error, "response", None) or {}
+        return response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def read_sync(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self._bucket, Key=key)
+        except Exception as e:
+            if self._is_not_found(e):
+                raise ObjectNotFoundError(key)
+            raise
+        with response["Body"] as body:
+            return body.read()
+
+    def stat_sync(self, key: str) -> Optional[StoredObject]:
+        try:
+            response = self.client.head_object(Bucket=self._bucket, Key=key)
+        except Exception as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return StoredObject(
+            key=key,
+            size=response["ContentLength"],
+            etag=response.get("ETag", "").strip('"') or None,
+            content_type=response.get("ContentType"),
+        )
+
+    def delete_sync(self, key: str):
+        self.client.delete_object(Bucket=self._bucket, Key=key)
+
+    def _presigned_url(self, key, method, expires, content_type) -> str:
+        # คำนวณลายเซ็นในเครื่อง ไม่มี network call
+        operation = {"GET": "get_object", "PUT": "put_object"}.get(method)
+        if operation is None:
+            raise StorageError(f"Unsupported presigned method: {method}")
+        params = {"Bucket": self._bucket, "Key": key}
+        if method == "PUT" and content_type:
+            params["ContentType"] = content_type
+        return self.client.generate_presigned_url(operation, Params=params, ExpiresIn=expires)
+
+
+def create_storage() -> StorageBackend:
+    """สร้าง backend ตาม STORAGE_BACKEND"""
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET_NAME,
+            workers=settings.STORAGE_WORKERS,
+            presign_expires=settings.STORAGE_PRESIGN_EXPIRES_SECONDS,
+            part_size=settings.STORAGE_MULTIPART_CHUNK_BYTES,
+            region=settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            access_key_id=settings.AWS_ACCESS_KEY_ID,
+            secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        )
+    if backend == "local":
+        return LocalStorage(
+            root=settings.LOCAL_STORAGE_DIR,
+            secret_key=settings.SECRET_KEY,
+            workers=settings.STORAGE_WORKERS,
+            presign_expires=settings.STORAGE_PRESIGN_EXPIRES_SECONDS,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+storage = create_storage()
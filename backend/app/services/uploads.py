@@ -0,0 +1,48 @@
+# backend/app/services/uploads.py
+"""
+อ่านไฟล์อัปโหลด/request body แบบจำกัดขนาด (ใช้กับไฟล์ทุกชนิด: รูป, CSV/NDJSON, PUT ไปที่ storage)
+หยุดอ่านทันทีเมื่อขนาดเกิน ไม่อ่านทั้งก้อนเข้า memory ก่อนแล้วค่อยตรวจ
+"""
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import UploadFile
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """ไฟล์หรือ body ที่อัปโหลดใหญ่เกินขนาดที่กำหนด"""
+
+
+async def limit_chunks(chunks: AsyncIterable[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """ส่งต่อ chunk จาก iterator และ raise UploadTooLargeError ทันทีเมื่อขนาดรวมเกิน max_bytes"""
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLargeError(f"Upload must be at most {max_bytes} bytes")
+        yield chunk
+
+
+async def iter_upload(upload: UploadFile, max_bytes: int) -> AsyncIterator[bytes]:
+    """อ่าน UploadFile ทีละ chunk และหยุดทันทีเมื่อขนาดเกิน max_bytes (ส่งต่อให้ storage.save_stream ได้โดยตรง)"""
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(f"Upload must be at most {max_bytes} bytes")
+
+    async def chunks():
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    async for chunk in limit_chunks(chunks(), max_bytes):
+        yield chunk
+
+
+async def read_upload_limited(upload: UploadFile, max_bytes: int) -> bytes:
+    """อ่าน UploadFile ทั้งไฟล์ (ใช้เมื่อต้องการ bytes ทั้งก้อน) โดยจำกัดขนาด"""
+    buffer = bytearray()
+    async for chunk in iter_upload(upload, max_bytes):
+        buffer.extend(chunk)
+    return bytes(buffer)
@@ -0,0 +1,57 @@
+# backend/app/services/user_export_service.py
+"""
+Export ผู้ใช้เป็น NDJSON หรือ CSV ทีละ chunk (ใช้ทั้ง GET /users/export แบบ streaming และงาน background "users_export")
+"""
+import csv
+import io
+import json
+import uuid
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.user_crud import stream_users
+
+EXPORT_CSV_FIELDS = [
+    "user_id", "username", "first_name", "last_name", "email", "student_id", "teacher_id",
+    "is_active", "created_at", "updated_at", "last_login_at", "roles",
+]
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _export_record(row, roles: List[str]) -> dict:
+    record = {field: getattr(row, field) for field in EXPORT_CSV_FIELDS if field != "roles"}
+    record["user_id"] = str(row.user_id)
+    for field in ("created_at", "updated_at", "last_login_at"):
+        record[field] = record[field].isoformat() if record[field] else None
+    record["roles"] = roles
+    return record
+
+
+async def export_user_chunks(
+    db: AsyncSession,
+    format: str,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    class_id: Optional[uuid.UUID] = None,
+    chunk_bytes: int = 64 * 1024,
+) -> AsyncIterator[str]:
+    """yield เนื้อหาไฟล์ export ทีละประมาณ chunk_bytes (แถวถูกอ่านผ่าน server-side cursor)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS)
+    if format == "csv":
+        writer.writeheader()
+    async for row, roles in stream_users(db, role=role, is_active=is_active, class_id=class_id):
+        record = _export_record(row, roles)
+        if format == "csv":
+            record["roles"] = ";".join(roles)
+            writer.writerow(record)
+        else:
+            buffer.write(json.dumps(record) + "\n")
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
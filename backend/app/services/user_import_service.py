@@ -0,0 +1,249 @@
+# backend/app/services/user_import_service.py
+"""
+Bulk import ผู้ใช้จากไฟล์ CSV/NDJSON (เช่น รายชื่อนักศึกษาใหม่ทั้งเทอม)
+
+- ตรวจ schema ทีละแถว และตรวจ username/email/student_id/teacher_id ซ้ำกันภายในไฟล์
+- ตรวจกับข้อมูลในฐานข้อมูลแบบ set-based (query เดียวต่อ chunk)
+- hash รหัสผ่านพร้อมกันหลายแถวผ่าน password hashing executor
+- insert แบบ multi-row ... ON CONFLICT DO NOTHING ทีละ chunk ใน transaction ของตัวเอง
+  รันซ้ำด้วยไฟล์เดิมได้: ผู้ใช้ที่มีอยู่แล้วจะถูกรายงานเป็น "skipped" และไม่ถูก hash ซ้ำ
+"""
+import asyncio
+import csv
+import io
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_password_hash_async
+from app.models.association import user_roles
+from app.models.role import Role
+from app.models.user import User
+from app.schemas.user_schema import UserImportReport, UserImportRow, UserImportRowResult
+
+# คอลัมน์ที่ต้องไม่ซ้ำกันในตาราง users
+UNIQUE_FIELDS = ("username", "email", "student_id", "teacher_id")
+
+
+class UserImportFormatError(ValueError):
+    """อ่านไฟล์ import ไม่ได้ (รูปแบบไม่ถูกต้อง)"""
+
+
+def _parse_records(content: bytes, file_format: str) -> List[dict]:
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise UserImportFormatError("Import file must be UTF-8 encoded")
+
+    if file_format == "csv":
+        records = []
+        for record in csv.DictReader(io.StringIO(text)):
+            # ช่องว่างใน CSV = ไม่มีค่า, roles คั่นด้วย ; หรือ ,
+            record = {key: (value.strip() or None) if isinstance(value, str) else value for key, value in record.items() if key}
+            roles = record.pop("roles", None) or ""
+            record["roles"] = [name.strip() for name in roles.replace(",", ";").split(";") if name.strip()]
+            records.append(record)
+        return records
+
+    if file_format == "ndjson":
+        records = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise UserImportFormatError(f"Invalid JSON on line {line_number}: {e}")
+            if not isinstance(record, dict):
+                raise UserImportFormatError(f"Line {line_number} is not a JSON object")
+            records.append(record)
+        return records
+
+    raise UserImportFormatError(f"Unsupported import format: {file_format}")
+
+
+def _validate_rows(
+    records: List[dict], known_roles: Dict[str, int]
+) -> Tuple[List[Tuple[int, UserImportRow]], List[UserImportRowResult]]:
+    """ตรวจ schema, roles และค่าที่ซ้ำกันเองภายในไฟล์ คืน (แถวที่ผ่าน, ผลของแถวที่ไม่ผ่าน)"""
+    valid: List[Tuple[int, UserImportRow]] = []
+    failed: List[UserImportRowResult] = []
+    seen: Dict[str, Dict[str, int]] = {field: {} for field in UNIQUE_FIELDS}
+
+    for row_number, record in enumerate(records, start=1):
+        try:
+            row = UserImportRow.model_validate(record)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+            failed.append(UserImportRowResult(row=row_number, username=record.get("username"), status="failed", error=errors))
+            continue
+
+        unknown_roles = [name for name in row.roles if name not in known_roles]
+        if unknown_roles:
+            failed.append(UserImportRowResult(
+                row=row_number, username=row.username, status="failed", error=f"Unknown roles: {', '.join(unknown_roles)}"
+            ))
+            continue
+
+        duplicate = next(
+            (field for field in UNIQUE_FIELDS if getattr(row, field) is not None and getattr(row, field) in seen[field]),
+            None,
+        )
+        if duplicate:
+            failed.append(UserImportRowResult(
+                row=row_number, username=row.username, status="failed",
+                error=f"Duplicate {duplicate} in file (same as row {seen[duplicate][getattr(row, duplicate)]})",
+            ))
+            continue
+
+        for field in UNIQUE_FIELDS:
+            if getattr(row, field) is not None:
+                seen[field][getattr(row, field)] = row_number
+        valid.append((row_number, row))
+    return valid, failed
+
+
+async def _existing_values(db: AsyncSession, rows: List[UserImportRow]) -> Dict[str, Dict[str, str]]:
+    """ค่าของ UNIQUE_FIELDS ที่มีอยู่แล้วในฐานข้อมูล -> username ของเจ้าของ (query เดียว)"""
+    conditions = []
+    for field in UNIQUE_FIELDS:
+        values = {getattr(row, field) for row in rows if getattr(row, field) is not None}
+        if values:
+            conditions.append(getattr(User, field).in_(values))
+    existing: Dict[str, Dict[str, str]] = {field: {} for field in UNIQUE_FIELDS}
+    if not conditions:
+        return existing
+    result = await db.execute(select(*(getattr(User, field) for field in UNIQUE_FIELDS)).where(or_(*conditions)))
+    for record in result:
+        for field in UNIQUE_FIELDS:
+            value = getattr(record, field)
+            if value is not None:
+                existing[field][value] = record.username
+    return existing
+
+
+async def _hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    hash หลายรหัสผ่านพร้อมกัน โดยจำกัดจำนวนงานที่ส่งเข้า executor ไว้เท่ากับจำนวน worker
+    เพื่อไม่ให้ import ใหญ่ๆ ไปเต็มคิวจน login ของผู้ใช้คนอื่นถูกปฏิเสธ
+    """
+    semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+    async def hash_one(password: str) -> str:
+        async with semaphore:
+            return await get_password_hash_async(password)
+
+    return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+
+async def _import_chunk(
+    db: AsyncSession, chunk: List[Tuple[int, UserImportRow]], known_roles: Dict[str, int]
+) -> List[UserImportRowResult]:
+    results: List[UserImportRowResult] = []
+    existing = await _existing_values(db, [row for _, row in chunk])
+
+    to_insert: List[Tuple[int, UserImportRow]] = []
+    for row_number, row in chunk:
+        if row.username in existing["username"]:
+            # import ซ้ำ: ผู้ใช้นี้ถูกสร้างไว้แล้ว
+            results.append(UserImportRowResult(row=row_number, username=row.username, status="skipped", error="User already exists"))
+            continue
+        conflict = next(
+            (field for field in UNIQUE_FIELDS[1:] if getattr(row, field) is not None and getattr(row, field) in existing[field]),
+            None,
+        )
+        if conflict:
+            results.append(UserImportRowResult(
+                row=row_number, username=row.username, status="failed",
+                error=f"{conflict} already used by user '{existing[conflict][getattr(row, conflict)]}'",
+            ))
+            continue
+        to_insert.append((row_number, row))
+
+    if not to_insert:
+        return results
+
+    password_hashes = await _hash_passwords([row.password for _, row in to_insert])
+    values = [
+        {
+            "username": row.username,
+            "password_hash": password_hash,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "email": row.email,
+            "student_id": row.student_id,
+            "teacher_id": row.teacher_id,
+            "is_active": True,
+        }
+        for (_, row), password_hash in zip(to_insert, password_hashes)
+    ]
+
+    try:
+        # ON CONFLICT DO NOTHING กันกรณีมีคนสร้างผู้ใช้เดียวกันระหว่างที่ import อยู่
+        inserted = await db.execute(
+            pg_insert(User).values(values).on_conflict_do_nothing().returning(User.user_id, User.username)
+        )
+        created = {record.username: record.user_id for record in inserted}
+
+        role_links = [
+            {"user_id": created[row.username], "role_id": known_roles[name]}
+            for _, row in to_insert if row.username in created
+            for name in set(row.roles)
+        ]
+        if role_links:
+            await db.execute(pg_insert(user_roles).values(role_links).on_conflict_do_nothing())
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        # รายละเอียดจาก driver (constraint, ค่าในแถว) อยู่ใน log เท่านั้น ไม่ส่งกลับไปในรายงาน
+        print(f"User import chunk failed ({len(to_insert)} rows): {e!r}")
+        results.extend(
+            UserImportRowResult(row=row_number, username=row.username, status="failed", error="Database error while creating user")
+            for row_number, row in to_insert
+        )
+        return results
+
+    for row_number, row in to_insert:
+        if row.username in created:
+            results.append(UserImportRowResult(row=row_number, username=row.username, status="created", user_id=created[row.username]))
+        else:
+            results.append(UserImportRowResult(
+                row=row_number, username=row.username, status="skipped", error="User was created concurrently"
+            ))
+    return results
+
+
+async def import_users(
+    db: AsyncSession,
+    content: bytes,
+    file_format: str,
+    chunk_size: Optional[int] = None,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+) -> UserImportReport:
+    """
+    Import ผู้ใช้จากเนื้อหาไฟล์ CSV หรือ NDJSON แล้วคืนรายงานผลรายแถว
+    on_chunk(done, total) ถูกเรียกหลังแต่ละ chunk ถูก commit (ใช้รายงาน progress ของ background job)
+    """
+    records = _parse_records(content, file_format)
+    known_roles = {name: role_id for role_id, name in (await db.execute(select(Role.id, Role.name))).all()}
+    valid, results = _validate_rows(records, known_roles)
+
+    chunk_size = chunk_size or settings.USER_IMPORT_CHUNK_SIZE
+    for start in range(0, len(valid), chunk_size):
+        results.extend(await _import_chunk(db, valid[start:start + chunk_size], known_roles))
+        if on_chunk is not None:
+            on_chunk(min(start + chunk_size, len(valid)), len(valid))
+
+    results.sort(key=lambda result: result.row)
+    return UserImportReport(
+        total=len(records),
+        created=sum(1 for result in results if result.status == "created"),
+        skipped=sum(1 for result in results if result.status == "skipped"),
+        failed=sum(1 for result in results if result.status == "failed"),
+        rows=results,
+    )
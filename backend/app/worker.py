@@ -0,0 +1,43 @@
+# backend/app/worker.py
+"""
+Worker process ของงาน background: python -m app.worker [--types user_import,users_export] [--concurrency 4]
+รันได้หลาย process/หลายเครื่องพร้อมกัน (ดึงงานด้วย SKIP LOCKED จึงไม่ได้งานซ้ำกัน)
+SIGTERM/SIGINT: หยุดดึงงานใหม่และรองานที่กำลังทำให้เสร็จ
+"""
+import argparse
+import asyncio
+import signal
+
+from app.core.security import password_hasher
+from app.services import jobs # noqa: F401 (ลงทะเบียน job types)
+from app.services.job_queue import JOB_TYPES, JobWorker
+from app.services.storage_service import storage
+
+
+async def _main(types, concurrency):
+    worker = JobWorker(types=types, concurrency=concurrency)
+    worker.types # ตรวจชื่อ job type ก่อนเริ่ม (ValueError ถ้าไม่รู้จัก)
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+
+    run_task = asyncio.create_task(worker.run())
+    await stopping.wait()
+    print("Job worker stopping: waiting for running jobs...")
+    await worker.stop()
+    await run_task
+    password_hasher.shutdown()
+    storage.shutdown()
+    print(f"Job worker stopped: {worker.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs from the jobs table.")
+    parser.add_argument(
+        "--types", default=None,
+        help=f"job types ที่รับ คั่นด้วย comma (ค่าเริ่มต้น = ทั้งหมด: {', '.join(sorted(JOB_TYPES))})",
+    )
+    parser.add_argument("--concurrency", type=int, default=None, help="งานที่ทำพร้อมกันได้สูงสุด (ค่าเริ่มต้น JOB_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.types.split(",") if args.types else None, args.concurrency))
@@ -0,0 +1,66 @@
+# backend/migrations/env.py
+"""
+Alembic environment ของ backend
+
+- CLI (จากโฟลเดอร์ backend): alembic upgrade head, alembic revision --autogenerate -m "..."
+- ตอน startup app.core.migrations เรียก upgrade ผ่าน connection ของตัวเอง (config.attributes["connection"])
+  ซึ่งถือ advisory lock อยู่ เพื่อไม่ให้หลาย worker process migrate พร้อมกัน
+"""
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, pool
+
+from alembic import context
+
+from app.core.config import settings
+from app.database import Base
+import app.models # noqa: F401 (ลงทะเบียนทุกตารางใน Base.metadata)
+from app.services.attendance_partitions import PARTITION_NAME
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # partition รายเดือนของ attendance ถูกสร้าง/ลบโดย app.services.attendance_partitions ไม่ใช่ migration
+    if type_ == "table" and reflected and compare_to is None and PARTITION_NAME.match(name):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """สร้าง SQL script โดยไม่ต่อฐานข้อมูล (alembic upgrade head --sql)"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with_connection(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        _run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
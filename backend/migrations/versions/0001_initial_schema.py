@@ -0,0 +1,138 @@
+"""initial schema
+
+schema เดิมของโปรเจกต์ (ก่อนเพิ่ม face encoding, class session, partition ฯลฯ) ตามที่ create_all เคยสร้าง
+การเปลี่ยนแปลงหลังจากนั้นอยู่ใน revision ถัดไปทั้งหมด
+ฐานข้อมูลเดิมที่ไม่มี alembic_version จะถูก stamp เป็น revision ที่ schema ตรงกัน (ดู app/core/migrations.py)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 20:48:56.309276
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('permissions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_permissions_id'), 'permissions', ['id'], unique=False)
+    op.create_index(op.f('ix_permissions_name'), 'permissions', ['name'], unique=True)
+    op.create_table('roles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_roles_id'), 'roles', ['id'], unique=False)
+    op.create_index(op.f('ix_roles_name'), 'roles', ['name'], unique=True)
+    op.create_table('users',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('first_name', sa.String(length=60), nullable=True),
+    sa.Column('last_name', sa.String(length=60), nullable=True),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('student_id', sa.String(length=20), nullable=True),
+    sa.Column('teacher_id', sa.String(length=20), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('last_login_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_student_id'), 'users', ['student_id'], unique=True)
+    op.create_index(op.f('ix_users_teacher_id'), 'users', ['teacher_id'], unique=True)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('classes',
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('teacher_id', sa.UUID(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['teacher_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('class_id')
+    )
+    op.create_index(op.f('ix_classes_name'), 'classes', ['name'], unique=True)
+    op.create_table('role_permissions',
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('permission_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['permission_id'], ['permissions.id'], ),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+    sa.PrimaryKeyConstraint('role_id', 'permission_id')
+    )
+    op.create_table('user_face_samples',
+    sa.Column('sample_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('sample_id')
+    )
+    op.create_table('user_roles',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'role_id')
+    )
+    op.create_table('attendance',
+    sa.Column('attendance_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('is_manual_override', sa.Boolean(), nullable=True),
+    sa.Column('recorded_by_user_id', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ),
+    sa.ForeignKeyConstraint(['recorded_by_user_id'], ['users.user_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('attendance_id')
+    )
+    op.create_table('class_students',
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('class_id', 'student_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('class_students')
+    op.drop_table('attendance')
+    op.drop_table('user_roles')
+    op.drop_table('user_face_samples')
+    op.drop_table('role_permissions')
+    op.drop_index(op.f('ix_classes_name'), table_name='classes')
+    op.drop_table('classes')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_teacher_id'), table_name='users')
+    op.drop_index(op.f('ix_users_student_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_roles_name'), table_name='roles')
+    op.drop_index(op.f('ix_roles_id'), table_name='roles')
+    op.drop_table('roles')
+    op.drop_index(op.f('ix_permissions_name'), table_name='permissions')
+    op.drop_index(op.f('ix_permissions_id'), table_name='permissions')
+    op.drop_table('permissions')
@@ -0,0 +1,37 @@
+"""face sample encodings and derivatives
+
+face encoding ที่คำนวณไว้ล่วงหน้า (ไม่ต้อง decode รูปใหม่ตอนโหลด face index)
+และ key ของรูปย่อ/ใบหน้าที่ครอปแล้ว (app.services.face_derivatives)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 21:05:12.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_face_samples', sa.Column('face_encoding', sa.LargeBinary(), nullable=True))
+    op.add_column('user_face_samples', sa.Column('encoding_model', sa.String(length=50), nullable=True))
+    op.add_column('user_face_samples', sa.Column('encoded_at', sa.DateTime(), nullable=True))
+    op.add_column('user_face_samples', sa.Column('derivatives', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_face_samples', 'derivatives')
+    op.drop_column('user_face_samples', 'encoded_at')
+    op.drop_column('user_face_samples', 'encoding_model')
+    op.drop_column('user_face_samples', 'face_encoding')
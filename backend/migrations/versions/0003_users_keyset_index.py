@@ -0,0 +1,33 @@
+"""users keyset index and class roster version
+
+index (created_at, user_id) สำหรับ keyset pagination ของ /users/
+และ classes.roster_version สำหรับ roster snapshot ที่ cache ไว้
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 21:06:40.502917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at_user_id', 'users', ['created_at', 'user_id'], unique=False)
+    op.add_column('classes', sa.Column('roster_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('classes', 'roster_version')
+    op.drop_index('ix_users_created_at_user_id', table_name='users')
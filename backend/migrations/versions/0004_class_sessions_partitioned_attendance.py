@@ -0,0 +1,174 @@
+"""class sessions and partitioned attendance
+
+- ตาราง class_sessions (หนึ่ง session ต่อคลาสต่อวันตามเวลาวิทยาเขต)
+- attendance มี session_id/session_date, unique (class_id, session_id, student_id, session_date)
+  และบน PostgreSQL เป็น PARTITION BY RANGE (session_date) (partition รายเดือนสร้างโดย app.services.attendance_partitions)
+
+ตารางที่มีอยู่แปลงเป็น partitioned table โดยตรงไม่ได้ จึงสร้างตารางใหม่แล้ว copy แถวเดิม:
+session ของแต่ละคลาสสร้างจากวันของ timestamp ตามเวลาวิทยาเขต (CAMPUS_TIMEZONE, timestamp เก็บเป็น UTC)
+และถ้านักเรียนมีหลายแถวในวันเดียวกัน
+เก็บแถวเดียวตามกติกาเดียวกับ attendance writer (แก้ด้วยมือ > present > ล่าสุด)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 21:09:27.731650
+
+"""
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BASELINE_COLUMNS = 'attendance_id, class_id, student_id, "timestamp", status, is_manual_override, recorded_by_user_id'
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _sql_now() -> str:
+    # เวลาแบบ naive UTC เหมือนที่ UTCDateTime เก็บ
+    return "(now() AT TIME ZONE 'UTC')" if _is_postgresql() else 'CURRENT_TIMESTAMP'
+
+
+def _session_day(column: str) -> str:
+    # วันตามเวลาวิทยาเขต (ตรงกับ class_session_service.campus_date) ไม่ใช่วัน UTC
+    if _is_postgresql():
+        return f"CAST((COALESCE({column}, {_sql_now()}) AT TIME ZONE 'UTC') AT TIME ZONE :campus_tz AS DATE)"
+    return f'campus_date(COALESCE({column}, {_sql_now()}))'
+
+
+def _campus_date(value: Optional[str]) -> Optional[str]:
+    # SQLite ไม่มี time zone: แปลงใน Python (timestamp เป็นข้อความ naive UTC)
+    if value is None:
+        return None
+    moment = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    return moment.astimezone(ZoneInfo(settings.CAMPUS_TIMEZONE)).date().isoformat()
+
+
+def _execute(sql: str):
+    statement = sa.text(sql)
+    if _is_postgresql():
+        statement = statement.bindparams(campus_tz=settings.CAMPUS_TIMEZONE)
+    op.execute(statement)
+
+
+def _rename_primary_key(table: str, old: str, new: str):
+    # ชื่อ index ของ primary key ใน PostgreSQL ต้องไม่ซ้ำทั้ง schema จึงต้องเปลี่ยนตามชื่อตาราง
+    if _is_postgresql():
+        op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {old} TO {new}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('class_sessions',
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('session_date', sa.Date(), nullable=False),
+    sa.Column('starts_at', sa.DateTime(), nullable=True),
+    sa.Column('ends_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('session_id'),
+    sa.UniqueConstraint('class_id', 'session_date', name='uq_class_sessions_class_date')
+    )
+
+    op.rename_table('attendance', 'attendance_legacy')
+    _rename_primary_key('attendance_legacy', 'attendance_pkey', 'attendance_legacy_pkey')
+    op.create_table('attendance',
+    sa.Column('attendance_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('session_date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('is_manual_override', sa.Boolean(), nullable=True),
+    sa.Column('recorded_by_user_id', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ),
+    sa.ForeignKeyConstraint(['recorded_by_user_id'], ['users.user_id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['class_sessions.session_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('attendance_id', 'session_date'),
+    sa.UniqueConstraint('class_id', 'session_id', 'student_id', 'session_date', name='uq_attendance_class_session_student'),
+    postgresql_partition_by='RANGE (session_date)'
+    )
+
+    new_uuid = 'gen_random_uuid()' if _is_postgresql() else 'lower(hex(randomblob(16)))'
+    if not _is_postgresql():
+        op.get_bind().connection.driver_connection.create_function('campus_date', 1, _campus_date, deterministic=True)
+    day = _session_day('"timestamp"')
+    _execute(
+        f'INSERT INTO class_sessions (session_id, class_id, session_date, created_at) '
+        f'SELECT {new_uuid}, class_id, session_date, {_sql_now()} '
+        f'FROM (SELECT DISTINCT class_id, {day} AS session_date FROM attendance_legacy) AS days'
+    )
+    if _is_postgresql():
+        # แถวเดิมต้องมี partition รองรับก่อน copy (ชื่อเดียวกับ attendance_partitions.partition_name)
+        op.execute("""
+            DO $$
+            DECLARE part_month date;
+            BEGIN
+                FOR part_month IN SELECT DISTINCT CAST(date_trunc('month', session_date) AS date) FROM class_sessions LOOP
+                    EXECUTE format(
+                        'CREATE TABLE IF NOT EXISTS %I PARTITION OF attendance FOR VALUES FROM (%L) TO (%L)',
+                        'attendance_y' || to_char(part_month, 'YYYY') || 'm' || to_char(part_month, 'MM'),
+                        part_month, CAST(part_month + interval '1 month' AS date)
+                    );
+                END LOOP;
+            END $$
+        """)
+    _execute(f"""
+        INSERT INTO attendance (
+            attendance_id, class_id, session_id, student_id, "timestamp", session_date,
+            status, is_manual_override, recorded_by_user_id
+        )
+        SELECT r.attendance_id, r.class_id, s.session_id, r.student_id, r."timestamp", r.session_date,
+               r.status, r.is_manual_override, r.recorded_by_user_id
+        FROM (
+            SELECT a.*, {day} AS session_date,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY a.class_id, a.student_id, {day}
+                       ORDER BY CASE WHEN a.is_manual_override THEN 0 ELSE 1 END,
+                                CASE WHEN a.status = 'present' THEN 0 ELSE 1 END,
+                                a."timestamp" DESC
+                   ) AS keep_rank
+            FROM attendance_legacy AS a
+        ) AS r
+        JOIN class_sessions AS s ON s.class_id = r.class_id AND s.session_date = r.session_date
+        WHERE r.keep_rank = 1
+    """)
+    op.drop_table('attendance_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('attendance', 'attendance_partitioned')
+    _rename_primary_key('attendance_partitioned', 'attendance_pkey', 'attendance_partitioned_pkey')
+    op.create_table('attendance',
+    sa.Column('attendance_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('is_manual_override', sa.Boolean(), nullable=True),
+    sa.Column('recorded_by_user_id', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ),
+    sa.ForeignKeyConstraint(['recorded_by_user_id'], ['users.user_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('attendance_id')
+    )
+    op.execute(f'INSERT INTO attendance ({BASELINE_COLUMNS}) SELECT {BASELINE_COLUMNS} FROM attendance_partitioned')
+    op.drop_table('attendance_partitioned') # partition ทั้งหมดถูก drop ไปด้วย
+    op.drop_table('class_sessions')
@@ -0,0 +1,97 @@
+"""attendance rollup tables
+
+ตารางสรุปการเข้าเรียนต่อ session / ต่อนักเรียนในคลาส / ต่อวัน (อัปเดตแบบ delta โดย app.services.attendance_rollups)
+ค่าเริ่มต้นคำนวณจากแถว attendance ที่มีอยู่ด้วย GROUP BY ครั้งเดียวต่อตาราง
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 21:12:03.264815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ค่าของ AttendanceStatus ณ revision นี้
+STATUSES = ['present', 'late', 'absent', 'left_early', 'unverified_face', 'manual_override']
+COUNT_NAMES = ', '.join(STATUSES + ['total'])
+COUNT_VALUES = ', '.join(
+    [f"SUM(CASE WHEN status = '{status}' THEN 1 ELSE 0 END)" for status in STATUSES] + ['COUNT(*)']
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attendance_daily_stats',
+    sa.Column('stat_date', sa.Date(), nullable=False),
+    sa.Column('present', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('late', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('absent', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('left_early', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('unverified_face', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('manual_override', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('stat_date')
+    )
+    op.create_table('attendance_student_stats',
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('present', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('late', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('absent', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('left_early', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('unverified_face', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('manual_override', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('class_id', 'student_id')
+    )
+    op.create_index(op.f('ix_attendance_student_stats_student_id'), 'attendance_student_stats', ['student_id'], unique=False)
+    op.create_table('attendance_session_stats',
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('class_id', sa.UUID(), nullable=False),
+    sa.Column('session_date', sa.Date(), nullable=False),
+    sa.Column('present', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('late', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('absent', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('left_early', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('unverified_face', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('manual_override', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.class_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['session_id'], ['class_sessions.session_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index(op.f('ix_attendance_session_stats_class_id'), 'attendance_session_stats', ['class_id'], unique=False)
+
+    op.execute(
+        f'INSERT INTO attendance_session_stats (session_id, class_id, session_date, {COUNT_NAMES}) '
+        f'SELECT session_id, class_id, session_date, {COUNT_VALUES} FROM attendance '
+        f'GROUP BY session_id, class_id, session_date'
+    )
+    op.execute(
+        f'INSERT INTO attendance_student_stats (class_id, student_id, {COUNT_NAMES}) '
+        f'SELECT class_id, student_id, {COUNT_VALUES} FROM attendance GROUP BY class_id, student_id'
+    )
+    op.execute(
+        f'INSERT INTO attendance_daily_stats (stat_date, {COUNT_NAMES}) '
+        f'SELECT session_date, {COUNT_VALUES} FROM attendance GROUP BY session_date'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attendance_session_stats_class_id'), table_name='attendance_session_stats')
+    op.drop_table('attendance_session_stats')
+    op.drop_index(op.f('ix_attendance_student_stats_student_id'), table_name='attendance_student_stats')
+    op.drop_table('attendance_student_stats')
+    op.drop_table('attendance_daily_stats')
@@ -0,0 +1,35 @@
+"""users.created_at not null
+
+created_at เป็น key ของ keyset pagination ของ /users/ แถวที่เป็น NULL จะหลุดจากทุกหน้า
+แถวเดิมที่ไม่มีค่าใช้ updated_at (หรือเวลาปัจจุบัน) แทน
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 21:31:44.902163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    now = "(now() AT TIME ZONE 'UTC')" if op.get_context().dialect.name == 'postgresql' else 'CURRENT_TIMESTAMP'
+    op.execute(f'UPDATE users SET created_at = COALESCE(updated_at, {now}) WHERE created_at IS NULL')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
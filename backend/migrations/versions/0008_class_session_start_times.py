@@ -0,0 +1,67 @@
+"""class sessions keyed by start time
+
+หนึ่งคลาสมีได้หลาย session ต่อวัน: unique (class_id, starts_at) แทน (class_id, session_date) และ starts_at ต้องมีค่า
+session เดิม (หนึ่งต่อวัน) ได้ starts_at เป็นเที่ยงคืนของ session_date ตามเวลาของวิทยาเขต (CAMPUS_TIMEZONE)
+ซึ่งเป็น session ของทั้งวันแบบเดียวกับที่ app.services.class_session_service สร้าง
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 22:48:12.317405
+
+"""
+from datetime import datetime, time, timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _backfill_starts_at():
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute(
+            sa.text(
+                "UPDATE class_sessions "
+                "SET starts_at = (CAST(session_date AS timestamp) AT TIME ZONE :tz) AT TIME ZONE 'UTC' "
+                "WHERE starts_at IS NULL"
+            ).bindparams(tz=settings.CAMPUS_TIMEZONE)
+        )
+        return
+
+    campus_tz = ZoneInfo(settings.CAMPUS_TIMEZONE)
+    bind = op.get_bind()
+    sessions = sa.table(
+        'class_sessions',
+        sa.column('session_id'), sa.column('session_date', sa.Date()), sa.column('starts_at', sa.DateTime()),
+    )
+    rows = bind.execute(sa.select(sessions.c.session_id, sessions.c.session_date).where(sessions.c.starts_at.is_(None))).all()
+    for session_id, session_date in rows:
+        starts_at = datetime.combine(session_date, time(), tzinfo=campus_tz).astimezone(timezone.utc).replace(tzinfo=None)
+        bind.execute(sessions.update().where(sessions.c.session_id == session_id).values(starts_at=starts_at))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _backfill_starts_at()
+    with op.batch_alter_table('class_sessions') as batch_op:
+        batch_op.drop_constraint('uq_class_sessions_class_date', type_='unique')
+        batch_op.alter_column('starts_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_unique_constraint('uq_class_sessions_class_starts_at', ['class_id', 'starts_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ย้อนกลับได้เฉพาะเมื่อยังมีไม่เกินหนึ่ง session ต่อคลาสต่อวัน
+    with op.batch_alter_table('class_sessions') as batch_op:
+        batch_op.drop_constraint('uq_class_sessions_class_starts_at', type_='unique')
+        batch_op.alter_column('starts_at', existing_type=sa.DateTime(), nullable=True)
+        batch_op.create_unique_constraint('uq_class_sessions_class_date', ['class_id', 'session_date'])
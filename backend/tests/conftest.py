@@ -0,0 +1,75 @@
+# backend/tests/conftest.py
+"""
+ตั้งค่าสำหรับ unit tests (รันจากโฟลเดอร์ backend: pip install -r requirements-dev.txt แล้ว python -m pytest)
+
+ใช้ SQLite ไฟล์ชั่วคราวแทน PostgreSQL: ทดสอบ logic ที่ไม่ขึ้นกับ feature เฉพาะของ PostgreSQL
+(advisory lock, SKIP LOCKED, partition ถูกข้ามบน SQLite อยู่แล้ว)
+ต้องตั้ง environment ก่อน import app.* เพราะ Settings อ่านค่าตอน import
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="face-attendance-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["LOCAL_STORAGE_DIR"] = os.path.join(_tmp, "storage")
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db_engine():
+    """สร้างตารางทั้งหมดใหม่ทุก test (ไฟล์ SQLite เดียวกับ engine ของ app)"""
+    import app.models  # noqa: F401
+    from app.database import Base, engine
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+async def async_db(db_engine):
+    from app.database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as session:
+        yield session
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def class_session(async_db):
+    """อาจารย์ 1 คน, นักเรียน 2 คน และคลาสที่มี session หนึ่งครั้ง คืน SimpleNamespace ของ id ต่างๆ"""
+    import uuid
+    from datetime import date
+    from types import SimpleNamespace
+
+    from app.models import Class, ClassSession, User
+    from app.services.class_session_service import campus_day_start
+
+    teacher, *students = [
+        User(user_id=uuid.uuid4(), username=name, email=f"{name}@example.com", password_hash="x")
+        for name in ("teacher", "student1", "student2")
+    ]
+    classroom = Class(class_id=uuid.uuid4(), name="Algorithms", teacher_id=teacher.user_id)
+    session = ClassSession(
+        session_id=uuid.uuid4(), class_id=classroom.class_id,
+        session_date=date(2026, 3, 2), starts_at=campus_day_start(date(2026, 3, 2)),
+    )
+    async_db.add_all([teacher, *students, classroom, session])
+    await async_db.commit()
+    return SimpleNamespace(
+        teacher_id=teacher.user_id,
+        student_ids=[student.user_id for student in students],
+        class_id=classroom.class_id,
+        session_id=session.session_id,
+        session_date=session.session_date,
+    )
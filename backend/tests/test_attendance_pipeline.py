@@ -0,0 +1,165 @@
+# backend/tests/test_attendance_pipeline.py
+import asyncio
+import json
+import time
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.core import invalidation as invalidation_module
+from app.core.invalidation import invalidation_bus
+from app.models import Attendance
+from app.services.attendance_feed import attendance_feed
+from app.services.attendance_pipeline import AttendanceBufferFullError, AttendanceEvent, AttendanceWriter, _merge
+
+pytestmark = pytest.mark.anyio
+
+
+def _event(status, manual=False, ctx=None, student=0, minute=0):
+    return AttendanceEvent(
+        class_id=ctx.class_id if ctx else uuid.uuid4(),
+        session_id=ctx.session_id if ctx else uuid.uuid4(),
+        student_id=ctx.student_ids[student] if ctx else uuid.uuid4(),
+        status=status,
+        timestamp=datetime(2026, 3, 2, 8, minute),
+        session_date=ctx.session_date if ctx else date(2026, 3, 2),
+        is_manual_override=manual,
+    )
+
+
+@pytest.mark.parametrize(
+    "current, new, expected",
+    [
+        (("late", False), ("present", False), "new"), # สถานะที่ดีกว่าแทนได้
+        (("present", False), ("late", False), "current"), # ไม่ลด present ที่บันทึกแล้ว
+        (("late", False), ("absent", False), "new"), # อย่างอื่นใช้ event ล่าสุด
+        (("present", False), ("absent", True), "new"), # แก้ด้วยมือชนะเสมอ
+        (("absent", True), ("present", False), "current"), # check-in ไม่ทับการแก้ด้วยมือ
+        (("absent", True), ("late", True), "new"), # แก้ด้วยมือครั้งล่าสุดชนะ
+    ],
+)
+def test_merge_rules(current, new, expected):
+    current_event, new_event = _event(*current), _event(*new)
+    assert _merge(current_event, new_event) is (new_event if expected == "new" else current_event)
+
+
+def _writer(**overrides):
+    options = {"flush_size": 100, "flush_interval_ms": 5, "max_buffer": 1000}
+    options.update(overrides)
+    return AttendanceWriter(**options)
+
+
+async def _stored(db, ctx, student=0):
+    db.expire_all()
+    return (await db.execute(
+        select(Attendance).where(Attendance.session_id == ctx.session_id, Attendance.student_id == ctx.student_ids[student])
+    )).scalars().all()
+
+
+async def test_events_in_one_flush_are_merged_into_one_row(async_db, class_session):
+    writer = _writer()
+    late, present = await asyncio.gather(
+        writer.submit(_event("late", ctx=class_session, minute=1)),
+        writer.submit(_event("present", ctx=class_session, minute=2)),
+    )
+
+    assert late == present and present.status == "present"
+    rows = await _stored(async_db, class_session)
+    assert [row.status for row in rows] == ["present"]
+    assert writer.stats()["rows_written"] == 1
+
+
+async def test_upsert_applies_merge_rules_against_stored_row(async_db, class_session):
+    writer = _writer(flush_interval_ms=0)
+
+    assert (await writer.submit(_event("present", ctx=class_session, minute=1))).status == "present"
+    # check-in ซ้ำที่แย่กว่าไม่ลดสถานะ และคืนแถวเดิม
+    repeat = await writer.submit(_event("late", ctx=class_session, minute=2))
+    assert repeat.status == "present" and repeat.timestamp == datetime(2026, 3, 2, 8, 1)
+    # อาจารย์แก้ด้วยมือ: ชนะ present
+    assert (await writer.submit(_event("absent", manual=True, ctx=class_session, minute=3))).status == "absent"
+    # check-in หลังจากนั้นไม่ทับการแก้ด้วยมือ
+    assert (await writer.submit(_event("present", ctx=class_session, minute=4))).status == "absent"
+
+    rows = await _stored(async_db, class_session)
+    assert len(rows) == 1
+    assert rows[0].status == "absent" and rows[0].is_manual_override
+
+
+async def test_students_get_separate_rows(async_db, class_session):
+    writer = _writer()
+    await asyncio.gather(
+        writer.submit(_event("present", ctx=class_session, student=0)),
+        writer.submit(_event("late", ctx=class_session, student=1)),
+    )
+    assert [row.status for row in await _stored(async_db, class_session, 0)] == ["present"]
+    assert [row.status for row in await _stored(async_db, class_session, 1)] == ["late"]
+
+
+async def test_full_buffer_is_rejected(class_session):
+    writer = _writer(flush_size=1, max_buffer=1, flush_interval_ms=1000)
+    writer._outstanding = 1 # event ก่อนหน้ายังเขียนไม่เสร็จ
+    with pytest.raises(AttendanceBufferFullError):
+        await writer.submit(_event("present", ctx=class_session))
+
+
+@pytest.fixture
+def notifications(monkeypatch):
+    """ทำให้ bus ของ test ทำงานเหมือนอยู่บน PostgreSQL แล้วเก็บ payload ของ NOTIFY แทนการส่งจริง"""
+    sent = []
+
+    class Connection:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, statement):
+            channel, payload = statement.compile().params.values()
+            sent.append(json.loads(payload))
+
+        async def commit(self):
+            pass
+
+    class Engine:
+        def connect(self):
+            return Connection()
+
+    monkeypatch.setattr(invalidation_bus, "_enabled", True)
+    monkeypatch.setattr(invalidation_module, "async_engine", Engine())
+    return sent
+
+
+async def test_status_changes_reach_local_and_other_workers_feeds(class_session, notifications):
+    subscription = attendance_feed.subscribe(class_session.session_id)
+    try:
+        writer = _writer(flush_interval_ms=0)
+        await writer.submit(_event("present", ctx=class_session, minute=1))
+        await writer.submit(_event("late", ctx=class_session, minute=2)) # ไม่เปลี่ยนสถานะ ไม่มี delta
+
+        message = await subscription.get(timeout=1)
+        assert (message["student_id"], message["status"], message["previous_status"]) == (
+            str(class_session.student_ids[0]), "present", None,
+        )
+        assert subscription.queue.empty()
+        assert [(sent["kind"], json.loads(sent["key"])) for sent in notifications] == [("attendance_feed", message)]
+    finally:
+        attendance_feed.unsubscribe(subscription)
+
+
+async def test_delta_from_another_worker_is_delivered_to_local_subscribers(class_session, monkeypatch):
+    monkeypatch.setattr(invalidation_bus, "_loop", asyncio.get_running_loop())
+    subscription = attendance_feed.subscribe(class_session.session_id)
+    message = {"type": "attendance", "session_id": str(class_session.session_id), "status": "late"}
+    try:
+        # listener thread ได้รับ NOTIFY ที่ worker อื่นส่งหลัง flush
+        await asyncio.to_thread(invalidation_bus._on_notify, json.dumps({
+            "kind": "attendance_feed", "key": json.dumps(message), "origin": "other-worker", "sent_at": time.time(),
+        }))
+
+        assert await subscription.get(timeout=1) == message
+    finally:
+        attendance_feed.unsubscribe(subscription)
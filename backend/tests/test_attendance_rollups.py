@@ -0,0 +1,116 @@
+# backend/tests/test_attendance_rollups.py
+import uuid
+from datetime import date
+
+import pytest
+
+from app.models.attendance_rollup import AttendanceDailyStats, AttendanceSessionStats, AttendanceStudentStats
+from app.services.attendance_pipeline import AttendanceEvent, AttendanceWriter
+from app.services.attendance_rollups import AttendanceChange, _deltas, apply_attendance_changes, rebuild_attendance_rollups
+
+pytestmark = pytest.mark.anyio
+
+COUNT_FIELDS = ("present", "late", "absent", "left_early", "unverified_face", "manual_override", "total")
+
+
+def _change(old, new, student=None, session=None):
+    return AttendanceChange(
+        class_id=uuid.UUID(int=1),
+        session_id=session or uuid.UUID(int=2),
+        student_id=student or uuid.UUID(int=3),
+        session_date=date(2026, 3, 2),
+        old_status=old,
+        new_status=new,
+    )
+
+
+def _counts(row):
+    return {field: getattr(row, field) for field in COUNT_FIELDS if getattr(row, field)}
+
+
+@pytest.mark.parametrize(
+    "old, new, expected",
+    [
+        (None, "present", {"present": 1, "total": 1}), # แถวใหม่
+        ("unverified_face", "present", {"unverified_face": -1, "present": 1}), # เปลี่ยนสถานะ: total ไม่เปลี่ยน
+        ("present", "present", None), # สถานะเดิม: ไม่มี delta
+    ],
+)
+def test_delta_of_single_change(old, new, expected):
+    deltas = _deltas([_change(old, new)], lambda c: c.session_id)
+    assert (dict(deltas[uuid.UUID(int=2)]) if deltas else None) == expected
+
+
+def test_deltas_are_summed_per_key_and_zero_sums_dropped():
+    first, second = uuid.UUID(int=10), uuid.UUID(int=11)
+    changes = [
+        _change(None, "late", student=first),
+        _change(None, "present", student=second),
+        _change("late", "present", student=first),
+        _change("present", "late", student=first),
+    ]
+    by_session = _deltas(changes, lambda c: c.session_id)
+    assert {k: v for k, v in by_session[uuid.UUID(int=2)].items() if v} == {"late": 1, "present": 1, "total": 2}
+    # late -> present -> late ของแถวเดิมหักล้างกันหมด จึงไม่ต้องเขียนตารางสรุป
+    assert _deltas(changes[2:], lambda c: c.student_id) == {}
+
+
+def _rollup_change(ctx, old, new, student=0):
+    return AttendanceChange(
+        class_id=ctx.class_id,
+        session_id=ctx.session_id,
+        student_id=ctx.student_ids[student],
+        session_date=ctx.session_date,
+        old_status=old,
+        new_status=new,
+    )
+
+
+async def test_changes_are_applied_to_every_rollup_table(async_db, class_session):
+    student = class_session.student_ids[0]
+    for changes in (
+        [_rollup_change(class_session, None, "unverified_face")],
+        [_rollup_change(class_session, "unverified_face", "present")],
+    ):
+        await apply_attendance_changes(async_db, changes)
+        await async_db.commit()
+
+    async_db.expire_all()
+    session_stats = await async_db.get(AttendanceSessionStats, class_session.session_id)
+    student_stats = await async_db.get(AttendanceStudentStats, (class_session.class_id, student))
+    daily_stats = await async_db.get(AttendanceDailyStats, class_session.session_date)
+    for row in (session_stats, student_stats, daily_stats):
+        assert _counts(row) == {"present": 1, "total": 1}
+
+
+async def test_writer_updates_rollups_for_check_in_and_override(async_db, class_session):
+    writer = AttendanceWriter(flush_size=100, flush_interval_ms=0, max_buffer=1000)
+
+    def event(status, student=0, manual=False):
+        return AttendanceEvent(
+            class_id=class_session.class_id,
+            session_id=class_session.session_id,
+            session_date=class_session.session_date,
+            student_id=class_session.student_ids[student],
+            status=status,
+            is_manual_override=manual,
+        )
+
+    await writer.submit(event("present"))
+    await writer.submit(event("unverified_face", student=1))
+    # อาจารย์แก้สถานะ: ย้ายจำนวนจาก present ไป absent โดย total ไม่เปลี่ยน
+    await writer.submit(event("absent", manual=True))
+    # check-in ซ้ำที่ไม่เปลี่ยนแถว (การแก้ด้วยมือชนะ) ต้องไม่เปลี่ยนตารางสรุป
+    await writer.submit(event("present"))
+
+    async_db.expire_all()
+    session_stats = await async_db.get(AttendanceSessionStats, class_session.session_id)
+    assert _counts(session_stats) == {"absent": 1, "unverified_face": 1, "total": 2}
+    overridden = await async_db.get(AttendanceStudentStats, (class_session.class_id, class_session.student_ids[0]))
+    assert _counts(overridden) == {"absent": 1, "total": 1}
+
+    # ค่าที่ได้จาก delta ตรงกับการคำนวณใหม่จากข้อมูลดิบ
+    incremental = _counts(session_stats)
+    await rebuild_attendance_rollups(async_db)
+    async_db.expire_all()
+    assert _counts(await async_db.get(AttendanceSessionStats, class_session.session_id)) == incremental
@@ -0,0 +1,33 @@
+# backend/tests/test_class_enrollment.py
+import uuid
+
+import pytest
+
+from app.crud.class_crud import enroll_students, get_class_async
+from app.models import Role
+from app.models.association import user_roles
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_only_users_with_student_role_are_enrolled(async_db, class_session):
+    role = Role(name="student")
+    async_db.add(role)
+    await async_db.flush()
+    student, non_student = class_session.student_ids
+    await async_db.execute(user_roles.insert(), [{"user_id": student, "role_id": role.id}])
+    await async_db.commit()
+    db_class = await get_class_async(async_db, class_session.class_id)
+    initial_version, missing = db_class.roster_version, uuid.uuid4()
+
+    version, enrolled, already, not_found, rejected = await enroll_students(
+        async_db, db_class, [student, non_student, class_session.teacher_id, missing, student],
+    )
+
+    assert enrolled == [student] and already == []
+    assert not_found == [missing]
+    assert rejected == [non_student, class_session.teacher_id]
+    assert version == initial_version + 1
+
+    version, enrolled, already, _, _ = await enroll_students(async_db, db_class, [student])
+    assert (version, enrolled, already) == (initial_version + 1, [], [student])
@@ -0,0 +1,76 @@
+# backend/tests/test_class_sessions.py
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models import ClassSession
+from app.services.class_session_service import ClassSessionResolver, campus_date, campus_day_start
+
+pytestmark = pytest.mark.anyio
+
+DAY = date(2026, 3, 2)
+
+
+def _utc(hour, minute=0, day=DAY):
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+
+
+async def _add_session(db, class_id, starts_at, ends_at):
+    session = ClassSession(
+        session_id=uuid.uuid4(), class_id=class_id, session_date=campus_date(starts_at), starts_at=starts_at, ends_at=ends_at,
+    )
+    db.add(session)
+    await db.commit()
+    return session.session_id
+
+
+def test_campus_date_uses_campus_timezone():
+    # 23:30 UTC = 06:30 ของวันถัดไปที่ Asia/Bangkok
+    assert campus_date(_utc(23, 30, day=date(2026, 3, 1))) == DAY
+    assert campus_day_start(DAY) == _utc(17, day=date(2026, 3, 1))
+
+
+async def test_check_in_before_seven_local_is_filed_under_the_local_date(async_db, class_session):
+    resolver = ClassSessionResolver()
+    resolved = await resolver.resolve(async_db, class_session.class_id, at=_utc(23, 30, day=date(2026, 3, 1)))
+    assert resolved.session_id == class_session.session_id
+    assert resolved.session_date == DAY
+
+
+async def test_two_sessions_on_the_same_day(async_db, class_session):
+    # 09:00-10:30 และ 13:00-14:30 เวลาไทย
+    morning = await _add_session(async_db, class_session.class_id, _utc(2), _utc(3, 30))
+    afternoon = await _add_session(async_db, class_session.class_id, _utc(6), _utc(7, 30))
+    resolver = ClassSessionResolver()
+
+    assert (await resolver.resolve(async_db, class_session.class_id, at=_utc(1, 50))).session_id == morning
+    assert (await resolver.resolve(async_db, class_session.class_id, at=_utc(6, 10))).session_id == afternoon
+    # ระหว่างคาบเข้า session ของทั้งวัน
+    assert (await resolver.resolve(async_db, class_session.class_id, at=_utc(4))).session_id == class_session.session_id
+
+
+async def test_all_day_session_is_created_once(async_db, class_session):
+    resolver = ClassSessionResolver()
+    next_day = date(2026, 3, 3)
+    first = await resolver.resolve(async_db, class_session.class_id, at=_utc(3, day=next_day))
+    # resolver อีกตัว (worker อื่น) ได้ session เดียวกัน
+    second = await ClassSessionResolver().resolve(async_db, class_session.class_id, at=_utc(4, day=next_day))
+
+    assert first.session_id == second.session_id
+    assert first.session_date == next_day
+    assert first.starts_at == campus_day_start(next_day)
+    rows = (await async_db.execute(select(ClassSession).where(ClassSession.session_date == next_day))).scalars().all()
+    assert len(rows) == 1
+
+
+async def test_new_session_is_seen_after_invalidation(async_db, class_session):
+    resolver = ClassSessionResolver()
+    at = _utc(2, 5)
+    assert (await resolver.resolve(async_db, class_session.class_id, at=at)).session_id == class_session.session_id
+
+    lecture = await _add_session(async_db, class_session.class_id, _utc(2), _utc(3))
+    assert (await resolver.resolve(async_db, class_session.class_id, at=at)).session_id == class_session.session_id
+    resolver.invalidate_class(class_session.class_id)
+    assert (await resolver.resolve(async_db, class_session.class_id, at=at)).session_id == lecture
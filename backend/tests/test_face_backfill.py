@@ -0,0 +1,55 @@
+# backend/tests/test_face_backfill.py
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.models import UserFaceSample
+from app.models.job import Job
+from app.services import face_backfill as backfill_module
+from app.services import jobs as jobs_module
+from app.services.face_recognition_service import FACE_ENCODING_MODEL, encoding_to_bytes
+from app.services.job_queue import JobContext
+
+pytestmark = pytest.mark.anyio
+
+
+def _fake_encode(job):
+    sample_id, image_url = job
+    if image_url == "broken":
+        return sample_id, None, "no face detected"
+    return sample_id, encoding_to_bytes(np.ones(128)), None
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    # ไม่ต้อง detect ใบหน้าจริงหรือแตก process ใน test
+    monkeypatch.setattr(backfill_module, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(backfill_module, "_encode_sample", _fake_encode)
+
+
+async def test_backfill_job_reloads_faces_of_encoded_users(async_db, class_session, fake_pool, monkeypatch):
+    first, second = class_session.student_ids
+    async_db.add_all([
+        UserFaceSample(sample_id=uuid.uuid4(), user_id=first, image_url="a"),
+        UserFaceSample(sample_id=uuid.uuid4(), user_id=first, image_url="b"),
+        UserFaceSample(sample_id=uuid.uuid4(), user_id=second, image_url="broken"),
+    ])
+    await async_db.commit()
+    published = []
+
+    async def invalidate_user_faces(user_id, local=True):
+        published.append(user_id)
+
+    monkeypatch.setattr(jobs_module, "invalidate_user_faces", invalidate_user_faces)
+    ctx = JobContext(Job(job_id=uuid.uuid4(), job_type="face_backfill", payload={"workers": 1}, attempts=1))
+
+    summary = await jobs_module.run_face_backfill(ctx)
+
+    assert summary == {"encoded": 2, "failed": 1}
+    # ผู้ใช้ที่ไม่มี sample ใดได้ encoding ใหม่ไม่ต้องโหลดใหม่
+    assert published == [first]
+    models = await async_db.scalars(select(UserFaceSample.encoding_model).where(UserFaceSample.user_id == first))
+    assert set(models) == {FACE_ENCODING_MODEL}
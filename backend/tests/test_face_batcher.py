@@ -0,0 +1,96 @@
+# backend/tests/test_face_batcher.py
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+
+from app.services.face_batcher import FaceCheckInBatcher
+from app.services.face_encoder_pool import EncoderBusyError
+from app.services.face_recognition_service import FACE_ENCODING_DIM, FaceEmbeddingIndex
+
+pytestmark = pytest.mark.anyio
+
+
+class FakePool:
+    """แทน FaceEncoderPool: คืนผลตาม results (ค่า, None หรือ exception ต่อรูป) หรือ raise error ทั้ง batch"""
+
+    def __init__(self, results=None, error=None, pending=0, max_pending=32):
+        self.results = results or {}
+        self.error = error
+        self.pending = pending
+        self.max_pending = max_pending
+        self.calls = []
+
+    async def encode_batch(self, images):
+        self.calls.append(list(images))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [self.results[image] for image in images]
+
+
+class BrokenIndex(FaceEmbeddingIndex):
+    def match_batch(self, probes, tolerance=0.6):
+        raise RuntimeError("index broken")
+
+
+def _vector(seed):
+    vector = np.random.default_rng(seed).normal(size=FACE_ENCODING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+async def _verify_all(batcher, images, index):
+    return await asyncio.wait_for(
+        asyncio.gather(*[batcher.verify(image, index, 0.6) for image in images], return_exceptions=True),
+        timeout=2,
+    )
+
+
+async def test_batch_resolves_each_probe():
+    user_id = uuid.uuid4()
+    index = FaceEmbeddingIndex()
+    index.add(user_id, _vector(1))
+    bad_image = ValueError("cannot decode")
+    pool = FakePool({b"match": _vector(1), b"stranger": _vector(2), b"noface": None, b"bad": bad_image})
+    batcher = FaceCheckInBatcher(pool, window_ms=5, max_batch_size=8)
+
+    match, stranger, noface, bad = await _verify_all(batcher, [b"match", b"stranger", b"noface", b"bad"], index)
+
+    assert len(pool.calls) == 1
+    assert match.face_found and match.match.user_id == user_id
+    assert stranger.face_found and stranger.match is None
+    assert not noface.face_found
+    assert bad is bad_image
+
+
+async def test_encode_failure_fails_every_probe():
+    pool = FakePool(error=RuntimeError("pool crashed"))
+    batcher = FaceCheckInBatcher(pool, window_ms=5, max_batch_size=8)
+
+    results = await _verify_all(batcher, [b"a", b"b"], FaceEmbeddingIndex())
+
+    assert [str(result) for result in results] == ["pool crashed", "pool crashed"]
+
+
+async def test_match_failure_does_not_leave_probes_waiting():
+    pool = FakePool({b"a": _vector(1), b"b": _vector(2), b"noface": None})
+    batcher = FaceCheckInBatcher(pool, window_ms=5, max_batch_size=8)
+
+    a, b, noface = await _verify_all(batcher, [b"a", b"b", b"noface"], BrokenIndex())
+
+    assert isinstance(a, RuntimeError) and isinstance(b, RuntimeError)
+    assert not noface.face_found
+    assert batcher.stats()["outstanding"] == 0
+
+
+async def test_admission_counts_other_work_on_the_pool():
+    pool = FakePool({b"a": None}, pending=4, max_pending=4)
+    batcher = FaceCheckInBatcher(pool, window_ms=5, max_batch_size=8)
+
+    with pytest.raises(EncoderBusyError):
+        await batcher.verify(b"a", FaceEmbeddingIndex(), 0.6)
+
+    pool.pending = 3
+    result = await batcher.verify(b"a", FaceEmbeddingIndex(), 0.6)
+    assert not result.face_found
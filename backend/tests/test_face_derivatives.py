@@ -0,0 +1,52 @@
+# backend/tests/test_face_derivatives.py
+import uuid
+
+import pytest
+
+from app.models import UserFaceSample
+from app.services import face_derivatives as derivatives_module
+from app.services.face_derivatives import DERIVATIVES, DerivativeNotAvailableError, FaceDerivativePipeline
+from app.services.image_pipeline import ImageTooLargeError, InvalidImageError
+
+pytestmark = pytest.mark.anyio
+
+
+class FakePool:
+    """แทน face_encoder_pool: raise error ที่กำหนด แล้วนับจำนวนครั้งที่ถูกเรียก"""
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def render(self, image_bytes, specs):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.fixture
+async def sample(async_db, class_session, monkeypatch):
+    async def read(key):
+        return b"not an image"
+
+    monkeypatch.setattr(derivatives_module.storage, "read", read)
+    row = UserFaceSample(sample_id=uuid.uuid4(), user_id=class_session.student_ids[0], image_url="face-samples/x")
+    async_db.add(row)
+    await async_db.commit()
+    return row
+
+
+@pytest.mark.parametrize("error", [InvalidImageError("Cannot decode image"), ImageTooLargeError("Image resolution is too large")])
+async def test_unprocessable_original_is_not_available_and_remembered(async_db, sample, monkeypatch, error):
+    pool = FakePool(error)
+    monkeypatch.setattr(derivatives_module, "face_encoder_pool", pool)
+    pipeline = FaceDerivativePipeline(DERIVATIVES)
+
+    with pytest.raises(DerivativeNotAvailableError, match="cannot be processed"):
+        await pipeline.ensure(sample, "thumb-160.jpg")
+
+    await async_db.refresh(sample)
+    assert sample.derivatives == {"thumb-160.jpg": None}
+    # ครั้งถัดไปตอบจาก record ที่บันทึกไว้ ไม่ส่งเข้า pool อีก
+    with pytest.raises(DerivativeNotAvailableError, match="cannot be processed"):
+        await pipeline.ensure(sample, "thumb-160.jpg")
+    assert pool.calls == 1
@@ -0,0 +1,39 @@
+# backend/tests/test_face_encoder_pool.py
+from concurrent.futures import Future
+
+import pytest
+
+from app.services import face_encoder_pool as pool_module
+from app.services.face_encoder_pool import FaceEncoderPool
+
+
+class FakeExecutor:
+    """แทน ProcessPoolExecutor: ทำงานใน process เดียวกัน (ไม่ต้องมี face libraries)"""
+
+    def __init__(self, max_workers, initializer=None):
+        self.max_workers = max_workers
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.mark.parametrize("start_method, preloaded", [("fork", True), ("spawn", False), ("forkserver", False)])
+def test_models_are_preloaded_only_for_fork(monkeypatch, start_method, preloaded):
+    calls = []
+    monkeypatch.setattr(pool_module, "ProcessPoolExecutor", FakeExecutor)
+    monkeypatch.setattr(pool_module, "preload_face_models", lambda: calls.append(True))
+    monkeypatch.setattr(pool_module.multiprocessing, "get_start_method", lambda: start_method)
+
+    pool = FaceEncoderPool(workers=2, max_pending=4)
+    pool.start()
+    try:
+        assert pool.started
+        assert bool(calls) is preloaded
+        assert pool.stats()["preloaded"] is preloaded
+    finally:
+        pool.shutdown()
@@ -0,0 +1,78 @@
+# backend/tests/test_face_index.py
+import uuid
+
+import numpy as np
+import pytest
+
+from app.services.face_recognition_service import (
+    FACE_ENCODING_DIM,
+    FaceEmbeddingIndex,
+    as_encoding,
+    encoding_to_bytes,
+)
+
+
+def _vector(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vector = rng.normal(size=FACE_ENCODING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _brute_force(index_rows, probe):
+    distances = [np.linalg.norm(encoding - probe) for _, encoding in index_rows]
+    best = int(np.argmin(distances))
+    return index_rows[best][0], distances[best]
+
+
+def test_as_encoding_accepts_bytes_and_lists():
+    vector = _vector(1)
+    assert np.array_equal(as_encoding(encoding_to_bytes(vector)), vector)
+    assert np.array_equal(as_encoding(vector.tolist()), vector)
+    with pytest.raises(ValueError):
+        as_encoding([0.0] * 3)
+
+
+def test_match_batch_agrees_with_brute_force():
+    rows = [(uuid.uuid4(), _vector(seed)) for seed in range(50)]
+    index = FaceEmbeddingIndex()
+    index.build(rows)
+    probes = np.vstack([rows[i][1] + 0.01 * _vector(100 + i) for i in (3, 17, 42)])
+
+    matches = index.match_batch(probes, tolerance=10.0)
+
+    for probe, match in zip(probes, matches):
+        user_id, distance = _brute_force(rows, probe)
+        assert match.user_id == user_id
+        assert match.distance == pytest.approx(distance, abs=1e-4)
+
+
+def test_match_respects_tolerance_and_empty_index():
+    index = FaceEmbeddingIndex()
+    assert index.match(_vector(1)) is None
+
+    user_id = uuid.uuid4()
+    index.add(user_id, _vector(1))
+    assert index.match(_vector(1)).user_id == user_id
+    assert index.match(_vector(2), tolerance=0.1) is None
+
+
+def test_replace_remove_and_subset():
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    index = FaceEmbeddingIndex()
+    index.build([(alice, _vector(1)), (alice, _vector(2)), (bob, _vector(3))])
+    changes = []
+    index.subscribe(changes.append)
+
+    index.replace_user(alice, [_vector(4)])
+    assert len(index) == 2
+    assert index.match(_vector(4)).user_id == alice
+    assert index.match(_vector(1), tolerance=0.1) is None
+
+    sub = index.subset([bob])
+    assert len(sub) == 1
+    assert sub.match(_vector(4), tolerance=10.0).user_id == bob
+
+    index.remove_user(bob)
+    assert list(index.user_ids) == [alice]
+    index.remove_user(bob) # ไม่มีแล้ว: ไม่แจ้ง listener ซ้ำ
+    assert changes == [{alice}, {bob}]
@@ -0,0 +1,63 @@
+# backend/tests/test_face_samples.py
+import uuid
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import users as users_module
+from app.models import UserFaceSample
+from app.services.storage_service import face_sample_image_key
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeEncoder:
+    async def encode(self, image_bytes):
+        return np.zeros(128)
+
+
+@pytest.fixture
+def deleted_keys(monkeypatch):
+    keys = []
+
+    async def delete(key):
+        keys.append(key)
+
+    async def save(key, data, content_type):
+        pass
+
+    monkeypatch.setattr(users_module, "face_encoder_pool", FakeEncoder())
+    monkeypatch.setattr(users_module.storage, "delete", delete)
+    monkeypatch.setattr(users_module.storage, "save", save)
+    return keys
+
+
+async def test_concurrent_complete_conflicts_without_deleting_the_image(async_db, class_session, deleted_keys):
+    user_id = class_session.student_ids[0]
+    sample_id = uuid.uuid4()
+    key = face_sample_image_key(user_id, sample_id)
+    # อีกคำขอ /complete บันทึก sample นี้ไปแล้วระหว่างที่คำขอนี้กำลัง encode
+    async_db.add(UserFaceSample(sample_id=sample_id, user_id=user_id, image_url=key))
+    await async_db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await users_module._enroll_face_image(async_db, user_id, sample_id, b"image")
+
+    assert exc_info.value.status_code == 409
+    assert deleted_keys == []
+    assert await async_db.get(UserFaceSample, sample_id, populate_existing=True) is not None
+
+
+async def test_failed_direct_upload_deletes_its_own_image(async_db, class_session, deleted_keys):
+    user_id = class_session.student_ids[1]
+    sample_id = uuid.uuid4()
+    # บันทึกไม่สำเร็จ (sample_id ชนกับแถวอื่น) แต่รูปนี้คำขอเขียนเอง จึงต้องลบทิ้ง
+    async_db.add(UserFaceSample(sample_id=sample_id, user_id=class_session.student_ids[0], image_url="other"))
+    await async_db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await users_module._enroll_face_image(async_db, user_id, sample_id, b"image", "image/jpeg")
+
+    assert exc_info.value.status_code == 409
+    assert deleted_keys == [face_sample_image_key(user_id, sample_id)]
@@ -0,0 +1,122 @@
+# backend/tests/test_job_queue.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+from app.services.job_queue import JOB_TYPES, JobContext, JobType, JobWorker, enqueue
+
+pytestmark = pytest.mark.anyio
+
+
+async def _noop(ctx):
+    return None
+
+
+@pytest.fixture
+def job_types(monkeypatch):
+    """job type สำหรับทดสอบ (ไม่ใช้ handler จริงของ app)"""
+    def register(name, handler=_noop, **options):
+        monkeypatch.setitem(JOB_TYPES, name, JobType(name, handler, **options))
+        return JOB_TYPES[name]
+    return register
+
+
+async def _reload(db, job):
+    return await db.get(Job, job.job_id, populate_existing=True)
+
+
+async def test_claim_marks_jobs_running_and_respects_concurrency(async_db, job_types):
+    spec = job_types("test_limited", concurrency=2)
+    jobs = [await enqueue(async_db, "test_limited") for _ in range(3)]
+    later = await enqueue(async_db, "test_limited", run_at=datetime.now(timezone.utc) + timedelta(hours=1))
+    worker = JobWorker(types=["test_limited"])
+
+    claimed = await worker._claim(spec, free=10)
+
+    assert {job.job_id for job in claimed} == {job.job_id for job in jobs[:2]}
+    for job in claimed:
+        assert (job.status, job.attempts, job.locked_by) == (JobStatus.RUNNING.value, 1, worker.worker_id)
+    # ครบ concurrency ของ type นี้แล้ว แม้อีก worker หนึ่งจะมีที่ว่าง
+    assert await JobWorker(types=["test_limited"])._claim(spec, free=10) == []
+    assert (await _reload(async_db, later)).status == JobStatus.QUEUED.value
+
+
+async def test_failure_is_retried_with_backoff_then_failed(async_db, job_types, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 10)
+    spec = job_types("test_retry", max_attempts=2)
+    job = await enqueue(async_db, "test_retry")
+    worker = JobWorker(types=["test_retry"])
+
+    (claimed,) = await worker._claim(spec, free=1)
+    before = datetime.now(timezone.utc)
+    await worker._fail(JobContext(claimed), spec.max_attempts, "boom")
+    retried = await _reload(async_db, job)
+    assert (retried.status, retried.error, retried.locked_by) == (JobStatus.QUEUED.value, "boom", None)
+    # backoff 10 วินาที +-20%
+    delay = (retried.run_at.replace(tzinfo=timezone.utc) - before).total_seconds()
+    assert 7.9 <= delay <= 12.1
+
+    await async_db.execute(update(Job).where(Job.job_id == job.job_id).values(run_at=before))
+    await async_db.commit()
+    (claimed,) = await worker._claim(spec, free=1)
+    assert claimed.attempts == 2
+    await worker._fail(JobContext(claimed), spec.max_attempts, "boom again")
+    failed = await _reload(async_db, job)
+    assert (failed.status, failed.error) == (JobStatus.FAILED.value, "boom again")
+    assert worker.stats()["retried"] == 1 and worker.stats()["failed"] == 1
+
+
+async def test_reaper_requeues_stale_jobs_and_fails_exhausted_ones(async_db, job_types):
+    spec = job_types("test_stale", max_attempts=2)
+    fresh, stale, exhausted = [await enqueue(async_db, "test_stale") for _ in range(3)]
+    worker = JobWorker(types=["test_stale"])
+    await worker._claim(spec, free=3)
+    old = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_SECONDS + 5)
+    await async_db.execute(update(Job).where(Job.job_id.in_([stale.job_id, exhausted.job_id])).values(heartbeat_at=old))
+    await async_db.execute(update(Job).where(Job.job_id == exhausted.job_id).values(attempts=2))
+    await async_db.commit()
+
+    await worker._requeue_stale()
+
+    assert (await _reload(async_db, fresh)).status == JobStatus.RUNNING.value
+    requeued = await _reload(async_db, stale)
+    assert (requeued.status, requeued.locked_by) == (JobStatus.QUEUED.value, None)
+    assert (await _reload(async_db, exhausted)).status == JobStatus.FAILED.value
+
+
+async def test_heartbeat_stops_a_job_that_was_requeued(async_db, job_types, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_SECONDS", 0.05)
+    started, stopped = asyncio.Event(), asyncio.Event()
+
+    async def slow(ctx):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        finally:
+            stopped.set()
+
+    spec = job_types("test_slow", handler=slow)
+    job = await enqueue(async_db, "test_slow")
+    worker = JobWorker(types=["test_slow"])
+    (claimed,) = await worker._claim(spec, free=1)
+    ctx = JobContext(claimed)
+    execution = asyncio.get_running_loop().create_task(worker._execute(spec, ctx, spec.max_attempts))
+    await started.wait()
+
+    # reaper นำงานกลับเข้าคิว (เช่น event loop ของ worker นี้ค้างนานเกิน JOB_STALE_SECONDS)
+    await async_db.execute(
+        update(Job).where(Job.job_id == job.job_id).values(status=JobStatus.QUEUED.value, locked_by=None)
+    )
+    await async_db.commit()
+
+    await asyncio.wait_for(stopped.wait(), 5)
+    await asyncio.wait_for(execution, 5)
+    assert ctx.lost and ctx.cancelled
+    assert worker.stats()["lost"] == 1
+    # ไม่เขียนทับงานที่ถูกนำกลับเข้าคิวแล้ว
+    requeued = await _reload(async_db, job)
+    assert (requeued.status, requeued.locked_by, requeued.attempts) == (JobStatus.QUEUED.value, None, 1)
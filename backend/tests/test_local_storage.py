@@ -0,0 +1,44 @@
+# backend/tests/test_local_storage.py
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.services.storage_service import LocalStorage
+
+
+@pytest.fixture
+def local(tmp_path):
+    storage = LocalStorage(root=str(tmp_path), secret_key="secret", workers=1, presign_expires=60)
+    yield storage
+    storage.shutdown()
+
+
+def _signed(url):
+    query = parse_qs(urlsplit(url).query)
+    return int(query["expires"][0]), query["signature"][0]
+
+
+def test_get_url_round_trip(local):
+    expires, signature = _signed(local.presigned_url("a/b.jpg"))
+    assert local.verify_signature("GET", "a/b.jpg", expires, signature)
+    assert not local.verify_signature("GET", "a/other.jpg", expires, signature)
+    assert not local.verify_signature("PUT", "a/b.jpg", expires, signature)
+
+
+def test_put_url_is_bound_to_its_content_type(local):
+    expires, signature = _signed(local.presigned_url("a/b.jpg", method="PUT", content_type="image/jpeg"))
+    assert local.verify_signature("PUT", "a/b.jpg", expires, signature, "image/jpeg")
+    assert not local.verify_signature("PUT", "a/b.jpg", expires, signature, "text/html")
+    assert not local.verify_signature("PUT", "a/b.jpg", expires, signature)
+
+
+def test_put_url_without_content_type_accepts_any(local):
+    expires, signature = _signed(local.presigned_url("a/b.bin", method="PUT"))
+    assert local.verify_signature("PUT", "a/b.bin", expires, signature)
+    assert local.verify_signature("PUT", "a/b.bin", expires, signature, "application/octet-stream")
+
+
+def test_expired_url_is_rejected(local):
+    expires = int(time.time()) - 1
+    assert not local.verify_signature("GET", "a/b.jpg", expires, local._signature("GET", "a/b.jpg", expires))
@@ -0,0 +1,130 @@
+# backend/tests/test_metrics.py
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.core import metrics as metrics_module
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, _operation
+
+pytestmark = pytest.mark.anyio
+
+
+def _lines(registry):
+    return registry.render().splitlines()
+
+
+def test_counter_and_gauge_render_help_type_and_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route", "status"))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    requests.inc("/a", "200")
+    requests.inc("/a", "200", amount=2)
+    requests.inc('/b"\\\n', "500")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert _lines(registry) == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a",status="200"} 3',
+        'requests_total{route="/b\\"\\\\\\n",status="500"} 1',
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 1",
+    ]
+
+
+def test_values_are_integers_when_whole_and_repr_otherwise():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("value", "Value.", ("kind",))
+    gauge.set(2.0, "whole")
+    gauge.set(0.25, "fraction")
+    assert _lines(registry)[2:] == ['value{kind="whole"} 2', 'value{kind="fraction"} 0.25']
+
+
+def test_histogram_buckets_are_cumulative_with_inf_count_and_sum():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/a")
+
+    assert _lines(registry)[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2', # ค่าที่เท่ากับขอบบนอยู่ใน bucket นั้น (le)
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_count{route="/a"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+    ]
+
+
+def test_collectors_are_rendered_after_metrics_on_every_scrape():
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Hits.").inc()
+    size = {"value": 1}
+    registry.add_collector(lambda: [("cache_size", "gauge", "Cache size.", [({"cache": "users"}, size["value"])])])
+
+    assert _lines(registry)[-3:] == ["# HELP cache_size Cache size.", "# TYPE cache_size gauge", 'cache_size{cache="users"} 1']
+    size["value"] = 5
+    assert _lines(registry)[-1] == 'cache_size{cache="users"} 5'
+
+
+@pytest.mark.parametrize(
+    "statement, operation",
+    [("SELECT 1", "SELECT"), ("  insert into t", "INSERT"), ("WITH x AS (...)", "WITH"), ("BEGIN", "OTHER"), ("", "OTHER")],
+)
+def test_query_operation_label(statement, operation):
+    assert _operation(statement) == operation
+
+
+def _sample(metric, *labels):
+    return metric._values.get(labels)
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {}
+
+    app.add_middleware(MetricsMiddleware)
+    before_ok = _sample(metrics_module.http_requests_total, "GET", "/items/{item_id}", "200") or 0
+    before_missing = _sample(metrics_module.http_requests_total, "GET", "/items/{item_id}", "404") or 0
+    before_unmatched = _sample(metrics_module.http_requests_total, "GET", "unmatched", "404") or 0
+
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/items/0")
+        client.get("/nope")
+
+    assert _sample(metrics_module.http_requests_total, "GET", "/items/{item_id}", "200") == before_ok + 2
+    assert _sample(metrics_module.http_requests_total, "GET", "/items/{item_id}", "404") == before_missing + 1
+    assert _sample(metrics_module.http_requests_total, "GET", "unmatched", "404") == before_unmatched + 1
+    assert _sample(metrics_module.http_requests_in_flight) == 0
+
+
+def _request(authorization=None):
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request({"type": "http", "method": "GET", "path": "/metrics", "headers": headers})
+
+
+async def test_metrics_endpoint_requires_bearer_token_when_configured(monkeypatch):
+    from app.api.v1.metrics import get_metrics
+
+    monkeypatch.setattr(settings, "METRICS_BEARER_TOKEN", "scrape-token")
+    with pytest.raises(HTTPException) as error:
+        await get_metrics(_request("Bearer wrong"))
+    assert error.value.status_code == 401
+
+    response = await get_metrics(_request("Bearer scrape-token"))
+    assert response.media_type.startswith("text/plain; version=0.0.4")
+    body = response.body.decode()
+    # collector ของ app ถูก render ด้วย (ค่าจาก stats() ของ singleton)
+    assert "# TYPE cache_hits_total counter" in body
+    assert "# TYPE face_encoder_pending gauge" in body
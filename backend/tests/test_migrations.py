@@ -0,0 +1,98 @@
+# backend/tests/test_migrations.py
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.migrations import SchemaOutOfDateError, alembic_config, ensure_schema
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    yield engine
+    engine.dispose()
+
+
+def _legacy_schema(engine):
+    """ฐานข้อมูลแบบที่ create_all ของโค้ดเดิมสร้าง: schema ของ revision 0001 แต่ไม่มี alembic_version"""
+    from alembic import command
+
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "0001")
+        connection.execute(text("DROP TABLE alembic_version"))
+
+
+def test_fresh_database_upgrades_to_head(engine):
+    result = ensure_schema(engine, migrate=True)
+    assert result["from"] is None and result["upgraded"]
+    assert ensure_schema(engine, migrate=False)["upgraded"] is False
+
+
+def test_legacy_database_is_stamped_and_attendance_migrated(engine):
+    _legacy_schema(engine)
+    student, teacher, class_id = uuid.uuid4().hex, uuid.uuid4().hex, uuid.uuid4().hex
+    rows = [
+        ("2026-03-01 08:00:00", "late", 0),
+        ("2026-03-01 09:00:00", "present", 0),
+        ("2026-03-01 10:00:00", "absent", 0),
+        ("2026-03-02 08:00:00", "present", 0),
+        ("2026-03-02 09:00:00", "absent", 1),
+        ("2026-03-01 23:30:00", "present", 0), # 06:30 ของวันที่ 2 ตามเวลาวิทยาเขต
+    ]
+    with engine.begin() as connection:
+        for user_id, name in ((student, "s"), (teacher, "t")):
+            connection.execute(
+                text("INSERT INTO users (user_id, username, password_hash, email) VALUES (:id, :name, 'x', :email)"),
+                {"id": user_id, "name": name, "email": f"{name}@example.com"},
+            )
+        connection.execute(
+            text("INSERT INTO classes (class_id, name, teacher_id) VALUES (:id, 'c', :teacher)"),
+            {"id": class_id, "teacher": teacher},
+        )
+        for timestamp, status, manual in rows:
+            connection.execute(
+                text("INSERT INTO attendance VALUES (:id, :class_id, :student, :ts, :status, :manual, NULL)"),
+                {"id": uuid.uuid4().hex, "class_id": class_id, "student": student, "ts": timestamp, "status": status, "manual": manual},
+            )
+
+    result = ensure_schema(engine, migrate=True)
+    assert result["from"] == "0001" and result["upgraded"]
+
+    with engine.connect() as connection:
+        kept = connection.execute(text('SELECT session_date, status, "timestamp" FROM attendance ORDER BY session_date')).all()
+        sessions = connection.execute(text("SELECT session_date, starts_at FROM class_sessions ORDER BY session_date")).all()
+        totals = connection.execute(text("SELECT present, absent, total FROM attendance_student_stats")).one()
+    # หนึ่งแถวต่อนักเรียนต่อวัน (วันตามเวลาวิทยาเขต): present ชนะสถานะอื่น, แก้ด้วยมือชนะทุกอย่าง
+    assert [tuple(row) for row in kept] == [
+        ("2026-03-01", "present", "2026-03-01 09:00:00"),
+        ("2026-03-02", "absent", "2026-03-02 09:00:00"),
+    ]
+    # session เดิมเป็น session ของทั้งวัน: เริ่มเที่ยงคืนตามเวลาวิทยาเขต (Asia/Bangkok = 17:00 UTC ของวันก่อน)
+    assert [tuple(row) for row in sessions] == [
+        ("2026-03-01", "2026-02-28 17:00:00.000000"),
+        ("2026-03-02", "2026-03-01 17:00:00.000000"),
+    ]
+    assert tuple(totals) == (1, 1, 2)
+
+
+def test_schema_matching_a_later_revision_is_stamped_as_that_revision(engine):
+    import app.models  # noqa: F401
+    from app.database import Base
+
+    Base.metadata.create_all(engine)
+    result = ensure_schema(engine, migrate=True)
+    assert result["from"] == result["to"]
+
+
+def test_unknown_schema_is_not_stamped(engine):
+    _legacy_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE users ADD COLUMN nickname VARCHAR(20)"))
+
+    with pytest.raises(SchemaOutOfDateError):
+        ensure_schema(engine, migrate=True)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT name FROM sqlite_master WHERE name = 'alembic_version'")).first() is None
@@ -0,0 +1,88 @@
+# backend/tests/test_user_import.py
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Role, User
+from app.services import user_import_service as import_module
+from app.services.user_import_service import UNIQUE_FIELDS, import_users
+
+pytestmark = pytest.mark.anyio
+
+CSV = b"""username,first_name,last_name,email,password,student_id,roles
+alice,Alice,A,alice@example.com,secret1,S001,student
+bob,Bob,B,bob@example.com,secret2,S002,student
+"""
+
+
+@pytest.fixture
+async def student_role(async_db):
+    async_db.add(Role(name="student"))
+    await async_db.commit()
+
+
+async def _user_count(db):
+    return await db.scalar(select(func.count()).select_from(User))
+
+
+async def test_rerunning_the_same_file_skips_existing_users(async_db, student_role):
+    first = await import_users(async_db, CSV, "csv")
+    second = await import_users(async_db, CSV, "csv")
+
+    assert (first.created, first.skipped, first.failed) == (2, 0, 0)
+    assert (second.created, second.skipped, second.failed) == (0, 2, 0)
+    assert [(row.row, row.status, row.error) for row in second.rows] == [
+        (1, "skipped", "User already exists"), (2, "skipped", "User already exists"),
+    ]
+    assert await _user_count(async_db) == 2
+
+
+async def test_users_created_concurrently_are_skipped_by_on_conflict(async_db, student_role, monkeypatch):
+    await import_users(async_db, CSV, "csv")
+
+    async def nothing_existing(db, rows):
+        # ผู้ใช้ถูกสร้างหลังจากตรวจกับฐานข้อมูลแล้ว: ON CONFLICT DO NOTHING ไม่คืนแถวเหล่านั้น
+        return {field: {} for field in UNIQUE_FIELDS}
+
+    monkeypatch.setattr(import_module, "_existing_values", nothing_existing)
+    report = await import_users(async_db, CSV, "csv")
+
+    assert (report.created, report.skipped) == (0, 2)
+    assert {row.error for row in report.rows} == {"User was created concurrently"}
+    assert await _user_count(async_db) == 2
+
+
+async def test_invalid_rows_are_reported_by_row_number_and_others_imported(async_db, student_role):
+    content = b"""username,first_name,last_name,email,password,student_id,roles
+alice,Alice,A,alice@example.com,secret1,S001,student
+bo,Bob,B,not-an-email,secret2,,student
+carol,Carol,C,carol@example.com,secret3,,teacher
+dave,Dave,D,dave@example.com,secret4,S001,student
+erin,Erin,E,erin@example.com,secret5,,
+"""
+    report = await import_users(async_db, content, "csv", chunk_size=2)
+
+    assert (report.total, report.created, report.failed) == (5, 2, 3)
+    results = {row.row: row for row in report.rows}
+    assert [row.row for row in report.rows] == [1, 2, 3, 4, 5]
+    assert (results[1].status, results[5].status) == ("created", "created")
+    assert "username" in results[2].error and "email" in results[2].error
+    assert results[3].error == "Unknown roles: teacher"
+    assert results[4].error == "Duplicate student_id in file (same as row 1)"
+    usernames = await async_db.scalars(select(User.username).order_by(User.username))
+    assert list(usernames) == ["alice", "erin"]
+
+
+async def test_failed_chunk_reports_a_generic_error(async_db, student_role, monkeypatch):
+    driver_message = 'duplicate key value violates unique constraint "users_email_key"'
+
+    def failing_insert(table):
+        raise IntegrityError("INSERT INTO users ...", {}, Exception(driver_message))
+
+    monkeypatch.setattr(import_module, "pg_insert", failing_insert)
+    report = await import_users(async_db, CSV, "csv")
+
+    assert (report.created, report.failed) == (0, 2)
+    assert {row.error for row in report.rows} == {"Database error while creating user"}
+    assert driver_message not in report.model_dump_json()
+    assert await _user_count(async_db) == 0
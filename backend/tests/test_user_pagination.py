@@ -0,0 +1,96 @@
+# backend/tests/test_user_pagination.py
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.user_crud import InvalidCursorError, decode_cursor, encode_cursor, list_users_page
+from app.models import Role, User
+from app.models.association import user_roles
+
+pytestmark = pytest.mark.anyio
+
+BASE_TIME = datetime(2026, 1, 1, 8, 0, 0)
+
+
+async def _add_users(db, count, same_time_every=1):
+    """สร้างผู้ใช้ count คน โดยทุก same_time_every คนมี created_at เท่ากัน (ทดสอบการตัดสินด้วย user_id)"""
+    users = [
+        User(
+            user_id=uuid.uuid4(),
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            password_hash="x",
+            created_at=BASE_TIME + timedelta(seconds=i // same_time_every),
+        )
+        for i in range(count)
+    ]
+    db.add_all(users)
+    await db.commit()
+    return users
+
+
+async def _walk(db, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        rows, _, cursor = await list_users_page(db, limit=limit, cursor=cursor, **filters)
+        pages.append([row.user_id for row in rows])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    user_id = uuid.uuid4()
+    cursor = encode_cursor(BASE_TIME, user_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (BASE_TIME, user_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(BASE_TIME, uuid.uuid4())[:-4]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+async def test_pages_cover_every_user_once_in_order(async_db):
+    users = await _add_users(async_db, 11, same_time_every=3)
+    expected = [user.user_id for user in sorted(users, key=lambda user: (user.created_at, user.user_id))]
+
+    pages = await _walk(async_db, limit=4)
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert [user_id for page in pages for user_id in page] == expected
+
+
+async def test_exact_multiple_of_limit_has_no_empty_last_page(async_db):
+    await _add_users(async_db, 4)
+    pages = await _walk(async_db, limit=2)
+    assert [len(page) for page in pages] == [2, 2]
+
+
+async def test_filters_apply_to_every_page(async_db):
+    users = await _add_users(async_db, 6)
+    role = Role(name="student")
+    async_db.add(role)
+    await async_db.flush()
+    students = users[::2]
+    await async_db.execute(user_roles.insert(), [{"user_id": user.user_id, "role_id": role.id} for user in students])
+    await async_db.commit()
+
+    pages = await _walk(async_db, limit=2, role="student")
+
+    assert [user_id for page in pages for user_id in page] == [user.user_id for user in students]
+
+
+async def test_role_names_are_returned_per_user(async_db):
+    users = await _add_users(async_db, 2)
+    role = Role(name="teacher")
+    async_db.add(role)
+    await async_db.flush()
+    await async_db.execute(user_roles.insert(), [{"user_id": users[0].user_id, "role_id": role.id}])
+    await async_db.commit()
+
+    rows, role_names, _ = await list_users_page(async_db, limit=10)
+
+    assert role_names[users[0].user_id] == ["teacher"]
+    assert role_names.get(users[1].user_id, []) == []